@@ -0,0 +1,69 @@
+"""
+Custo por acesso do MemoryManager com a cache de mapeamento direto.
+Mede leituras que sempre erram (passo de um bloco inteiro sobre uma região maior que a
+cache: cada leitura busca um bloco na RAM) e leituras que sempre acertam, e desconta
+das primeiras o custo das segundas para estimar o custo do preenchimento de linha.
+Mede também, na mesma execução, o preenchimento isolado: fill_block (cópia direta das
+páginas da RAM) contra o caminho com listas (read_block + load_block) que ele substituiu.
+Uso: python -m benchmarks.bench_cache [acessos]
+"""
+
+import sys
+import time
+from src.hardware.memory.ram import MainMemory
+from src.hardware.memory.cache import DirectCache
+from src.hardware.memory.manager import MemoryManager
+
+def measure(addresses, accesses: int, repeat: int = 5) -> float:
+    """Nanossegundos por MemoryManager.read() percorrendo 'addresses' em ciclo (melhor de 'repeat')."""
+    mmu = MemoryManager(MainMemory(), DirectCache())
+    read = mmu.read
+    count = len(addresses)
+    rounds = max(1, accesses // (count * repeat))
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for address in addresses:
+                read(address)
+        best = min(best, time.perf_counter() - start)
+    return best / (rounds * count) * 1e9
+
+def measure_fill(fill, addresses, accesses: int, repeat: int = 5) -> float:
+    """Nanossegundos por fill(cache, ram, endereço) percorrendo 'addresses' em ciclo (melhor de 'repeat')."""
+    ram, cache = MainMemory(), DirectCache()
+    count = len(addresses)
+    rounds = max(1, accesses // (count * repeat))
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for address in addresses:
+                fill(cache, ram, address)
+        best = min(best, time.perf_counter() - start)
+    return best / (rounds * count) * 1e9
+
+def fill_direct(cache: DirectCache, ram: MainMemory, address: int):
+    cache.fill_block(address, ram)
+
+def fill_with_lists(cache: DirectCache, ram: MainMemory, address: int):
+    cache.load_block(address, ram.read_block(address, cache.block_size))
+
+def main(accesses: int = 1_000_000):
+    cache = DirectCache()
+    span = cache.size_lines * cache.block_size
+    misses = list(range(0, 4 * span, cache.block_size))    # 4x a capacidade: sempre miss
+    hits = list(range(span))                                # Cabe na cache: só misses frios
+    miss = measure(misses, accesses)
+    hit = measure(hits, accesses)
+    print(f"Leitura com miss: {miss:8.1f} ns")
+    print(f"Leitura com hit:  {hit:8.1f} ns")
+    print(f"Preenchimento de linha (miss - hit): {miss - hit:8.1f} ns")
+    lists = measure_fill(fill_with_lists, misses, accesses)
+    direct = measure_fill(fill_direct, misses, accesses)
+    print(f"Preenchimento com listas (read_block + load_block): {lists:8.1f} ns")
+    print(f"Preenchimento direto (fill_block):                  {direct:8.1f} ns")
+    print(f"Redução por miss: {lists - direct:8.1f} ns ({(1 - direct / lists) * 100:.0f}%)")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,60 @@
+"""
+Custo da gravação do ExecutionJournal no caminho quente (CPU.step).
+Compara ciclos/s de CPU.step() puro com ExecutionJournal.step() no mesmo programa.
+Uso: python -m benchmarks.bench_journal [ciclos]
+"""
+
+import sys
+import time
+from src.hardware.memory.ram import MainMemory
+from src.hardware.memory.cache import DirectCache
+from src.hardware.memory.manager import MemoryManager
+from src.hardware.cpu.cpu import CPU
+from src.hardware.cpu.journal import ExecutionJournal
+from src.assembler.parser import AssemblyParser
+from src.assembler.codegen import CodeGenerator
+
+PROGRAM = """
+LOOP:   LODD 300
+        JZER FIM
+        ADDD 301
+        STOD 301
+        LODD 300
+        SUBD 302
+        STOD 300
+        JUMP LOOP
+FIM:    LOCO 4000
+        STOD 300
+        JUMP LOOP
+"""
+
+def build_cpu() -> CPU:
+    cpu = CPU(MemoryManager(MainMemory(), DirectCache()))
+    cpu.memory.ram.load_program(CodeGenerator().generate(AssemblyParser().parse(PROGRAM)))
+    cpu.memory.ram.load_program([4000, 0, 1], 300)
+    return cpu
+
+def measure(run, cycles: int) -> float:
+    start = time.perf_counter()
+    run(cycles)
+    return cycles / (time.perf_counter() - start)
+
+def step_loop(step):
+    def run(cycles: int):
+        for _ in range(cycles):
+            step()
+    return run
+
+def main(cycles: int = 300_000):
+    plain = measure(step_loop(build_cpu().step), cycles)
+    journal = ExecutionJournal(build_cpu())
+    single = measure(step_loop(journal.step), cycles)
+    journal = ExecutionJournal(build_cpu())
+    batch = measure(journal.run, cycles)
+    print(f"CPU.step():              {plain:>12,.0f} ciclos/s")
+    print(f"ExecutionJournal.step(): {single:>12,.0f} ciclos/s  (sobrecusto {plain / single - 1:.0%})")
+    print(f"ExecutionJournal.run():  {batch:>12,.0f} ciclos/s  (sobrecusto {plain / batch - 1:.0%})")
+    print(f"Histórico: {journal.get_stats()}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 300_000)
@@ -0,0 +1,505 @@
+"""
+Suíte padrão de desempenho: programas MAC-1 canônicos medidos em cada caminho de execução.
+Cargas: laço de contagem, multiplicação por somas sucessivas, soma de vetor, bubble sort,
+recursão com CALL/RETN e dois kernels de varredura de memória (cópia sequencial e leitura
+com passo de um bloco, que erra sempre na DirectCache). Caminhos: CPU.step() puro, cada
+modo de CPU.run(), o executor em lote (src.batch.run_job) e, com NumPy e só se pedida
+(--paths vector, pois é ordens de grandeza mais lenta por ciclo), a VectorCPU.
+
+Cada carga roda até o PC sair do código; o resultado na memória é conferido e os ciclos
+têm de bater com os da referência (modo micro com PerfCounters, que também dá o número
+de instruções). Mede-se ciclos simulados/s e instruções/s (melhor de 'repeat') e o pico
+de memória alocada ao montar a máquina e executar (tracemalloc, numa execução à parte).
+
+Cada 'run' acrescenta um registro ao histórico (JSON Lines); 'compare' confronta o último
+registro com o anterior (ou com --baseline) e falha se os ciclos/s de algum par carga/caminho
+caíram mais que o limiar.
+Uso:
+    python -m benchmarks.bench_suite run [--scale 1] [--repeat 3] [--history arquivo.jsonl]
+    python -m benchmarks.bench_suite compare [--threshold 0.10] [--baseline N]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+from src.batch import BatchJob, assemble, run_job
+from src.hardware.memory.ram import MainMemory
+from src.hardware.memory.cache import DirectCache
+from src.hardware.memory.manager import MemoryManager
+from src.hardware.cpu.cpu import CPU
+from src.hardware.cpu.perf import PerfCounters
+
+HISTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "history.jsonl")
+DEFAULT_THRESHOLD = 0.10
+MAX_CYCLES = 50_000_000
+VECTOR_MACHINES = 64
+
+# Dados de todas as cargas a partir de 1000: 1001 é a constante 1, 1002 o resultado
+DATA = 1000
+ARRAY = 2000
+STACK = 3840
+
+@dataclass
+class Workload:
+    name: str
+    description: str
+    source: str
+    memory: List[dict]                                            # Imagens {"start", "words"}
+    expected: Dict[int, List[int]] = field(default_factory=dict)  # Endereço -> palavras ao fim
+
+    def ranges(self) -> List[Tuple[int, int]]:
+        return [(start, len(words)) for start, words in self.expected.items()]
+
+# --- Cargas ---
+
+def counting(n: int) -> Workload:
+    source = """
+        LODD 1000
+LOOP:   SUBD 1001
+        JNZE LOOP
+        STOD 1002
+"""
+    return Workload("counting", f"conta de {n} até 0", source,
+                    [{"start": DATA, "words": [n, 1, 0xFFFF]}], {DATA + 2: [0]})
+
+def multiply(a: int, b: int) -> Workload:
+    source = """
+        LOCO 0
+        STOD 1002
+LOOP:   LODD 1003
+        JZER FIM
+        SUBD 1001
+        STOD 1003
+        LODD 1002
+        ADDD 1000
+        STOD 1002
+        JUMP LOOP
+FIM:    LOCO 0
+"""
+    return Workload("multiply", f"{a} x {b} por somas sucessivas", source,
+                    [{"start": DATA, "words": [a, 1, 0, b]}], {DATA + 2: [(a * b) & 0xFFFF]})
+
+def _random_words(seed: int, length: int, limit: int) -> List[int]:
+    rng = random.Random(seed)
+    return [rng.randrange(limit) for _ in range(length)]
+
+def _array_walk(name: str, description: str, values: List[int], stride: int, passes: int) -> Workload:
+    """Soma m[base], m[base + stride], ... ('passes' vezes) lendo pela pilha (PSHI/POP)."""
+    source = f"""
+        LOCO {STACK}
+        SWAP
+PASS:   LODD 1006
+        STOD 1003
+        LODD 1007
+        STOD 1004
+ELEM:   LODD 1003
+        PSHI
+        POP
+        ADDD 1002
+        STOD 1002
+        LODD 1003
+        ADDD 1008
+        STOD 1003
+        LODD 1004
+        SUBD 1001
+        STOD 1004
+        JNZE ELEM
+        LODD 1005
+        SUBD 1001
+        STOD 1005
+        JNZE PASS
+"""
+    count = len(values[::stride])
+    total = sum(values[::stride]) * passes & 0xFFFF
+    data = [0, 1, 0, 0, 0, passes, ARRAY, count, stride]
+    return Workload(name, description, source,
+                    [{"start": DATA, "words": data}, {"start": ARRAY, "words": values}],
+                    {DATA + 2: [total]})
+
+def array_sum(length: int, passes: int) -> Workload:
+    values = _random_words(1, length, 100)
+    return _array_walk("array_sum", f"soma de {length} palavras, {passes} vezes", values, 1, passes)
+
+def stride_read(length: int, passes: int) -> Workload:
+    """Passo de um bloco sobre uma região maior que a cache: toda leitura de dado é miss."""
+    block = DirectCache().block_size
+    values = _random_words(2, length, 100)
+    return _array_walk("stride_read", f"{length // block} leituras com passo {block}, {passes} vezes",
+                       values, block, passes)
+
+def stream_copy(length: int, passes: int) -> Workload:
+    source = f"""
+        LOCO {STACK}
+        SWAP
+PASS:   LODD 1006
+        STOD 1003
+        LODD 1009
+        STOD 1010
+        LODD 1007
+        STOD 1004
+ELEM:   LODD 1003
+        PSHI
+        ADDD 1001
+        STOD 1003
+        LODD 1010
+        POPI
+        ADDD 1001
+        STOD 1010
+        LODD 1004
+        SUBD 1001
+        STOD 1004
+        JNZE ELEM
+        LODD 1005
+        SUBD 1001
+        STOD 1005
+        JNZE PASS
+"""
+    values = _random_words(3, length, 0x10000)
+    data = [0, 1, 0, 0, 0, passes, ARRAY, length, 0, ARRAY + length, 0]
+    return Workload("stream_copy", f"cópia de {length} palavras, {passes} vezes", source,
+                    [{"start": DATA, "words": data}, {"start": ARRAY, "words": values}],
+                    {ARRAY + length: values})
+
+def bubble_sort(length: int) -> Workload:
+    source = f"""
+        LOCO {STACK}
+        SWAP
+OUTER:  LODD 1006
+        STOD 1003
+        LODD 1008
+        STOD 1004
+        LOCO 0
+        STOD 1009
+INNER:  LODD 1003
+        PSHI
+        ADDD 1001
+        PSHI
+        LODL 1
+        SUBL 0
+        JNEG KEEP
+        JZER KEEP
+        LODD 1003
+        POPI
+        ADDD 1001
+        POPI
+        LOCO 1
+        STOD 1009
+        JUMP NEXT
+KEEP:   INSP 2
+NEXT:   LODD 1003
+        ADDD 1001
+        STOD 1003
+        LODD 1004
+        SUBD 1001
+        STOD 1004
+        JNZE INNER
+        LODD 1009
+        JNZE OUTER
+"""
+    values = _random_words(4, length, 1000)
+    data = [0, 1, 0, 0, 0, 0, ARRAY, length, length - 1, 0]
+    return Workload("bubble_sort", f"ordena {length} palavras", source,
+                    [{"start": DATA, "words": data}, {"start": ARRAY, "words": values}],
+                    {ARRAY: sorted(values)})
+
+def recursion(n: int, repeat: int) -> Workload:
+    """soma(n) = n + soma(n - 1) com o argumento na pilha; 'repeat' chamadas de fora."""
+    source = f"""
+        LOCO {STACK}
+        SWAP
+REP:    LODD 1000
+        PUSH
+        CALL SOMA
+        INSP 1
+        STOD 1002
+        LODD 1005
+        SUBD 1001
+        STOD 1005
+        JNZE REP
+        JUMP FIM
+SOMA:   LODL 1
+        JZER VOLTA
+        SUBD 1001
+        PUSH
+        CALL SOMA
+        INSP 1
+        ADDL 1
+VOLTA:  RETN
+FIM:    LOCO 0
+"""
+    data = [n, 1, 0, 0, 0, repeat]
+    return Workload("recursion", f"soma recursiva de {n}, {repeat} vezes", source,
+                    [{"start": DATA, "words": data}], {DATA + 2: [n * (n + 1) // 2 & 0xFFFF]})
+
+def workloads(scale: float = 1.0) -> List[Workload]:
+    """As cargas padrão; com scale=1 cada uma executa da ordem de 300 mil ciclos."""
+    def sized(n: int, minimum: int = 1) -> int:
+        return max(minimum, int(n * scale))
+    return [
+        counting(sized(24_000)),
+        multiply(7, sized(6_000)),
+        array_sum(256, sized(16)),
+        bubble_sort(max(4, int(48 * scale ** 0.5))),
+        recursion(100, sized(50)),
+        stream_copy(256, sized(16)),
+        stride_read(1024, sized(16)),
+    ]
+
+# --- Caminhos de execução ---
+# Cada caminho prepara a máquina e devolve (executar, ler): executar() roda até a parada e
+# devolve os ciclos simulados (somados entre as máquinas, na VectorCPU); ler(início, n)
+# devolve palavras da memória ao fim.
+
+Path = Callable[[Workload, List[int], str], Tuple[Callable[[], int], Callable[[int, int], List[int]]]]
+
+def build_cpu(workload: Workload, program: List[int], mode: str = "micro") -> CPU:
+    cpu = CPU(MemoryManager(MainMemory(), DirectCache()))
+    cpu.set_mode(mode)
+    cpu.memory.ram.load_program(program)
+    for image in workload.memory:
+        cpu.memory.ram.load_program(image["words"], image["start"])
+    return cpu
+
+def step_path(workload: Workload, program: List[int], workdir: str):
+    cpu = build_cpu(workload, program)
+    halt = len(program)
+
+    def execute() -> int:
+        step = cpu.step
+        control = cpu.control_unit
+        registers = cpu.registers
+        for cycles in range(1, MAX_CYCLES + 1):
+            step()
+            if control.MPC == 0 and registers.PC == halt:
+                return cycles
+        return MAX_CYCLES
+    return execute, cpu.memory.ram.dump
+
+def mode_path(mode: str) -> Path:
+    def path(workload: Workload, program: List[int], workdir: str):
+        cpu = build_cpu(workload, program, mode)
+        return (lambda: cpu.run(MAX_CYCLES, until_pc=len(program))), cpu.memory.ram.dump
+    return path
+
+def batch_path(workload: Workload, program: List[int], workdir: str):
+    """src.batch.run_job: monta o .asm, carrega as imagens e executa (modo block)."""
+    source = os.path.join(workdir, workload.name + ".asm")
+    with open(source, "w", encoding="utf-8") as f:
+        f.write(workload.source)
+    job = BatchJob(workload.name, source, workload.memory, ranges=workload.ranges(), max_cycles=MAX_CYCLES)
+    result = {}
+
+    def execute() -> int:
+        result.update(run_job(job))
+        if "error" in result:
+            raise RuntimeError(result["error"])
+        return result["cycles"]
+
+    def read(start: int, length: int) -> List[int]:
+        return result["memory"][str(start)][:length]
+    return execute, read
+
+def vector_path(workload: Workload, program: List[int], workdir: str):
+    """VECTOR_MACHINES cópias da carga em passo travado na VectorCPU."""
+    from src.hardware.cpu.vector import VectorCPU
+    machines = VectorCPU(VECTOR_MACHINES)
+    machines.load_program(program)
+    for image in workload.memory:
+        machines.load_memory([image["words"]] * VECTOR_MACHINES, image["start"])
+
+    def execute() -> int:
+        machines.run(MAX_CYCLES, until_pc=len(program))
+        return int(machines.cycles.sum())
+
+    def read(start: int, length: int) -> List[int]:
+        return [int(word) for word in machines.memory[0, start:start + length]]
+    return execute, read
+
+def available_paths() -> Dict[str, Path]:
+    """Todos os caminhos; os padrão são os de DEFAULT_PATHS."""
+    paths: Dict[str, Path] = {"step": step_path}
+    for mode in CPU.MODES:
+        paths[mode] = mode_path(mode)
+    paths["batch"] = batch_path
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        pass
+    else:
+        paths["vector"] = vector_path
+    return paths
+
+DEFAULT_PATHS = ("step",) + CPU.MODES + ("batch",)
+
+# --- Medição ---
+
+def reference(workload: Workload, program: List[int]) -> Tuple[int, int]:
+    """(ciclos, instruções) até a parada, no modo micro com contadores de desempenho."""
+    cpu = build_cpu(workload, program)
+    counters = PerfCounters()
+    cpu.start_counters(counters)
+    cycles = cpu.run(MAX_CYCLES, until_pc=len(program))
+    return cycles, sum(counters.retired)
+
+def measure(workload: Workload, program: List[int], path: Path, workdir: str,
+            repeat: int = 3, memory: bool = True) -> dict:
+    """Melhor tempo de 'repeat' execuções e, com 'memory', o pico alocado numa execução extra."""
+    best = float("inf")
+    for _ in range(repeat):
+        execute, read = path(workload, program, workdir)
+        start = time.perf_counter()
+        cycles = execute()
+        best = min(best, time.perf_counter() - start)
+        for address, words in workload.expected.items():
+            if read(address, len(words)) != words:
+                raise AssertionError(f"{workload.name}: memória em {address} diverge do esperado")
+    result = {"cycles": cycles, "seconds": best}
+    if memory:
+        tracemalloc.start()
+        try:
+            execute, _ = path(workload, program, workdir)
+            execute()
+            result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+def run_suite(scale: float = 1.0, repeat: int = 3, memory: bool = True,
+              names: Optional[List[str]] = None, paths: Optional[List[str]] = None,
+              progress: Optional[Callable[[str], None]] = None) -> dict:
+    """Mede as cargas em cada caminho; devolve um registro pronto para o histórico."""
+    available = available_paths()
+    selected = {name: available[name] for name in (paths or DEFAULT_PATHS)}
+    results: Dict[str, Dict[str, dict]] = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for workload in workloads(scale):
+            if names and workload.name not in names:
+                continue
+            program = assemble(workload.source)
+            cycles, instructions = reference(workload, program)
+            results[workload.name] = {}
+            for path_name, path in selected.items():
+                sample = measure(workload, program, path, workdir, repeat, memory)
+                machines = VECTOR_MACHINES if path_name == "vector" else 1
+                if sample["cycles"] != cycles * machines:
+                    raise AssertionError(f"{workload.name}/{path_name}: {sample['cycles']} ciclos, "
+                                         f"referência {cycles * machines}")
+                sample["instructions"] = instructions * machines
+                sample["cycles_per_s"] = sample["cycles"] / sample["seconds"]
+                sample["instructions_per_s"] = sample["instructions"] / sample["seconds"]
+                results[workload.name][path_name] = sample
+                if progress:
+                    progress(format_sample(workload.name, path_name, sample))
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "scale": scale,
+        "repeat": repeat,
+        "results": results,
+    }
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+def format_sample(workload: str, path: str, sample: dict) -> str:
+    peak = f"{sample['peak_bytes'] / 1024:>9.0f} KiB" if "peak_bytes" in sample else ""
+    return (f"{workload:<12} {path:<10} {sample['cycles_per_s'] / 1e6:>8.3f} M ciclos/s "
+            f"{sample['instructions_per_s'] / 1e6:>8.3f} M instr/s {peak}")
+
+# --- Histórico e comparação ---
+
+def load_history(path: str) -> List[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def append_history(path: str, record: dict):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+def compare(baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD) -> List[dict]:
+    """
+    Pares carga/caminho presentes nos dois registros, com a razão dos ciclos/s
+    (atual / base) e 'regressed' quando ela fica abaixo de 1 - threshold.
+    """
+    rows = []
+    for workload, paths in current["results"].items():
+        for path, sample in paths.items():
+            base = baseline["results"].get(workload, {}).get(path)
+            if base is None:
+                continue
+            ratio = sample["cycles_per_s"] / base["cycles_per_s"]
+            rows.append({"workload": workload, "path": path, "baseline": base["cycles_per_s"],
+                         "current": sample["cycles_per_s"], "ratio": ratio,
+                         "regressed": ratio < 1 - threshold})
+    return rows
+
+def run_command(args: argparse.Namespace) -> int:
+    record = run_suite(args.scale, args.repeat, not args.no_memory, args.workloads, args.paths,
+                       progress=print)
+    append_history(args.history, record)
+    print(f"Registro acrescentado a {args.history}")
+    return 0
+
+def compare_command(args: argparse.Namespace) -> int:
+    history = load_history(args.history)
+    if len(history) < 2:
+        print(f"{args.history}: são precisos ao menos dois registros", file=sys.stderr)
+        return 1
+    baseline = history[args.baseline]
+    current = history[-1]
+    rows = compare(baseline, current, args.threshold)
+    if baseline.get("scale") != current.get("scale"):
+        print(f"Aviso: escalas diferentes ({baseline.get('scale')} x {current.get('scale')})")
+    print(f"Base: {baseline['timestamp']} ({baseline.get('commit')})  "
+          f"Atual: {current['timestamp']} ({current.get('commit')})")
+    for row in rows:
+        flag = "  REGRESSÃO" if row["regressed"] else ""
+        print(f"{row['workload']:<12} {row['path']:<10} {row['baseline'] / 1e6:>8.3f} -> "
+              f"{row['current'] / 1e6:>8.3f} M ciclos/s ({row['ratio'] - 1:+.1%}){flag}")
+    regressions = sum(row["regressed"] for row in rows)
+    if regressions:
+        print(f"{regressions} regressões acima de {args.threshold:.0%}")
+        return 1
+    return 0
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_suite",
+                                     description="Suíte padrão de desempenho do simulador.")
+    parser.add_argument("--history", default=HISTORY, help="histórico JSON Lines")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="mede as cargas e acrescenta um registro ao histórico")
+    run.add_argument("--scale", type=float, default=1.0, help="multiplica o tamanho das cargas")
+    run.add_argument("--repeat", type=int, default=3, help="execuções por medida (vale a melhor)")
+    run.add_argument("--no-memory", action="store_true", help="não mede o pico de memória")
+    run.add_argument("--workloads", nargs="+", metavar="CARGA")
+    run.add_argument("--paths", nargs="+", metavar="CAMINHO", choices=list(available_paths()))
+    run.set_defaults(handler=run_command)
+
+    cmp = commands.add_parser("compare", help="compara o último registro com um anterior")
+    cmp.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                     help="queda de ciclos/s tolerada (fração, padrão 0.10)")
+    cmp.add_argument("--baseline", type=int, default=-2, help="índice do registro base no histórico")
+    cmp.set_defaults(handler=compare_command)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4 @@
+import sys
+from src.main import main
+
+sys.exit(main())
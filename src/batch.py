@@ -0,0 +1,201 @@
+"""
+Execução em lote (sem GUI) de muitos programas MAC-1.
+Cada job monta um arquivo .asm (AssemblyParser + CodeGenerator), carrega o binário e
+as imagens de memória de entrada numa CPU + MemoryManager novos e executa até o PC
+sair do código ou chegar a um JUMP para si mesmo (FIM: JUMP FIM), como o --until-halt
+de 'python -m src run' (ou até um PC/limite de ciclos dados). Os jobs rodam num pool
+de processos do tamanho do número de núcleos, e os resultados saem em JSON Lines à
+medida que ficam prontos (nada é acumulado em memória). Uma entrada malformada vira
+um resultado com 'error', sem interromper o lote.
+
+Entradas aceitas:
+- um diretório: todos os .asm dele (ordem alfabética), com as opções da linha de comando;
+- um manifesto JSON: {"defaults": {...}, "jobs": [{"source": "aluno1.asm", ...}, ...]},
+  com caminhos relativos ao manifesto. Campos de um job (todos opcionais menos 'source'):
+  name, memory (lista de imagens ou caminho de um .json com elas), registers,
+  ranges, max_cycles, until_pc, mode.
+
+Uma imagem de memória é {"start": endereço, "words": [palavras]}; um intervalo de
+saída é [início, tamanho]. Uso:
+    python -m src.batch turma/ --range 0x100:16 --workers 32 -o notas.jsonl
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from src.assembler.parser import AssemblyParser, AssemblerError
+from src.assembler.codegen import CodeGenerator
+from src.common.utils import halt_pcs
+from src.hardware.memory.ram import MainMemory
+from src.hardware.memory.cache import DirectCache
+from src.hardware.memory.manager import MemoryManager
+from src.hardware.cpu.cpu import CPU
+
+DEFAULT_MAX_CYCLES = 1_000_000
+
+@dataclass
+class BatchJob:
+    name: str
+    source: str                                            # Caminho do .asm
+    memory: List[dict] = field(default_factory=list)       # Imagens {"start", "words"}
+    registers: Dict[str, int] = field(default_factory=dict)
+    ranges: List[Tuple[int, int]] = field(default_factory=list)  # (início, tamanho) no resultado
+    max_cycles: int = DEFAULT_MAX_CYCLES
+    until_pc: Optional[int] = None                         # None: halt_pcs (fora do código ou JUMP para si)
+    mode: str = "block"
+    error: Optional[str] = None                            # Entrada inválida: só reporta o erro
+
+def assemble(source_code: str) -> List[int]:
+    """Código-fonte MAC-1 -> lista de palavras de 16 bits."""
+    return CodeGenerator().generate(AssemblyParser().parse(source_code))
+
+def run_job(job: BatchJob) -> dict:
+    """Executa um job numa máquina nova. Erros de montagem/execução viram o campo 'error'."""
+    result = {"name": job.name, "source": job.source}
+    if job.error is not None:
+        result["error"] = job.error
+        return result
+    try:
+        with open(job.source, encoding="utf-8") as f:
+            program = assemble(f.read())
+
+        cpu = CPU(MemoryManager(MainMemory(), DirectCache()))
+        cpu.set_mode(job.mode)
+        cpu.memory.ram.load_program(program)
+        for image in job.memory:
+            cpu.memory.ram.load_program(image["words"], image.get("start", 0))
+        for name, value in job.registers.items():
+            cpu.registers.write(name, value)
+
+        until_pc = halt_pcs(program) if job.until_pc is None else {job.until_pc}
+        cycles = cpu.run(job.max_cycles, until_pc=until_pc)
+    except (OSError, AssemblerError, ValueError) as e:
+        result["error"] = str(e)
+        return result
+
+    result.update({
+        "halted": cpu.control_unit.MPC == 0 and cpu.registers.PC in until_pc,
+        "cycles": cycles,
+        "registers": cpu.registers.debug_state(),
+        "memory": {str(start): cpu.memory.ram.dump(start, length) for start, length in job.ranges},
+        "cache": cpu.memory.get_stats(),
+    })
+    return result
+
+def run_batch(jobs: Iterable[BatchJob], workers: Optional[int] = None,
+              chunksize: int = 4) -> Iterator[dict]:
+    """
+    Resultados dos jobs na ordem em que terminam. 'workers' processos (padrão: um por
+    núcleo); com workers=1 tudo roda no processo atual.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        yield from map(run_job, jobs)
+        return
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap_unordered(run_job, jobs, chunksize)
+
+# --- Leitura das entradas ---
+
+def _number(value) -> int:
+    """Aceita inteiros ou strings em decimal/hex ('0x100')."""
+    return value if isinstance(value, int) else int(value, 0)
+
+def _load_images(value, base: str) -> List[dict]:
+    """Imagens de memória: lista inline ou caminho de um .json (relativo a 'base')."""
+    if isinstance(value, str):
+        with open(os.path.join(base, value), encoding="utf-8") as f:
+            value = json.load(f)
+    if isinstance(value, dict):
+        value = [value]
+    return [{"start": _number(image.get("start", 0)), "words": [_number(w) for w in image["words"]]}
+            for image in value]
+
+def _make_job(entry: dict, base: str) -> BatchJob:
+    source = os.path.join(base, entry["source"])
+    until_pc = entry.get("until_pc")
+    return BatchJob(
+        name=entry.get("name") or os.path.splitext(os.path.basename(source))[0],
+        source=source,
+        memory=_load_images(entry.get("memory", []), base),
+        registers={name: _number(v) for name, v in entry.get("registers", {}).items()},
+        ranges=[(_number(s), _number(n)) for s, n in entry.get("ranges", [])],
+        max_cycles=_number(entry.get("max_cycles", DEFAULT_MAX_CYCLES)),
+        until_pc=None if until_pc is None else _number(until_pc),
+        mode=entry.get("mode", "block"),
+    )
+
+def _load_job(defaults: dict, entry, base: str, index: int) -> BatchJob:
+    """_make_job sobre 'defaults' + 'entry'; uma entrada malformada vira um job com 'error'."""
+    try:
+        return _make_job({**defaults, **entry}, base)
+    except (OSError, KeyError, TypeError, ValueError, AttributeError) as e:
+        source = entry.get("source") if isinstance(entry, dict) else None
+        name = entry.get("name") if isinstance(entry, dict) else None
+        return BatchJob(name=str(name or source or f"job {index}"), source=str(source or ""),
+                        error=f"job inválido ({type(e).__name__}: {e})")
+
+def load_jobs(path: str, defaults: Optional[dict] = None) -> Iterator[BatchJob]:
+    """
+    Jobs de um diretório de .asm ou de um manifesto JSON. 'defaults' (mesmos campos
+    de um job) vale para todos; num manifesto, a seção "defaults" e o próprio job têm
+    prioridade.
+    """
+    defaults = dict(defaults or {})
+    if os.path.isdir(path):
+        for index, filename in enumerate(sorted(os.listdir(path))):
+            if filename.lower().endswith(".asm"):
+                yield _load_job(defaults, {"source": filename}, path, index)
+        return
+
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    defaults.update(manifest.get("defaults", {}))
+    for index, entry in enumerate(manifest["jobs"]):
+        yield _load_job(defaults, entry, base, index)
+
+# --- Linha de comando ---
+
+def _range(text: str) -> Tuple[int, int]:
+    start, _, length = text.partition(":")
+    return _number(start), _number(length or "1")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.batch",
+                                     description="Monta e executa programas MAC-1 em lote (saída JSON Lines).")
+    parser.add_argument("input", help="diretório com arquivos .asm ou manifesto .json")
+    parser.add_argument("--memory", help="imagens de memória (.json) carregadas em todos os jobs")
+    parser.add_argument("--range", dest="ranges", action="append", type=_range, default=[],
+                        metavar="INÍCIO:TAMANHO", help="intervalo de memória incluído no resultado")
+    parser.add_argument("--max-cycles", type=_number, default=DEFAULT_MAX_CYCLES)
+    parser.add_argument("--until-pc", type=_number, help="PC de parada (padrão: fora do código ou num JUMP para si mesmo)")
+    parser.add_argument("--mode", choices=CPU.MODES, default="block")
+    parser.add_argument("--workers", type=int, help="processos (padrão: número de núcleos)")
+    parser.add_argument("-o", "--output", help="arquivo de saída (padrão: stdout)")
+    args = parser.parse_args(argv)
+
+    defaults = {"ranges": args.ranges, "max_cycles": args.max_cycles, "mode": args.mode}
+    if args.memory:
+        defaults["memory"] = _load_images(os.path.abspath(args.memory), "")
+    if args.until_pc is not None:
+        defaults["until_pc"] = args.until_pc
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    failures = 0
+    try:
+        for result in run_batch(load_jobs(args.input, defaults), args.workers):
+            failures += "error" in result
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+from collections import OrderedDict
+from typing import FrozenSet, List, Set
+
+class LRUCache(OrderedDict):
+    """
+    Dicionário com no máximo 'maxsize' entradas: ao passar do limite, descarta a usada
+    há mais tempo. Usado pelos caches globais de tradução (firmware compilado, rotinas,
+    microinstruções decodificadas), para que processos longos não cresçam sem limite.
+    """
+    def __init__(self, maxsize: int):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+
+def halt_addresses(program: List[int]) -> Set[int]:
+    """Endereços dos JUMPs para si mesmos (ex.: FIM: JUMP FIM) num programa carregado em 0."""
+    return {address for address, word in enumerate(program)
+            if word >> 12 == 0x6 and word & 0xFFF == address}
+
+def halt_pcs(program: List[int]) -> FrozenSet[int]:
+    """
+    PCs em que um programa carregado em 0 terminou: um JUMP para si mesmo ou qualquer
+    PC fora do código (até 0xFFFF). Serve de until_pc para CPU.run().
+    """
+    return frozenset(halt_addresses(program)).union(range(len(program), 1 << 16))
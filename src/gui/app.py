@@ -7,12 +7,13 @@ import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 
 # Importações do Hardware
-from src.hardware.cpu.control import ControlUnit
-from src.hardware.cpu.datapath import Datapath
-from src.hardware.cpu.registers import Registers
+from src.hardware.cpu.cpu import CPU
+from src.hardware.cpu.breakpoints import Breakpoints
+from src.hardware.cpu.journal import ExecutionJournal
 from src.hardware.memory.ram import MainMemory
 from src.hardware.memory.cache import DirectCache
 from src.hardware.memory.manager import MemoryManager
+from src.hardware.replay import ReplaySource
 
 # Importações de Ferramentas
 from src.assembler.parser import AssemblyParser
@@ -29,6 +30,9 @@ class Mic1SimulatorApp(tk.Tk):
         self.geometry("1200x800")
         
         # --- 1. Inicialização do Hardware ---
+        # Breakpoints e rótulos do último programa sobrevivem ao Reset
+        self.breakpoints = Breakpoints()
+        self.symbols = {}
         self.init_hardware()
         
         # --- 2. Interface Gráfica ---
@@ -38,6 +42,9 @@ class Mic1SimulatorApp(tk.Tk):
         self.running = False
         self.speed = 1000 # ms
         self.after_id = None
+
+        # Replay de trace: quando ativo, a tela mostra o trace em vez do hardware ao vivo
+        self.replay = None
         
         # Atualiza a tela inicial
         self.refresh_view()
@@ -49,15 +56,15 @@ class Mic1SimulatorApp(tk.Tk):
         self.cache = DirectCache()
         self.mmu = MemoryManager(self.ram, self.cache)
         
-        # CPU
-        self.registers = Registers()
-        self.control_unit = ControlUnit()
-        self.datapath = Datapath(self.registers)
-        
-        # Carregar Microprograma Padrão (Hardcoded ou de arquivo)
-        # POR ENQUANTO: Vamos carregar um microprograma vazio ou de teste
-        # Na versão final, carregaremos o mic1.rom aqui
-        pass
+        # CPU (já com o microprograma padrão de firmware.py)
+        self.cpu = CPU(self.mmu)
+        self.registers = self.cpu.registers
+        self.control_unit = self.cpu.control_unit
+        self.datapath = self.cpu.datapath
+        self.cpu.set_breakpoints(self.breakpoints)
+
+        # Histórico para voltar no tempo (Passo Atrás)
+        self.journal = ExecutionJournal(self.cpu)
 
     def create_widgets(self):
         """Monta o layout da janela."""
@@ -79,6 +86,9 @@ class Mic1SimulatorApp(tk.Tk):
         
         self.btn_step = ttk.Button(control_group, text="Passo (Clock)", command=self.step_clock)
         self.btn_step.pack(fill=tk.X, padx=5, pady=2)
+
+        self.btn_back = ttk.Button(control_group, text="Passo Atrás", command=self.step_back)
+        self.btn_back.pack(fill=tk.X, padx=5, pady=2)
         
         self.btn_run = ttk.Button(control_group, text="Executar (Run)", command=self.toggle_run)
         self.btn_run.pack(fill=tk.X, padx=5, pady=2)
@@ -86,6 +96,54 @@ class Mic1SimulatorApp(tk.Tk):
         btn_reset = ttk.Button(control_group, text="Reset", command=self.reset_simulation)
         btn_reset.pack(fill=tk.X, padx=5, pady=2)
 
+        run_speed_frame = ttk.Frame(control_group)
+        run_speed_frame.pack(fill=tk.X, padx=5, pady=2)
+        ttk.Label(run_speed_frame, text="Ciclos por quadro:").pack(side=tk.LEFT)
+        self.run_speed = ttk.Combobox(run_speed_frame, values=("1", "10", "100", "1000", "10000"), width=8)
+        self.run_speed.set("1")
+        self.run_speed.pack(side=tk.LEFT, padx=5)
+
+        # Breakpoints: o Run para no ciclo em que um deles é atingido
+        break_group = ttk.LabelFrame(left_frame, text="Breakpoints")
+        break_group.pack(fill=tk.X, pady=5)
+
+        self.break_entry = ttk.Entry(break_group)
+        self.break_entry.pack(fill=tk.X, padx=5, pady=2)
+        ttk.Label(break_group, text="LOOP | 0x1F | LOOP if AC == 0 | mpc 70 | AC = 5 | mem 100:120",
+                  font=("Arial", 8)).pack(fill=tk.X, padx=5)
+
+        break_buttons = ttk.Frame(break_group)
+        break_buttons.pack(fill=tk.X, padx=5, pady=2)
+        ttk.Button(break_buttons, text="Adicionar", command=self.add_breakpoint).pack(side=tk.LEFT, expand=True, fill=tk.X)
+        ttk.Button(break_buttons, text="Remover", command=self.remove_breakpoint).pack(side=tk.LEFT, expand=True, fill=tk.X)
+        ttk.Button(break_buttons, text="Limpar", command=self.clear_breakpoints).pack(side=tk.LEFT, expand=True, fill=tk.X)
+
+        self.break_list = tk.Listbox(break_group, height=4, font=("Consolas", 9))
+        self.break_list.pack(fill=tk.X, padx=5, pady=2)
+        self.lbl_break = ttk.Label(break_group, text="")
+        self.lbl_break.pack(fill=tk.X, padx=5, pady=2)
+
+        # Replay de um trace gravado (TraceWriter com keyframes), sem simular de novo
+        replay_group = ttk.LabelFrame(left_frame, text="Replay de Trace")
+        replay_group.pack(fill=tk.X, pady=5)
+
+        ttk.Button(replay_group, text="Abrir Trace", command=self.open_trace).pack(fill=tk.X, padx=5, pady=2)
+
+        self.replay_scale = ttk.Scale(replay_group, orient=tk.HORIZONTAL, from_=0, to=0,
+                                      command=self.on_replay_scrub, state=tk.DISABLED)
+        self.replay_scale.pack(fill=tk.X, padx=5, pady=2)
+
+        speed_frame = ttk.Frame(replay_group)
+        speed_frame.pack(fill=tk.X, padx=5, pady=2)
+        ttk.Label(speed_frame, text="Ciclos por quadro:").pack(side=tk.LEFT)
+        self.replay_speed = ttk.Combobox(speed_frame, values=("1", "10", "100", "1000", "10000"), width=8)
+        self.replay_speed.set("1")
+        self.replay_speed.pack(side=tk.LEFT, padx=5)
+
+        self.lbl_replay = ttk.Label(replay_group, text="Hardware ao vivo")
+        self.lbl_replay.pack(fill=tk.X, padx=5, pady=2)
+        ttk.Button(replay_group, text="Voltar ao Hardware", command=self.close_trace).pack(fill=tk.X, padx=5, pady=2)
+
         # Visualizador de Memória
         mem_group = ttk.LabelFrame(left_frame, text="Memória Principal (RAM)")
         mem_group.pack(fill=tk.BOTH, expand=True, pady=5)
@@ -124,9 +182,11 @@ class Mic1SimulatorApp(tk.Tk):
             
             parsed = parser.parse(code)
             binary = codegen.generate(parsed)
+            self.symbols = dict(codegen.symbol_table)
             
-            # 2. Carrega na RAM
+            # 2. Carrega na RAM (o histórico anterior deixa de valer)
             self.ram.load_program(binary, start_address=0)
+            self.journal.reset()
             
             # 3. Atualiza interface
             self.refresh_memory_view()
@@ -136,53 +196,31 @@ class Mic1SimulatorApp(tk.Tk):
             messagebox.showerror("Erro de Montagem", str(e))
 
     def step_clock(self):
-        """Executa um ciclo de clock do sistema."""
-        # 1. Busca microinstrução (Fetch)
-        self.control_unit.fetch()
-        
-        # 2. Decodifica
-        signals = self.control_unit.decode()
-        
-        # 3. Executa Datapath (Operações internas)
-        self.datapath.run_cycle(signals)
-        
-        # 4. Operações de Memória (Se RD/WR ativos)
-        # O Datapath não acessa memória diretamente no meu design anterior, 
-        # quem controla isso é a Unidade de Controle através de sinais para MAR/MBR.
-        # Precisamos conectar o MBR/MAR à MMU aqui no loop principal ou dentro do Datapath.
-        # Design Padrão MIC-1: Acesso ocorre no fim do ciclo.
-        
-        if signals.rd:
-            # Leitura: MBR = Mem[MAR]
-            addr = self.registers.MAR
-            data = self.mmu.read(addr)
-            self.registers.MBR = data # Atualiza MBR direto (bypass simulado)
-            
-        if signals.wr:
-            # Escrita: Mem[MAR] = MBR
-            addr = self.registers.MAR
-            val = self.registers.MBR
-            self.mmu.write(addr, val)
-
-        # 5. Atualiza MPC
-        # Lógica de Microsequenciamento (Next Address Logic)
-        # Esta lógica é complexa e envolve as flags N/Z da ULA.
-        # Precisa ser implementada no ControlUnit ou aqui.
-        # Para simplificar agora: Vamos assumir addr puro ou lógica básica.
-        next_addr = signals.addr # Padrão
-        
-        # Lógica de Desvio (COND)
-        # COND: 0=NoJump, 1=JumpN, 2=JumpZ, 3=Jump Always (simulando High bit)
-        if signals.cond == 1 and self.datapath.alu.N:
-            next_addr = next_addr | 0x100 # Exemplo de lógica OR do diagrama
-        elif signals.cond == 2 and self.datapath.alu.Z:
-            next_addr = next_addr | 0x100
-        
-        self.control_unit.update_mpc(next_addr)
-
-        # 6. Atualiza Interface
+        """Executa um ciclo de clock do sistema (gravado no histórico)."""
+        if self.replay is not None:
+            self.step_replay(self.replay_cycles())
+            return
+        signals = self.control_unit.control_store.decoded[self.control_unit.MPC]
+        try:
+            self.journal.step()
+        except ValueError as e:
+            if self.running:
+                self.toggle_run()
+            messagebox.showerror("Erro de Execução", str(e))
+            return
         self.refresh_view(signals)
 
+    def step_back(self):
+        """Volta um ciclo de clock (restaura o checkpoint mais próximo e reaplica o histórico)."""
+        if self.running:
+            self.toggle_run()
+        if self.replay is not None:
+            self.step_replay(-self.replay_cycles())
+            return
+        self.journal.step_back()
+        self.refresh_view(self.control_unit.decode() if self.cpu.cycles else None)
+        self.refresh_memory_view()
+
     def toggle_run(self):
         if self.running:
             self.running = False
@@ -194,17 +232,135 @@ class Mic1SimulatorApp(tk.Tk):
             self.run_loop()
 
     def run_loop(self):
-        if self.running:
+        if not self.running:
+            return
+        if self.replay is not None:
             self.step_clock()
+        else:
+            self.run_cycles(self.live_cycles())
+        if self.running:
             self.after_id = self.after(self.speed, self.run_loop)
 
+    def live_cycles(self) -> int:
+        """Ciclos executados por quadro do Run (velocidade configurável)."""
+        try:
+            return max(1, int(self.run_speed.get()))
+        except ValueError:
+            return 1
+
+    def run_cycles(self, cycles: int):
+        """Executa (gravando no histórico) até 'cycles' ciclos, parando num breakpoint."""
+        breakpoints = self.breakpoints
+        breakpoints.hit = None
+        try:
+            self.journal.run(cycles, breakpoints.check if breakpoints.armed else None)
+        except ValueError as e:
+            if self.running:
+                self.toggle_run()
+            messagebox.showerror("Erro de Execução", str(e))
+            return
+        hit = breakpoints.hit
+        if hit is not None:
+            if self.running:
+                self.toggle_run()
+            what = f"{hit.detail} = {hit.value}" if hit.kind == "register" else f"{hit.kind} {hit.value}"
+            self.lbl_break.config(text=f"Parou em {what} (ciclo {hit.cycle})")
+        self.refresh_view(self.control_unit.decode() if self.cpu.cycles else None)
+        self.refresh_memory_view()
+
+    # --- Breakpoints ---
+
+    def add_breakpoint(self):
+        spec = self.break_entry.get().strip()
+        if not spec: return
+        try:
+            self.breakpoints.add_spec(spec, self.symbols)
+        except ValueError as e:
+            messagebox.showerror("Breakpoint", str(e))
+            return
+        if spec not in self.break_list.get(0, tk.END):
+            self.break_list.insert(tk.END, spec)
+        self.break_entry.delete(0, tk.END)
+
+    def remove_breakpoint(self):
+        selection = self.break_list.curselection()
+        spec = self.break_list.get(selection[0]) if selection else self.break_entry.get().strip()
+        if not spec: return
+        try:
+            self.breakpoints.remove_spec(spec, self.symbols)
+        except ValueError as e:
+            messagebox.showerror("Breakpoint", str(e))
+            return
+        specs = self.break_list.get(0, tk.END)
+        if spec in specs:
+            self.break_list.delete(specs.index(spec))
+
+    def clear_breakpoints(self):
+        self.breakpoints.clear()
+        self.break_list.delete(0, tk.END)
+        self.lbl_break.config(text="")
+
     def reset_simulation(self):
+        self.close_trace()
         self.init_hardware()
         self.refresh_view()
 
+    # --- Replay de trace ---
+
+    def open_trace(self):
+        """Abre um trace com keyframes; a tela passa a mostrá-lo (Passo/Run o percorrem)."""
+        file_path = filedialog.askopenfilename(filetypes=[("Trace MIC-1", "*.trace"), ("Todos", "*")])
+        if not file_path: return
+        try:
+            replay = ReplaySource(file_path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Erro no Trace", str(e))
+            return
+        self.close_trace()
+        self.replay = replay
+        self.replay_scale.config(state=tk.NORMAL, from_=replay.first_cycle, to=replay.last_cycle)
+        self.show_replay()
+
+    def close_trace(self):
+        if self.running:
+            self.toggle_run()
+        if self.replay is not None:
+            self.replay.close()
+            self.replay = None
+            self.replay_scale.config(state=tk.DISABLED, from_=0, to=0)
+            self.lbl_replay.config(text="Hardware ao vivo")
+            self.refresh_view()
+            self.refresh_memory_view()
+
+    def replay_cycles(self) -> int:
+        """Ciclos avançados por Passo/quadro de reprodução (velocidade configurável)."""
+        try:
+            return max(1, int(self.replay_speed.get()))
+        except ValueError:
+            return 1
+
+    def step_replay(self, cycles: int):
+        if not self.replay.step(cycles) and self.running:
+            self.toggle_run()  # Fim (ou início) do trace
+        self.show_replay()
+
+    def on_replay_scrub(self, value):
+        if self.replay is not None and int(float(value)) != self.replay.cycle:
+            self.replay.seek(int(float(value)))
+            self.show_replay(move_scale=False)
+
+    def show_replay(self, move_scale: bool = True):
+        replay = self.replay
+        if move_scale:
+            self.replay_scale.set(replay.cycle)
+        self.lbl_replay.config(text=f"Ciclo {replay.cycle} de {replay.first_cycle}-{replay.last_cycle}")
+        self.refresh_view(replay.signals)
+        self.refresh_memory_view()
+
     def refresh_view(self, last_signals=None):
-        # Atualiza Datapath
-        self.datapath_view.update_state(last_signals, self.registers.debug_state())
+        # Atualiza Datapath (com o estado do trace, se houver um replay aberto)
+        registers = self.replay.registers if self.replay is not None else self.registers
+        self.datapath_view.update_state(last_signals, registers.debug_state())
         
         # Atualiza Memória (Só visível)
         # Otimização: atualizar apenas se mudou ou periodicamente
@@ -213,7 +369,8 @@ class Mic1SimulatorApp(tk.Tk):
     def refresh_memory_view(self):
         self.mem_list.delete(0, tk.END)
         # Mostra os primeiros 100 endereços para não travar
-        dump = self.ram.dump(0, 100)
+        ram = self.replay.ram if self.replay is not None else self.ram
+        dump = ram.dump(0, 100)
         for i, val in enumerate(dump):
             self.mem_list.insert(tk.END, f"[{i:04X}]: {val:04X}")
 
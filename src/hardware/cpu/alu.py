@@ -1,41 +1,82 @@
 """
 Unidade Lógica e Aritmética (ULA/ALU) do MIC-1.
 Realiza operações matemáticas e gera flags de estado (N, Z).
+
+Além de execute(), o módulo oferece núcleos fundidos ULA+deslocador: uma função
+especializada para cada uma das 16 combinações (alu, sh), indexada por (alu << 2) | sh,
+que devolve o resultado deslocado, a saída da ULA e as flags numa única chamada
+(FUSED_KERNELS), ou só o resultado deslocado e a saída da ULA, para quem calcula as
+flags sob demanda (LAZY_KERNELS). Os resultados são bit a bit idênticos a execute() + Shifter.shift().
 """
 
-from typing import Tuple
-from src.common.constants import ALUOp, MASK_16BIT
+from typing import Callable, List, Tuple
+from src.common.constants import MASK_16BIT
+
+# Expressões das operações (índice = ALUOp) e do deslocador (índice = ShifterOp),
+# com a mesma máscara de 16 bits aplicada pelas implementações originais
+_ALU_EXPRESSIONS = (
+    f"(a + b) & {MASK_16BIT}",  # ADD
+    "a & b",                    # AND
+    f"a & {MASK_16BIT}",        # IDENTITY (ignora B)
+    f"~a & {MASK_16BIT}",       # NOT (ignora B)
+)
+_SHIFT_EXPRESSIONS = (
+    f"out & {MASK_16BIT}",         # NO_SHIFT
+    f"(out & {MASK_16BIT}) >> 1",  # RIGHT (lógico)
+    f"(out << 1) & {MASK_16BIT}",  # LEFT
+    f"out & {MASK_16BIT}",         # Reservado: sem deslocamento
+)
+
+def _build_kernel(op: int, sh: int, flags: bool) -> Callable:
+    result = "out" if sh in (0, 3) and op != 1 else _SHIFT_EXPRESSIONS[sh]
+    tail = "out, bool(out & 0x8000), out == 0" if flags else "out"
+    source = (f"def kernel(a, b):\n"
+              f"    out = {_ALU_EXPRESSIONS[op]}\n"
+              f"    return {result}, {tail}\n")
+    namespace: dict = {}
+    exec(compile(source, f"<alu {op} sh {sh}>", "exec"), namespace)
+    return namespace["kernel"]
+
+# kernel(a, b) -> (resultado deslocado, saída da ULA, N, Z)
+FUSED_KERNELS: Tuple[Callable[[int, int], Tuple[int, int, bool, bool]], ...] = tuple(
+    _build_kernel(op, sh, True) for op in range(4) for sh in range(4))
+
+# kernel(a, b) -> (resultado deslocado, saída da ULA)
+LAZY_KERNELS: Tuple[Callable[[int, int], Tuple[int, int]], ...] = tuple(
+    _build_kernel(op, sh, False) for op in range(4) for sh in range(4))
+
+# Somente a operação da ULA, indexada pelo código da operação
+ALU_KERNELS: List[Callable[[int, int], int]] = [
+    lambda a, b: (a + b) & MASK_16BIT,
+    lambda a, b: a & b,
+    lambda a, b: a & MASK_16BIT,
+    lambda a, b: ~a & MASK_16BIT,
+]
 
 class ArithmeticLogicUnit:
     def __init__(self):
         self.N = False  # Flag Negativo
         self.Z = False  # Flag Zero
+        self.output = 0  # Última saída (antes do deslocador), de onde as flags derivam
 
     def execute(self, op: int, a: int, b: int) -> int:
         """
         Executa a operação (op) nos operandos A e B.
         Retorna o resultado de 16 bits e atualiza as flags internas N e Z.
         """
-        result = 0
-
-        # Mapeamento baseado no microprograma e diagrama
-        if op == ALUOp.ADD.value:
-            result = (a + b) & MASK_16BIT
-        elif op == ALUOp.AND.value:
-            result = a & b
-        elif op == ALUOp.IDENTITY.value:
-            result = a & MASK_16BIT  # Passa A direto (ignora B)
-        elif op == ALUOp.NOT.value:
-            result = (~a) & MASK_16BIT # Inverte bits de A (ignora B)
-        else:
-            # Caso de segurança (não deve acontecer com microcódigo correto)
-            result = 0
-
-        # Atualização das Flags (Baseado no resultado final)
-        # Z: Verdadeiro se resultado for 0
+        # Mapeamento baseado no microprograma e diagrama.
+        # Caso de segurança (não deve acontecer com microcódigo correto): resultado 0.
+        result = ALU_KERNELS[op](a, b) if 0 <= op < 4 else 0
+        self.output = result
+        self.update_flags()
+        return result
+
+    def update_flags(self):
+        """
+        Atualização das Flags (Baseado no último resultado da ULA)
+        Z: Verdadeiro se resultado for 0
+        N: Verdadeiro se o bit mais significativo (bit 15) for 1
+        """
+        result = self.output
         self.Z = (result == 0)
-        
-        # N: Verdadeiro se o bit mais significativo (bit 15) for 1
         self.N = bool((result >> 15) & 1)
-
-        return result
\ No newline at end of file
@@ -0,0 +1,436 @@
+"""
+Cache de Tradução de Blocos Básicos do MAC-1 (modo "block").
+Traduz sequências de instruções MAC-1 em linha reta, a partir de um PC, numa única
+função Python, cacheada pelo PC inicial. O bloco termina na instrução que muda o fluxo
+(JUMP, Jxxx, CALL, RETN: qualquer uma cujo PC final não seja o sequencial conhecido, ou
+cuja rotina desvie por N/Z em tempo de execução).
+
+Como no modo "routine", o firmware carregado é a única fonte de verdade: cada instrução é
+obtida seguindo o microprograma, mas aqui com propagação de constantes. Dentro do bloco o
+PC e as palavras de instrução são conhecidos na tradução, então o fetch, a decodificação
+e a árvore de subopcodes desaparecem (restam só as chamadas read/write, necessárias
+para as estatísticas da cache) e campos como 'IR & AMASK' viram literais.
+
+Invalidação (código automodificável): os endereços traduzidos ficam vigiados na
+MainMemory; uma escrita (MemoryManager.write, load_program) num deles descarta os blocos
+que o cobrem. Um bloco que escreve na memória confere, após cada instrução com escrita,
+se continua válido, e sai mais cedo caso contrário.
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple, TYPE_CHECKING
+from src.common.constants import MASK_16BIT
+from src.hardware.cpu.control import ControlSignals
+from src.hardware.cpu.microcompiler import ALU_SLOT, bus_c_targets
+from src.hardware.cpu.registers import BUS_CONSTANTS, BUS_SIZE, REGISTER_COUNT, PCStop, pc_stops
+from src.hardware.cpu.routines import (REGISTER_NAMES, MAX_PATH_CYCLES, MAX_ROUTINE_CYCLES,
+                                       load_registers)
+
+if TYPE_CHECKING:
+    from src.hardware.cpu.cpu import CPU
+
+# Instruções MAC-1 por bloco
+MAX_BLOCK_INSTRUCTIONS = 32
+
+class _Unsupported(Exception):
+    """A instrução não pode ser traduzida estaticamente."""
+
+class _State:
+    """Estado simbólico: valor conhecido (int) ou None (está na variável local)."""
+    __slots__ = ("known", "written", "alu", "cycles", "last", "dirty")
+
+    def __init__(self, known: List[Optional[int]]):
+        self.known = known
+        self.written: set = set()
+        self.alu: Optional[int] = None  # None: a saída da ULA está na variável 'alu'
+        self.cycles = 0
+        self.last = 0
+        self.dirty = False  # Houve escrita na memória desde a última verificação
+
+    def copy(self) -> '_State':
+        other = _State(list(self.known))
+        other.written = set(self.written)
+        other.alu, other.cycles, other.last, other.dirty = self.alu, self.cycles, self.last, self.dirty
+        return other
+
+    def operand(self, index: int) -> Tuple[Optional[int], str]:
+        value = self.known[index]
+        if value is None:
+            return None, REGISTER_NAMES[index]
+        return value, str(value)
+
+class Block:
+    """Bloco traduzido: função, maior custo em microciclos e endereços cobertos [start, end)."""
+    __slots__ = ("run", "cost", "start", "end", "alive")
+
+    def __init__(self, run: Optional[Callable[[List[int]], Tuple[int, int, int]]],
+                 cost: int, start: int, end: int, alive: List[bool]):
+        self.run = run      # None: instrução não traduzível, executada pelo modo "routine"
+        self.cost = cost
+        self.start = start
+        self.end = end
+        self.alive = alive  # alive[0] vira False quando o bloco é invalidado
+
+def _alu_value(op: int, a: int, b: int) -> int:
+    if op == 0:
+        return (a + b) & MASK_16BIT
+    if op == 1:
+        return a & b
+    if op == 2:
+        return a
+    return ~a & MASK_16BIT
+
+def _alu_expression(op: int, a: str, b: str) -> str:
+    if op == 0:
+        if b == "0":
+            return a
+        if a == "0":
+            return b
+        return f"({a} + {b}) & {MASK_16BIT}"
+    if op == 1:
+        return f"{a} & {b}"
+    if op == 2:
+        return a
+    return f"~{a} & {MASK_16BIT}"
+
+class _BlockTranslator:
+    """Gera o código-fonte de um bloco a partir da tabela decodificada e da RAM."""
+
+    def __init__(self, decoded: List[ControlSignals], code: Dict[int, int], limit: int):
+        self.decoded = decoded
+        self.code = code    # Endereço -> palavra de instrução, para os endereços do bloco
+        self.limit = limit  # Tamanho da RAM: o bloco não atravessa o fim da memória
+        self.lines: List[str] = []
+        self.max_cost = 0
+        # Endereços de instrução já incluídos no bloco (serão vigiados)
+        self.start = 0
+        self.end = 0
+        self.budget = 0  # Microinstruções que ainda podem ser emitidas na instrução atual
+
+    def translate(self, start: int, name: str) -> Tuple[Optional[str], int]:
+        """Retorna (código-fonte, instruções traduzidas); (None, 0) se a primeira não é traduzível."""
+        known: List[Optional[int]] = [BUS_CONSTANTS.get(index) for index in range(BUS_SIZE)]
+        known[2] = start
+        state = _State(known)
+        count = 0
+        indent = 2
+        self.start = self.end = start
+        while True:
+            mark = len(self.lines)
+            saved, saved_cost = state.copy(), self.max_cost
+            self.end = start + count + 1
+            try:
+                state = self._instruction(state, indent, count)
+            except _Unsupported:
+                del self.lines[mark:]
+                self.max_cost = saved_cost
+                if count == 0:
+                    return None, 0
+                self._leaf(saved, indent, count)
+                break
+            count += 1
+            if state is None:
+                break  # A instrução encerrou o bloco em todos os caminhos
+            if state.dirty:
+                # Escrita na memória: se atingiu código deste bloco, sai antes da próxima
+                self._emit(indent, "if not alive[0]:")
+                self._leaf(state, indent + 1, count)
+                state.dirty = False
+            if (count == MAX_BLOCK_INSTRUCTIONS or start + count >= self.limit
+                    or state.known[2] != start + count):
+                self._leaf(state, indent, count)
+                break
+
+        header = [f"def {name}(read, write, alive):", "    def block(r):"]
+        header += ["        " + line for line in load_registers("\n".join(self.lines))]
+        return "\n".join(header + self.lines + ["    return block"]) + "\n", count
+
+    def _emit(self, indent: int, line: str):
+        self.lines.append("    " * indent + line)
+
+    def _leaf(self, state: _State, indent: int, count: int):
+        """Saída do bloco: devolve à lista de estado o que mudou e o custo do caminho."""
+        for index in sorted(state.written):
+            self._emit(indent, f"r[{index}] = {state.operand(index)[1]}")
+        self._emit(indent, f"r[{ALU_SLOT}] = {'alu' if state.alu is None else state.alu}")
+        self._emit(indent, f"return ({state.cycles}, {state.last}, {count})")
+        self.max_cost = max(self.max_cost, state.cycles)
+
+    def _instruction(self, state: _State, indent: int, count: int) -> Optional[_State]:
+        """
+        Emite uma instrução (do fetch ao 'goto 0'). Retorna o estado ao fim dela, ou None
+        se ela desviou em tempo de execução (cada caminho já terminou o bloco).
+        """
+        self.budget = MAX_ROUTINE_CYCLES
+        return self._path(0, state, frozenset(), indent, count, branched=False)
+
+    def _path(self, mpc: int, state: _State, visited: frozenset, indent: int, count: int,
+              branched: bool) -> Optional[_State]:
+        start_cycles = state.cycles
+        while True:
+            if mpc in visited or state.cycles - start_cycles >= MAX_PATH_CYCLES or self.budget <= 0:
+                raise _Unsupported()
+            self.budget -= 1
+            visited = visited | {mpc}
+            s = self.decoded[mpc]
+            self._micro(s, state, indent)
+            state.cycles += 1
+            state.last = mpc
+
+            if s.cond == 3:
+                ir = state.known[5]
+                if ir is None:
+                    raise _Unsupported()
+                mpc = ((ir >> 12) & 0xF) * 10 + 10
+                continue
+
+            target = s.addr
+            if s.cond in (1, 2) and (s.addr | 0x80) != s.addr:
+                if state.alu is None:
+                    # Desvio em tempo de execução: cada lado termina a instrução e o bloco
+                    self._emit(indent, "if alu & 0x8000:" if s.cond == 1 else "if alu == 0:")
+                    self._branch(s.addr | 0x80, state.copy(), visited, indent + 1, count)
+                    self._emit(indent, "else:")
+                    self._branch(s.addr, state, visited, indent + 1, count)
+                    return None
+                if (s.cond == 1 and state.alu & 0x8000) or (s.cond == 2 and state.alu == 0):
+                    target = s.addr | 0x80
+
+            if target == 0:
+                if branched:
+                    self._end(state, indent, count)
+                    return None
+                return state
+            mpc = target
+
+    def _branch(self, target: int, state: _State, visited: frozenset, indent: int, count: int):
+        if target == 0:
+            self._end(state, indent, count)
+        else:
+            self._path(target, state, visited, indent, count, branched=True)
+
+    def _end(self, state: _State, indent: int, count: int):
+        self._leaf(state, indent, count + 1)
+
+    def _micro(self, s: ControlSignals, state: _State, indent: int):
+        """Emite uma microinstrução, resolvendo na tradução tudo o que for constante."""
+        # As constantes do barramento já estão em 'known'
+        a_value, a_text = state.operand(1 if s.amux else s.a)
+        b_value, b_text = state.operand(s.b)
+        targets = bus_c_targets(s)
+
+        constant = a_value is not None and (s.alu >= 2 or b_value is not None)
+        if constant:
+            alu = _alu_value(s.alu, a_value, b_value if b_value is not None else 0)
+            state.alu = alu
+            if s.sh == 1:
+                result = alu >> 1
+            elif s.sh == 2:
+                result = (alu << 1) & MASK_16BIT
+            else:
+                result = alu
+            for index in targets:
+                state.known[index] = result
+        else:
+            # Saída da ULA só é materializada se alguém a usa (escrita, desvio, fim da rotina)
+            if targets or s.cond != 0 or s.addr == 0:
+                self._emit(indent, f"alu = {_alu_expression(s.alu, a_text, b_text)}")
+            state.alu = None
+            if s.sh == 1:
+                result = "alu >> 1"
+            elif s.sh == 2:
+                result = f"(alu << 1) & {MASK_16BIT}"
+            else:
+                result = "alu"
+            if targets:
+                self._emit(indent, f"{' = '.join(REGISTER_NAMES[i] for i in targets)} = {result}")
+            for index in targets:
+                state.known[index] = None
+        state.written.update(targets)
+
+        if s.rd:
+            address, address_text = state.operand(0)
+            if address is not None and self.start <= address < self.end and not state.dirty:
+                # Leitura de código do próprio bloco: o valor é conhecido (bloco válido)
+                self._emit(indent, f"read({address})")
+                state.known[1] = self.code[address]
+            else:
+                self._emit(indent, f"MBR = read({address_text})")
+                state.known[1] = None
+            state.written.add(1)
+        if s.wr:
+            self._emit(indent, f"write({state.operand(0)[1]}, {state.operand(1)[1]})")
+            state.dirty = True
+
+class BlockEngine:
+    """Motor de execução que despacha blocos básicos traduzidos, cacheados pelo PC inicial."""
+
+    def __init__(self, cpu: 'CPU'):
+        self.cpu = cpu
+        self._blocks: Dict[int, Block] = {}
+        self._covering: Dict[int, List[Block]] = {}
+        self._version = -1
+        self._memory = None
+
+        self.hits = 0           # Blocos encontrados no cache
+        self.misses = 0         # Traduções feitas
+        self.invalidations = 0  # Blocos descartados por escrita no código
+        self.instructions = 0   # Instruções MAC-1 executadas dentro de blocos
+
+    def get_stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "invalidations": self.invalidations,
+                "blocks": len(self._blocks)}
+
+    def flush(self):
+        """Descarta todos os blocos (sem contar como invalidação)."""
+        for block in self._blocks.values():
+            block.alive[0] = False
+        self._blocks = {}
+        self._covering = {}
+
+    def _sync(self):
+        """Os blocos dependem do firmware e da memória: troca de qualquer um esvazia o cache."""
+        store = self.cpu.control_unit.control_store
+        memory = self.cpu.memory
+        if memory is not self._memory or self._version != store.version:
+            self.flush()
+            memory.ram.add_watcher(self._on_write)
+            self._memory = memory
+            self._version = store.version
+
+    def _on_write(self, start: int, end: int):
+        """Observador da MainMemory: descarta os blocos que cobrem [start, end)."""
+        covering = self._covering
+        blocks = self._blocks
+        for address in range(start, end):
+            for block in covering.pop(address, ()):
+                if blocks.get(block.start) is block:
+                    del blocks[block.start]
+                    block.alive[0] = False
+                    self.invalidations += 1
+                # Tira o bloco morto dos outros endereços que ele cobre (senão, com código
+                # automodificável, essas listas crescem a cada retradução)
+                for other in range(block.start, block.end):
+                    listed = covering.get(other)
+                    if listed is not None:
+                        listed = [item for item in listed if item is not block]
+                        if listed:
+                            covering[other] = listed
+                        else:
+                            del covering[other]
+
+    def translate(self, pc: int) -> Block:
+        """Traduz (e cacheia) o bloco que começa em 'pc'."""
+        cpu = self.cpu
+        ram = cpu.memory.ram
+        self.misses += 1
+
+        end = min(pc + MAX_BLOCK_INSTRUCTIONS, ram.size)
+        code = {address: word for address, word in zip(range(pc, end), ram.dump(pc, end - pc))}
+        translator = _BlockTranslator(cpu.control_unit.control_store.decoded, code, ram.size)
+        alive = [True]
+        source, count = translator.translate(pc, "block") if pc < ram.size else (None, 0)
+        if source is None:
+            block = Block(None, 0, pc, pc + 1, alive)
+        else:
+            namespace: dict = {}
+            exec(compile(source, f"<block {pc:04X}>", "exec"), namespace)
+            run = namespace["block"](cpu.memory.read, cpu.memory.write, alive)
+            block = Block(run, translator.max_cost, pc, pc + count, alive)
+
+        self._blocks[pc] = block
+        if pc < ram.size:
+            ram.watch(block.start, min(block.end, ram.size))
+            for address in range(block.start, min(block.end, ram.size)):
+                self._covering.setdefault(address, []).append(block)
+        return block
+
+    def run(self, max_cycles: int, until_pc: Optional[PCStop] = None, until_mpc: Optional[int] = None,
+            until: Optional[Callable[['CPU'], bool]] = None) -> int:
+        """
+        Executa blocos até consumir 'max_cycles' microciclos. until_pc é avaliado nos
+        limites de instrução (um bloco que o contém no meio é executado instrução a
+        instrução); until_mpc, until(cpu) ou um fetch não compilável delegam ao modo "routine".
+        Retorna o número de microciclos executados.
+        """
+        if max_cycles <= 0:
+            return 0
+        cpu = self.cpu
+        routine = cpu.engine("routine")
+        if until_mpc is not None or until is not None or routine.program() is None:
+            return routine.run(max_cycles, until_pc, until_mpc, until)
+        self._sync()
+
+        cycles = 0
+        if cpu.control_unit.MPC != 0:
+            # Termina a instrução em andamento
+            cycles = cpu.engine("compiled").run(max_cycles, None, 0, None)
+            if cpu.control_unit.MPC != 0:
+                return cycles
+            if pc_stops(until_pc)[cpu.registers.PC]:
+                return cycles
+
+        executed, stopped = self._run_blocks(max_cycles - cycles, until_pc)
+        cycles += executed
+        if cycles < max_cycles and not stopped:
+            cycles += routine.run(max_cycles - cycles, until_pc, None, None)
+        return cycles
+
+    def _run_blocks(self, budget: int, until_pc: Optional[PCStop]) -> Tuple[int, bool]:
+        """Laço de blocos. Retorna (microciclos, parou por condição)."""
+        cpu = self.cpu
+        regs = cpu.registers
+        store = cpu.control_unit.control_store
+        routine = cpu.engine("routine")
+        blocks = self._blocks
+
+        r = regs.file + [-1]
+        stops = pc_stops(until_pc)
+        stopping = until_pc is not None
+        stopped = False
+
+        mpc = 0
+        mir = cpu.control_unit.MIR
+        alu_out = -1
+        base = cpu.cycles
+        cycles = 0
+        hits = 0
+        executed = 0
+        try:
+            while True:
+                block = blocks.get(r[2])
+                if block is None:
+                    block = self.translate(r[2])
+                    blocks = self._blocks
+                else:
+                    hits += 1
+
+                if block.run is None or (stopping and stops.find(1, block.start + 1, block.end) >= 0):
+                    # Uma instrução pelo modo "routine"
+                    if cycles + routine.max_cost > budget:
+                        break
+                    cpu._writeback(r, 0, mir, alu_out, base + cycles)
+                    cycles += routine._run_instructions(routine.max_cost, None, None)[0]
+                    r[:REGISTER_COUNT] = regs.file
+                    mpc = cpu.control_unit.MPC
+                    mir = cpu.control_unit.MIR
+                    alu_out = -1  # Flags já atualizadas pelo modo "routine"
+                    if mpc != 0:
+                        break
+                else:
+                    if cycles + block.cost > budget:
+                        break
+                    n, last, count = block.run(r)
+                    cycles += n
+                    executed += count
+                    mir = store[last]
+                    alu_out = r[ALU_SLOT]
+
+                if stops[r[2]]:
+                    stopped = True
+                    break
+        finally:
+            self.hits += hits
+            self.instructions += executed
+            cpu._writeback(r, mpc, mir, alu_out, base + cycles)
+
+        return cycles, stopped
@@ -0,0 +1,263 @@
+"""
+Breakpoints e watchpoints do simulador (GUI e execuções sem interface).
+Tipos de parada, todos verificados por consulta O(1) a bitmaps, conjuntos e dicionários:
+
+- PC: a CPU volta ao fetch (MPC=0) com PC no bitmap de 4096 posições; opcionalmente
+  com condições sobre registradores (ex.: Condition("AC", "==", 0)), avaliadas só
+  quando o PC bate;
+- MPC: o próximo MPC está no bitmap de 256 posições da Memória de Controle;
+- registrador: no fim de uma instrução, um registrador vigiado tem um dos valores
+  procurados (conjunto por registrador);
+- memória: um ciclo com rd/wr num endereço vigiado (bitmap de 64K posições com os bits
+  leitura/escrita, para faixas de endereços).
+
+Ligados a uma CPU (cpu.set_breakpoints(bp)), só custam algo quando há algum armado:
+então run() usa o laço instrumentado da CPU (CPU._run_instrumented, o mesmo dos
+contadores e da cobertura), que consulta estes bitmaps, em vez do motor do modo; sem
+nenhum armado, run() segue o caminho rápido de sempre. A parada acontece ao fim do
+ciclo que a provocou; o motivo fica em 'hit'. check(cpu) faz as mesmas verificações
+sobre o estado depois de um CPU.step() (usado pela GUI, que executa pelo histórico).
+"""
+
+import operator
+import re
+from typing import Dict, List, NamedTuple, Optional, Set, TYPE_CHECKING
+from src.common.constants import AMASK, MASK_16BIT
+from src.hardware.cpu.registers import REGISTER_INDEX
+
+if TYPE_CHECKING:
+    from src.hardware.cpu.cpu import CPU
+
+_OPERATORS = {"==": operator.eq, "!=": operator.ne, "<": operator.lt,
+              "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+# Bits do bitmap de watchpoints
+WATCH_READ, WATCH_WRITE = 1, 2
+
+# Sinais rd/wr na palavra de 32 bits da microinstrução (ver firmware.micro_inst)
+_RD, _WR = 1 << 22, 1 << 21
+_RD_WR = _RD | _WR
+
+# Forma textual: [tipo] alvo [resto], ex.: "mem 100:120", "LOOP if AC == 0", "AC = 5"
+_SPEC = re.compile(r"^\s*(?:(?P<kind>pc|mpc|mem|read|write)\s+)?(?P<target>[\w:]+)(?P<rest>.*?)\s*$",
+                   re.IGNORECASE)
+_CONDITION = re.compile(r"^\s*if\s+(\w+)\s*(==|!=|<=|>=|<|>)\s*(\w+)\s*$", re.IGNORECASE)
+
+class Condition(NamedTuple):
+    register: str  # Nome em REGISTER_INDEX (ex.: "AC")
+    op: str        # "==", "!=", "<", "<=", ">", ">="
+    value: int     # Comparado ao valor de 16 bits (sem sinal)
+
+    def test(self, file: List[int]) -> bool:
+        return _OPERATORS[self.op](file[REGISTER_INDEX[self.register]], self.value)
+
+class Hit(NamedTuple):
+    kind: str   # "pc", "mpc", "register", "read" ou "write"
+    value: int  # PC, MPC, valor do registrador ou endereço
+    cycle: int  # cpu.cycles ao fim do ciclo que parou
+    detail: str = ""  # Registrador (kind "register")
+
+def _register_index(name: str) -> int:
+    if name not in REGISTER_INDEX:
+        raise ValueError(f"Registrador desconhecido: '{name}'.")
+    return REGISTER_INDEX[name]
+
+class Breakpoints:
+    def __init__(self):
+        self.cpu: Optional['CPU'] = None
+        self.pcs = bytearray(AMASK + 1)
+        self.mpcs = bytearray(256)
+        self.watch = bytearray(MASK_16BIT + 1)
+        self.conditions: Dict[int, List[Condition]] = {}  # PC -> condições (qualquer uma para)
+        self.registers: Dict[int, Set[int]] = {}          # Índice em 'file' -> valores
+        self.hit: Optional[Hit] = None
+        self._counts = [0, 0, 0]  # PCs, MPCs e endereços armados
+        self.armed = False
+
+    def _update(self):
+        self.armed = any(self._counts) or bool(self.registers)
+
+    @property
+    def watching(self) -> bool:
+        """Há algum endereço vigiado."""
+        return self._counts[2] > 0
+
+    # --- Armar / desarmar ---
+
+    def add_pc(self, pc: int, condition: Optional[Condition] = None):
+        """Para ao começar a instrução em 'pc' (se dada, só quando 'condition' vale)."""
+        pc &= AMASK
+        if condition is not None:
+            _register_index(condition.register)
+            if condition.op not in _OPERATORS:
+                raise ValueError(f"Operador desconhecido: '{condition.op}'.")
+            self.conditions.setdefault(pc, []).append(condition)
+        else:
+            self.conditions.pop(pc, None)  # Incondicional: substitui as condições
+        if not self.pcs[pc]:
+            self.pcs[pc] = 1
+            self._counts[0] += 1
+        self._update()
+
+    def remove_pc(self, pc: int):
+        pc &= AMASK
+        self.conditions.pop(pc, None)
+        if self.pcs[pc]:
+            self.pcs[pc] = 0
+            self._counts[0] -= 1
+        self._update()
+
+    def add_mpc(self, mpc: int):
+        """Para quando o próximo MPC for 'mpc' (antes de executar aquela microinstrução)."""
+        if not self.mpcs[mpc]:
+            self.mpcs[mpc] = 1
+            self._counts[1] += 1
+        self._update()
+
+    def remove_mpc(self, mpc: int):
+        if self.mpcs[mpc]:
+            self.mpcs[mpc] = 0
+            self._counts[1] -= 1
+        self._update()
+
+    def add_register(self, name: str, value: int):
+        """Para no fim de uma instrução em que o registrador 'name' vale 'value'."""
+        self.registers.setdefault(_register_index(name), set()).add(value & MASK_16BIT)
+        self._update()
+
+    def remove_register(self, name: str, value: Optional[int] = None):
+        """Remove um valor vigiado (ou todos, sem 'value')."""
+        index = _register_index(name)
+        values = self.registers.get(index, set())
+        if value is None:
+            values.clear()
+        else:
+            values.discard(value & MASK_16BIT)
+        if not values:
+            self.registers.pop(index, None)
+        self._update()
+
+    def add_watch(self, start: int, end: Optional[int] = None, read: bool = True, write: bool = True):
+        """Vigia os endereços start..end (inclusive) em leituras e/ou escritas."""
+        self._set_watch(start, end, (WATCH_READ if read else 0) | (WATCH_WRITE if write else 0))
+
+    def remove_watch(self, start: int, end: Optional[int] = None):
+        self._set_watch(start, end, 0)
+
+    def _set_watch(self, start: int, end: Optional[int], bits: int):
+        end = start if end is None else end
+        if not 0 <= start <= end <= MASK_16BIT:
+            raise ValueError(f"Faixa de endereços inválida: {start}..{end}.")
+        watch = self.watch
+        for address in range(start, end + 1):
+            self._counts[2] += bool(bits) - bool(watch[address])
+            watch[address] = bits
+        self._update()
+
+    # --- Forma textual (GUI e linha de comando) ---
+
+    def add_spec(self, spec: str, symbols: Optional[Dict[str, int]] = None):
+        """
+        Arma um breakpoint descrito em texto ('symbols': rótulos do montador):
+        "LOOP", "0x1F" ou "pc 12" (PC); "LOOP if AC == 0" (PC com condição);
+        "mpc 70"; "AC = 5" (registrador); "mem 100:120", "read 100" ou "write 100:120".
+        """
+        self._apply_spec(spec, symbols, True)
+
+    def remove_spec(self, spec: str, symbols: Optional[Dict[str, int]] = None):
+        """Desarma o breakpoint descrito por 'spec' (mesma forma de add_spec; condições ignoradas)."""
+        self._apply_spec(spec, symbols, False)
+
+    def _apply_spec(self, spec: str, symbols: Optional[Dict[str, int]], arm: bool):
+        def number(text: str) -> int:
+            text = text.strip()
+            if symbols and text in symbols:
+                return symbols[text]
+            try:
+                return int(text, 0)
+            except ValueError:
+                raise ValueError(f"Endereço ou rótulo desconhecido: '{text}'.") from None
+
+        match = _SPEC.match(spec)
+        if match is None:
+            raise ValueError(f"Breakpoint inválido: '{spec}'.")
+        kind, target, rest = match.group("kind"), match.group("target"), match.group("rest")
+        kind = kind.lower() if kind else None
+        if kind in ("mem", "read", "write"):
+            start, _, end = target.partition(":")
+            start = number(start)
+            end = number(end) if end else start
+            if arm:
+                self.add_watch(start, end, read=kind != "write", write=kind != "read")
+            else:
+                self.remove_watch(start, end)
+        elif kind == "mpc":
+            (self.add_mpc if arm else self.remove_mpc)(number(target))
+        elif rest and rest.lstrip().startswith("="):
+            # Registrador: "AC = 5" / "AC == 5"
+            value = number(rest.lstrip().lstrip("="))
+            if arm:
+                self.add_register(target.upper(), value)
+            else:
+                self.remove_register(target.upper(), value)
+        else:
+            pc = number(target)
+            condition = None
+            if rest:
+                cond = _CONDITION.match(rest)
+                if cond is None:
+                    raise ValueError(f"Condição inválida: '{rest.strip()}'.")
+                condition = Condition(cond.group(1).upper(), cond.group(2), number(cond.group(3)))
+            if arm:
+                self.add_pc(pc, condition)
+            else:
+                self.remove_pc(pc)
+
+    def clear(self):
+        self.pcs[:] = bytes(len(self.pcs))
+        self.mpcs[:] = bytes(len(self.mpcs))
+        self.watch[:] = bytes(len(self.watch))
+        self.conditions.clear()
+        self.registers.clear()
+        self._counts = [0, 0, 0]
+        self._update()
+
+    # --- Verificação ---
+
+    def _at_fetch(self, r: List[int], cycle: int) -> Optional[Hit]:
+        """Breakpoints de PC e de registradores, ao fim de uma instrução."""
+        pc = r[2] & AMASK
+        if self.pcs[pc]:
+            conditions = self.conditions.get(pc)
+            if conditions is None or any(condition.test(r) for condition in conditions):
+                return Hit("pc", pc, cycle)
+        for index, values in self.registers.items():
+            if r[index] in values:
+                return Hit("register", r[index], cycle,
+                           next(name for name, i in REGISTER_INDEX.items() if i == index))
+        return None
+
+    def check(self, cpu: 'CPU') -> bool:
+        """
+        Verifica o ciclo que acabou de ser executado (CPU.step ou run sincronizado);
+        guarda o motivo em 'hit'. Serve de predicado 'until' para run().
+        """
+        control = cpu.control_unit
+        r = cpu.registers.file
+        mir = control.MIR  # Microinstrução executada: bits rd (22) e wr (21)
+        hit = None
+        if mir & _RD_WR:
+            bits = self.watch[r[0]]
+            if mir & _RD and bits & WATCH_READ:
+                hit = Hit("read", r[0], cpu.cycles)
+            elif mir & _WR and bits & WATCH_WRITE:
+                hit = Hit("write", r[0], cpu.cycles)
+        mpc = control.MPC
+        if hit is None and self.mpcs[mpc]:
+            hit = Hit("mpc", mpc, cpu.cycles)
+        if hit is None and mpc == 0:
+            hit = self._at_fetch(r, cpu.cycles)
+        if hit is not None:
+            self.hit = hit
+            return True
+        return False
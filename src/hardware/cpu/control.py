@@ -4,13 +4,20 @@ Responsável por armazenar o Microprograma e decodificar as microinstruções de
 Baseado no diagrama da Página 3 do documento 'MAC I e MIC I.pdf'.
 """
 
-from dataclasses import dataclass
-from typing import List
+import struct
+from typing import Dict, List, NamedTuple
+from src.common.utils import LRUCache
+from src.hardware.snapshot import SnapshotError, pack_dwords, pack_snapshot, unpack_dwords, unpack_snapshot
 
-@dataclass
-class ControlSignals:
+CONTROL_STORE_SIZE = 256
+
+_SEQUENCER = struct.Struct("<HI")  # MPC, MIR
+
+class ControlSignals(NamedTuple):
     """
     Representação decodificada de uma microinstrução (sinais elétricos).
+    Imutável (tupla): a mesma instância é reaproveitada a cada ciclo em que a
+    microinstrução é executada.
     """
     amux: int   # 1 bit (0=Latch A, 1=MBR)
     cond: int   # 2 bits (Controle de pulo: 0=NoJump, 1=JumpN, 2=JumpZ, 3=Jump/Decode)
@@ -26,21 +33,96 @@ class ControlSignals:
     a: int      # 4 bits (Endereço do registrador fonte no Barramento A)
     addr: int   # 8 bits (Próximo endereço do MPC)
 
+def decode_microinstruction(mir: int) -> ControlSignals:
+    """
+    Decodifica uma palavra de 32 bits nos campos de controle individuais.
+    """
+    addr = mir & 0xFF                 # Bits 0-7 (8 bits)
+    a    = (mir >> 8) & 0xF           # Bits 8-11 (4 bits)
+    b    = (mir >> 12) & 0xF          # Bits 12-15 (4 bits)
+    c    = (mir >> 16) & 0xF          # Bits 16-19 (4 bits)
+    
+    enc  = bool((mir >> 20) & 0x1)    # Bit 20
+    wr   = bool((mir >> 21) & 0x1)    # Bit 21
+    rd   = bool((mir >> 22) & 0x1)    # Bit 22
+    mar  = bool((mir >> 23) & 0x1)    # Bit 23
+    mbr  = bool((mir >> 24) & 0x1)    # Bit 24
+    
+    sh   = (mir >> 25) & 0x3          # Bits 25-26 (2 bits)
+    alu  = (mir >> 27) & 0x3          # Bits 27-28 (2 bits)
+    cond = (mir >> 29) & 0x3          # Bits 29-30 (2 bits)
+    amux = (mir >> 31) & 0x1          # Bit 31 (1 bit)
+
+    return ControlSignals(
+        amux=amux, cond=cond, alu=alu, sh=sh,
+        mbr=mbr, mar=mar, rd=rd, wr=wr, enc=enc,
+        c=c, b=b, a=a, addr=addr
+    )
+
+# Palavras decodificadas recentemente: ControlSignals é imutável, então a instância é
+# compartilhada entre Memórias de Controle (criar uma CPU ou restaurar um snapshot não
+# redecodifica). LRU limitado: firmwares editados ou aleatórios não acumulam entradas
+MAX_DECODED_WORDS = 4 * CONTROL_STORE_SIZE
+_decoded_words: Dict[int, ControlSignals] = LRUCache(MAX_DECODED_WORDS)
+
+def _decode_cached(word: int) -> ControlSignals:
+    signals = _decoded_words.get(word)
+    if signals is None:
+        signals = _decoded_words[word] = decode_microinstruction(word)
+    return signals
+
+class ControlStore(list):
+    """
+    Memória de Controle (256 palavras de 32 bits) com tabela pré-decodificada.
+    Cada escrita em uma posição redecodifica apenas aquela entrada, mantendo
+    'decoded[i]' sempre sincronizado com 'self[i]'. 'version' é incrementado a
+    cada escrita, para que tabelas derivadas saibam quando se atualizar.
+    """
+    def __init__(self, size: int = CONTROL_STORE_SIZE):
+        super().__init__([0] * size)
+        blank = _decode_cached(0)
+        self.decoded: List[ControlSignals] = [blank] * size
+        self.version = 0
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            positions = range(*index.indices(len(self)))
+            value = list(value)
+            if len(value) != len(positions):
+                raise ValueError("A Memória de Controle tem tamanho fixo.")
+            super().__setitem__(index, value)
+            # Invalida (redecodifica) somente as entradas tocadas
+            for i in positions:
+                self.decoded[i] = _decode_cached(list.__getitem__(self, i))
+        else:
+            super().__setitem__(index, value)
+            self.decoded[index] = _decode_cached(value)
+        self.version += 1
+
+    def __delitem__(self, index):
+        raise TypeError("A Memória de Controle tem tamanho fixo.")
+
+    def _fixed_size(self, *args, **kwargs):
+        raise TypeError("A Memória de Controle tem tamanho fixo.")
+
+    append = extend = insert = pop = remove = clear = _fixed_size
+    __iadd__ = __imul__ = _fixed_size
+
 class ControlUnit:
     def __init__(self):
-        # Memória de Controle: 256 palavras de 32 bits
-        self.control_store: List[int] = [0] * 256
-        
+        # Memória de Controle: 256 palavras de 32 bits (+ tabela decodificada)
+        self.control_store: ControlStore = ControlStore()
+
         self.MPC = 0  # MicroProgram Counter
         self.MIR = 0  # MicroInstruction Register
 
     def load_firmware(self, microprogram: List[int]):
         """Carrega o array de inteiros (microcódigo) na memória de controle."""
-        if len(microprogram) > 256:
+        if len(microprogram) > CONTROL_STORE_SIZE:
             raise ValueError("O microprograma excede o tamanho da Memória de Controle (256 palavras).")
-        
-        for i, instruction in enumerate(microprogram):
-            self.control_store[i] = instruction
+
+        # Decodifica as 256 palavras uma única vez (não a cada ciclo)
+        self.control_store[:len(microprogram)] = microprogram
 
     def fetch(self):
         """Busca a microinstrução apontada pelo MPC e coloca no MIR."""
@@ -48,31 +130,29 @@ class ControlUnit:
 
     def decode(self) -> ControlSignals:
         """
-        Decodifica o valor de 32 bits do MIR nos campos de controle individuais.
+        Retorna os sinais de controle do MIR.
+        Se o MIR veio do fetch, devolve a entrada pré-decodificada (sem alocação);
+        se foi injetado diretamente, decodifica na hora.
         """
-        mir = self.MIR
-        
-        addr = mir & 0xFF                 # Bits 0-7 (8 bits)
-        a    = (mir >> 8) & 0xF           # Bits 8-11 (4 bits)
-        b    = (mir >> 12) & 0xF          # Bits 12-15 (4 bits)
-        c    = (mir >> 16) & 0xF          # Bits 16-19 (4 bits)
-        
-        enc  = bool((mir >> 20) & 0x1)    # Bit 20
-        wr   = bool((mir >> 21) & 0x1)    # Bit 21
-        rd   = bool((mir >> 22) & 0x1)    # Bit 22
-        mar  = bool((mir >> 23) & 0x1)    # Bit 23
-        mbr  = bool((mir >> 24) & 0x1)    # Bit 24
-        
-        sh   = (mir >> 25) & 0x3          # Bits 25-26 (2 bits)
-        alu  = (mir >> 27) & 0x3          # Bits 27-28 (2 bits)
-        cond = (mir >> 29) & 0x3          # Bits 29-30 (2 bits)
-        amux = (mir >> 31) & 0x1          # Bit 31 (1 bit)
-
-        return ControlSignals(
-            amux=amux, cond=cond, alu=alu, sh=sh,
-            mbr=mbr, mar=mar, rd=rd, wr=wr, enc=enc,
-            c=c, b=b, a=a, addr=addr
-        )
+        mpc = self.MPC
+        store = self.control_store
+        if self.MIR == store[mpc]:
+            return store.decoded[mpc]
+        return decode_microinstruction(self.MIR)
+
+    def snapshot(self) -> bytes:
+        """MPC, MIR e a Memória de Controle (buffer de 32 bits)."""
+        return pack_snapshot(b"CTRL", _SEQUENCER.pack(self.MPC, self.MIR), pack_dwords(self.control_store))
+
+    def restore(self, data: bytes):
+        """Restaura um snapshot; o firmware só é regravado (e 'version' muda) se for diferente."""
+        sequencer, words = unpack_snapshot(data, b"CTRL")
+        words = unpack_dwords(words)
+        if len(words) != CONTROL_STORE_SIZE:
+            raise SnapshotError("Snapshot da Memória de Controle com tamanho inconsistente.")
+        if words != self.control_store:
+            self.control_store[:] = words
+        self.MPC, self.MIR = _SEQUENCER.unpack(sequencer)
 
     def update_mpc(self, next_addr: int):
         """Atualiza o MPC para o próximo ciclo."""
@@ -0,0 +1,162 @@
+"""
+Cobertura e caminhos quentes do microcódigo (Memória de Controle).
+Ligada a uma CPU (cpu.start_coverage(coverage)), conta durante CPU.run():
+
+- execuções de cada uma das 256 palavras da Memória de Controle;
+- para cada desvio condicional (COND N ou Z), quantas vezes foi tomado e não tomado;
+- por opcode, a frequência de cada caminho pela microrrotina (a sequência de
+  resultados dos desvios condicionais, que determina os endereços percorridos).
+
+Os contadores são arrays de inteiros alocados uma vez; ligada, run() usa o laço
+instrumentado da CPU (CPU._run_instrumented), o mesmo dos contadores de desempenho,
+que podem estar ligados ao mesmo tempo; desligada (stop_coverage), o caminho de
+execução é o de sempre, sem custo. O relatório aponta o microcódigo
+inalcançável (palavras programadas que nenhum caminho a partir do fetch atinge),
+o alcançável nunca executado e as microinstruções que dominam o total de ciclos.
+"""
+
+from array import array
+from typing import Dict, IO, List, Optional, Set, Tuple, TYPE_CHECKING
+from src.hardware.cpu.functional import NUM_KEYS
+from src.hardware.cpu.perf import OPCODE_NAMES
+
+if TYPE_CHECKING:
+    from src.hardware.cpu.cpu import CPU
+
+def reachable_microaddresses(decoded) -> Set[int]:
+    """
+    Endereços atingíveis a partir do fetch (0): desvio incondicional para 'addr',
+    condicional para 'addr' ou 'addr | 0x80', decodificação para todo opcode.
+    """
+    reached: Set[int] = set()
+    pending = [0]
+    while pending:
+        mpc = pending.pop()
+        if mpc in reached:
+            continue
+        reached.add(mpc)
+        signals = decoded[mpc]
+        if signals.cond == 0:
+            pending.append(signals.addr)
+        elif signals.cond == 3:
+            pending.extend(op * 10 + 10 for op in range(16))
+        else:
+            pending.extend((signals.addr, signals.addr | 0x80))
+    return reached
+
+def _dispatch_word(key: int) -> int:
+    """Um IR com o opcode de 'key' (para refazer a decodificação de um caminho)."""
+    if key < 15:
+        return key << 12
+    return 0xF000 | ((key - 15) << 9)
+
+class MicrocodeCoverage:
+    def __init__(self):
+        self.cpu: Optional['CPU'] = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Zera os contadores; a região medida começa agora."""
+        size = 256
+        self.executions = array('Q', [0]) * size  # Por endereço
+        self.taken = array('Q', [0]) * size       # Desvios condicionais, por endereço
+        self.not_taken = array('Q', [0]) * size
+        # Por opcode: caminho (bits dos desvios, com um bit 1 à esquerda) -> vezes
+        self.paths: List[Dict[int, int]] = [{} for _ in range(NUM_KEYS)]
+        self.cycles = 0
+        self._path: Optional[int] = None  # Caminho da instrução em curso (None: desconhecido)
+
+    # --- Relatórios ---
+
+    def _decoded(self):
+        return self.cpu.control_unit.control_store.decoded
+
+    def unreachable(self) -> List[int]:
+        """Palavras programadas (não nulas) que nenhum caminho a partir do fetch atinge."""
+        store = self.cpu.control_unit.control_store
+        reached = reachable_microaddresses(store.decoded)
+        return [mpc for mpc, word in enumerate(store) if word and mpc not in reached]
+
+    def never_executed(self) -> List[int]:
+        """Endereços alcançáveis que não foram executados na região medida."""
+        reached = reachable_microaddresses(self._decoded())
+        return sorted(mpc for mpc in reached if not self.executions[mpc])
+
+    def uncovered_branches(self) -> List[Tuple[int, str]]:
+        """Desvios condicionais executados com um dos lados nunca seguido: (endereço, "taken"/"not_taken")."""
+        missing = []
+        for mpc in range(len(self.executions)):
+            if self.executions[mpc] and self._decoded()[mpc].cond in (1, 2):
+                if not self.taken[mpc]:
+                    missing.append((mpc, "taken"))
+                if not self.not_taken[mpc]:
+                    missing.append((mpc, "not_taken"))
+        return missing
+
+    def hot(self, top: Optional[int] = 10) -> List[Tuple[int, int, float]]:
+        """Microinstruções que mais consumiram ciclos: (endereço, execuções, % do total)."""
+        total = sum(self.executions)
+        order = sorted((mpc for mpc in range(len(self.executions)) if self.executions[mpc]),
+                       key=lambda mpc: (-self.executions[mpc], mpc))
+        return [(mpc, self.executions[mpc], 100.0 * self.executions[mpc] / total) for mpc in order[:top]]
+
+    def path_addresses(self, key: int, path: int) -> Tuple[int, ...]:
+        """Endereços percorridos por uma instrução do opcode 'key' seguindo o caminho 'path'."""
+        decoded = self._decoded()
+        ir = _dispatch_word(key)
+        bits = [int(bit) for bit in bin(path)[3:]]  # Sem o "0b1" inicial
+        addresses = []
+        mpc = 0
+        while True:
+            addresses.append(mpc)
+            signals = decoded[mpc]
+            if signals.cond == 0:
+                mpc = signals.addr
+            elif signals.cond == 3:
+                mpc = ((ir >> 12) & 0xF) * 10 + 10
+            elif bits:
+                mpc = signals.addr | 0x80 if bits.pop(0) else signals.addr
+            else:
+                raise ValueError("Caminho com menos desvios do que o microcódigo pede.")
+            if mpc == 0:
+                return tuple(addresses)
+
+    def opcode_paths(self) -> Dict[str, List[Tuple[Tuple[int, ...], int]]]:
+        """Por mnemônico, os caminhos pela microrrotina (endereços) e quantas vezes cada um ocorreu."""
+        result = {}
+        for key, counts in enumerate(self.paths):
+            if counts:
+                ranked = sorted(counts.items(), key=lambda item: -item[1])
+                result[OPCODE_NAMES[key]] = [(self.path_addresses(key, path), n) for path, n in ranked]
+        return result
+
+    def get_stats(self) -> dict:
+        """Resumo da cobertura, pronto para JSON."""
+        reached = reachable_microaddresses(self._decoded())
+        executed = sum(1 for mpc in reached if self.executions[mpc])
+        return {
+            "cycles": self.cycles,
+            "reachable": len(reached),
+            "executed": executed,
+            "coverage": executed / len(reached),
+            "unreachable": self.unreachable(),
+            "never_executed": self.never_executed(),
+            "uncovered_branches": [list(item) for item in self.uncovered_branches()],
+            "hot": [list(item) for item in self.hot()],
+        }
+
+    def write_report(self, file: IO[str], top: int = 10):
+        """Relatório em texto: cobertura, microcódigo morto, pontos quentes e caminhos por opcode."""
+        stats = self.get_stats()
+        file.write(f"Cobertura: {stats['executed']}/{stats['reachable']} microinstruções alcançáveis "
+                   f"({100 * stats['coverage']:.1f}%) em {self.cycles} ciclos\n")
+        file.write(f"Inalcançáveis: {stats['unreachable'] or '-'}\n")
+        file.write(f"Nunca executadas: {stats['never_executed'] or '-'}\n")
+        file.write(f"Desvios com um lado não coberto: {stats['uncovered_branches'] or '-'}\n")
+        file.write(f"\n{'MPC':>4} {'Execuções':>12} {'%':>6}\n")
+        for mpc, count, percent in self.hot(top):
+            file.write(f"{mpc:>4} {count:>12} {percent:>6.2f}\n")
+        for name, ranked in self.opcode_paths().items():
+            file.write(f"\n{name}\n")
+            for addresses, count in ranked:
+                file.write(f"  {count:>10}  {' '.join(map(str, addresses))}\n")
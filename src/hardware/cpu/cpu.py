@@ -1,15 +1,49 @@
+import struct
+from typing import Callable, List, Optional, TYPE_CHECKING
+from src.common.constants import AMASK, MASK_16BIT
+from src.hardware.memory.ram import MainMemory
+from src.hardware.memory.cache import DirectCache
 from src.hardware.memory.manager import MemoryManager
 from src.hardware.cpu.datapath import Datapath
 from src.hardware.cpu.control import ControlUnit
-from src.hardware.cpu.registers import Registers
+from src.hardware.cpu.registers import Registers, REGISTER_COUNT, BUS_C_WRITABLE, PCStop, pc_stops
 from src.hardware.cpu.firmware import CONTROL_STORE
+from src.hardware.snapshot import SnapshotError, pack_snapshot, unpack_snapshot
+
+if TYPE_CHECKING:
+    from src.hardware.cpu.breakpoints import Breakpoints
+    from src.hardware.cpu.coverage import MicrocodeCoverage
+    from src.hardware.cpu.perf import PerfCounters
+    from src.hardware.cpu.profiler import Profiler
+
+_CPU_STATE = struct.Struct("<QH??")  # Ciclos, saída da ULA, N, Z
 
 class CPU:
-    def __init__(self, memory_manager: MemoryManager):
+    MODES = ("micro", "functional", "compiled", "routine", "block")
+
+    def __init__(self, memory_manager: MemoryManager, lazy_flags: bool = False):
         self.memory = memory_manager
         self.registers = Registers()
-        self.datapath = Datapath(self.registers)
+        self.datapath = Datapath(self.registers, lazy_flags)
         self.control_unit = ControlUnit()
+        self.cycles = 0  # Total de microciclos executados
+
+        # Motor de execução usado por run() (ver set_mode)
+        self.mode = "micro"
+        self._engines = {}
+
+        # Tabela de execução de run(), derivada da Memória de Controle
+        self._run_table: List[tuple] = []
+        self._run_table_version = -1
+
+        # Contadores de desempenho (ver start_counters); None: run() sem contagem
+        self.counters = None
+        # Cobertura do microcódigo (ver start_coverage)
+        self.coverage = None
+        # Breakpoints e watchpoints (ver set_breakpoints)
+        self.breakpoints = None
+        # Profiler de PCs e grafo de chamadas (ver start_profiler)
+        self.profiler = None
         
         # Carrega o firmware padrão ao iniciar
         self.control_unit.load_firmware(CONTROL_STORE)
@@ -46,6 +80,523 @@ class CPU:
         
         next_addr = self.control_unit.get_next_mpc(mir, n_flag, z_flag, ir_val)
         self.control_unit.update_mpc(next_addr)
+        self.cycles += 1
+
+    # --- Snapshot / clone ---
+
+    def snapshot(self) -> bytes:
+        """
+        Estado completo da máquina em formato binário versionado (ver snapshot.py):
+        ciclos, ULA/flags e modo de execução, registradores, MPC/MIR + Memória de Controle,
+        RAM (buffer de 16 bits) e cache.
+        """
+        alu = self.datapath.alu
+        return pack_snapshot(
+            b"CPU",
+            _CPU_STATE.pack(self.cycles, alu.output, alu.N, alu.Z),
+            self.mode.encode(),
+            self.registers.snapshot(),
+            self.control_unit.snapshot(),
+            self.memory.snapshot(),
+        )
+
+    def restore(self, data: bytes):
+        """Restaura, nesta CPU e no seu MemoryManager, um snapshot de snapshot()."""
+        state, mode, registers, control, memory = unpack_snapshot(data, b"CPU")
+        mode = bytes(mode).decode()
+        if mode not in self.MODES:
+            raise SnapshotError(f"Modo de execução desconhecido no snapshot: '{mode}'.")
+        self.registers.restore(registers)
+        self.control_unit.restore(control)
+        self.memory.restore(memory)
+        alu = self.datapath.alu
+        self.cycles, alu.output, alu.N, alu.Z = _CPU_STATE.unpack(state)
+        self.mode = mode
+
+    @classmethod
+    def from_snapshot(cls, data: bytes, lazy_flags: bool = False) -> 'CPU':
+        """CPU nova (com RAM e cache próprias, do tipo salvo) no estado de um snapshot."""
+        cpu = cls(MemoryManager(MainMemory(), DirectCache()), lazy_flags)
+        cpu.restore(data)
+        return cpu
+
+    def clone(self) -> 'CPU':
+        """
+        Cópia independente em memória para execuções "e se": a RAM é compartilhada em
+        copy-on-write (só as páginas escritas depois são duplicadas), o resto é copiado.
+        Os motores de execução (e seus caches de tradução) não são copiados.
+        """
+        other = CPU(self.memory.clone(), self.datapath.lazy_flags)
+        other.registers.file[:] = self.registers.file
+        store = self.control_unit.control_store
+        if other.control_unit.control_store != store:
+            other.control_unit.control_store[:] = store
+        other.control_unit.MPC = self.control_unit.MPC
+        other.control_unit.MIR = self.control_unit.MIR
+        alu, other_alu = self.datapath.alu, other.datapath.alu
+        other_alu.output, other_alu.N, other_alu.Z = alu.output, alu.N, alu.Z
+        other.cycles = self.cycles
+        other.mode = self.mode
+        return other
+
+    def set_mode(self, mode: str):
+        """
+        Escolhe o motor usado por run(), sem alterar o estado da máquina:
+        - "micro": microinstrução a microinstrução (padrão);
+        - "functional": instrução MAC-1 inteira por vez (ver functional.py);
+        - "compiled": uma função especializada por microinstrução (ver microcompiler.py);
+        - "routine": uma função por instrução MAC-1, gerada a partir do firmware (ver routines.py);
+        - "block": blocos básicos de instruções traduzidos e cacheados por PC (ver blocks.py).
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Modo de execução desconhecido: '{mode}'. Use um de {self.MODES}.")
+        self.mode = mode
+
+    def run(self, max_cycles: int, until_pc: Optional[PCStop] = None, until_mpc: Optional[int] = None,
+            until: Optional[Callable[['CPU'], bool]] = None) -> int:
+        """
+        Executa até 'max_cycles' microciclos no modo atual (ver set_mode).
+        Retorna o número de microciclos executados.
+        """
+        if self.profiler is not None:
+            return self.profiler.run(max_cycles, until_pc, until_mpc, until)
+        return self._run_mode(max_cycles, until_pc, until_mpc, until)
+
+    def _run_mode(self, max_cycles: int, until_pc: Optional[PCStop] = None, until_mpc: Optional[int] = None,
+                  until: Optional[Callable[['CPU'], bool]] = None) -> int:
+        """
+        run() sem o profiler: com contadores, cobertura ou breakpoints armados, o laço
+        instrumentado; com a memória instrumentada, ciclo a ciclo; senão o motor do modo.
+        """
+        breakpoints = self.breakpoints
+        if (self.counters is not None or self.coverage is not None
+                or (breakpoints is not None and breakpoints.armed)):
+            return self._run_instrumented(max_cycles, until_pc, until_mpc, until)
+        if self.memory.instrumented:
+            # Gravando acessos ou contando tempo (ver MemoryManager.start_recording e
+            # start_timing): ciclo a ciclo, para que cada acesso tenha o ciclo e a
+            # microinstrução exatos
+            return self._run_steps(max_cycles, until_pc, until_mpc, until)
+        if self.mode == "micro":
+            return self._run_micro(max_cycles, until_pc, until_mpc, until)
+        return self.engine(self.mode).run(max_cycles, until_pc, until_mpc, until)
+
+    def start_counters(self, counters: 'PerfCounters'):
+        """Liga os contadores de desempenho (ver perf.py): run() passa a contar, em qualquer modo."""
+        counters.cpu = self
+        self.counters = counters
+
+    def stop_counters(self) -> Optional['PerfCounters']:
+        """Desliga os contadores (que continuam legíveis) e os retorna."""
+        counters, self.counters = self.counters, None
+        return counters
+
+    def start_coverage(self, coverage: 'MicrocodeCoverage'):
+        """
+        Liga a cobertura do microcódigo (ver coverage.py): run() passa a contar cada
+        microinstrução. Pode ficar ligada junto com os contadores de desempenho.
+        """
+        coverage.cpu = self
+        self.coverage = coverage
+
+    def stop_coverage(self) -> Optional['MicrocodeCoverage']:
+        """Desliga a cobertura (que continua legível) e a retorna."""
+        coverage, self.coverage = self.coverage, None
+        return coverage
+
+    def set_breakpoints(self, breakpoints: Optional['Breakpoints']):
+        """
+        Associa os breakpoints (ver breakpoints.py), ou None para removê-los. Enquanto
+        algum estiver armado, run() para neles (o motivo fica em breakpoints.hit).
+        """
+        if breakpoints is not None:
+            breakpoints.cpu = self
+        self.breakpoints = breakpoints
+
+    def start_profiler(self, profiler: 'Profiler'):
+        """Liga o profiler (ver profiler.py): run() passa a atribuir ciclos e misses a cada PC."""
+        profiler.cpu = self
+        self.profiler = profiler
+
+    def stop_profiler(self) -> Optional['Profiler']:
+        """Desliga o profiler (que continua legível) e o retorna."""
+        profiler, self.profiler = self.profiler, None
+        return profiler
+
+    def engine(self, mode: str):
+        """Instância (criada sob demanda) do motor alternativo de um modo."""
+        engine = self._engines.get(mode)
+        if engine is None:
+            if mode == "functional":
+                from src.hardware.cpu.functional import FunctionalEngine
+                engine = FunctionalEngine(self)
+            elif mode == "compiled":
+                from src.hardware.cpu.microcompiler import CompiledEngine
+                engine = CompiledEngine(self)
+            elif mode == "routine":
+                from src.hardware.cpu.routines import RoutineEngine
+                engine = RoutineEngine(self)
+            elif mode == "block":
+                from src.hardware.cpu.blocks import BlockEngine
+                engine = BlockEngine(self)
+            else:
+                raise ValueError(f"Modo sem motor alternativo: '{mode}'.")
+            self._engines[mode] = engine
+        return engine
+
+    def _run_micro(self, max_cycles: int, until_pc: Optional[PCStop] = None, until_mpc: Optional[int] = None,
+                   until: Optional[Callable[['CPU'], bool]] = None) -> int:
+        """
+        Executa até 'max_cycles' microinstruções num único laço, com todo o estado
+        quente em variáveis locais (fetch, decode, datapath, memória e sequenciamento
+        embutidos). O resultado é idêntico a chamar step() repetidamente.
+
+        Para antes do limite, ao fim de um ciclo, quando:
+        - until_pc: a CPU volta ao fetch (MPC=0) com PC == until_pc (ou, para um
+          conjunto de PCs, com o PC num deles);
+        - until_mpc: o próximo MPC é until_mpc;
+        - until(cpu): o predicado retorna True (o estado é sincronizado a cada ciclo).
+
+        Retorna o número de ciclos executados.
+        """
+        if max_cycles <= 0:
+            return 0
+
+        regs = self.registers
+        store = self.control_unit.control_store
+        if self._run_table_version != store.version:
+            self._run_table = [self._run_entry(signals) for signals in store.decoded]
+            self._run_table_version = store.version
+        table = self._run_table
+        mem_read = self.memory.read
+        mem_write = self.memory.write
+
+        # O próprio banco de registradores, indexado pelo número do barramento:
+        # 0-6 registradores, 7-11 constantes (0, +1, -1, AMASK, SMASK), 12-15 rascunho A-D
+        r = regs.file
+        mpc = last = self.control_unit.MPC
+        alu_out = -1  # Saída da ULA do último ciclo (N/Z são derivadas dela)
+
+        stops = pc_stops(until_pc)
+        stop_mpc = -1 if until_mpc is None else until_mpc
+
+        base = self.cycles
+        cycles = 0
+        try:
+            while cycles < max_cycles:
+                last = mpc
+                src_a, src_b, alu, sh, mar, mbr, dst_c, rd, wr, cond, addr = table[mpc]
+
+                # Barramentos A e B (AMUX e constantes já resolvidos na tabela)
+                va = r[src_a]
+                vb = r[src_b]
+
+                # ULA
+                if alu == 0:
+                    alu_out = (va + vb) & MASK_16BIT
+                elif alu == 1:
+                    alu_out = va & vb
+                elif alu == 2:
+                    alu_out = va & MASK_16BIT
+                else:
+                    alu_out = ~va & MASK_16BIT
+
+                # Deslocador
+                if sh == 1:
+                    res = alu_out >> 1
+                elif sh == 2:
+                    res = (alu_out << 1) & MASK_16BIT
+                else:
+                    res = alu_out
+
+                # Escrita (MAR/MBR dedicados + Barramento C)
+                if mar:
+                    r[0] = res
+                if mbr:
+                    r[1] = res
+                if dst_c:
+                    r[dst_c] = res
+
+                # Memória
+                if rd:
+                    r[1] = mem_read(r[0])
+                if wr:
+                    mem_write(r[0], r[1])
+
+                # Sequenciamento
+                if cond == 0:
+                    mpc = addr
+                elif cond == 3:
+                    mpc = ((r[5] >> 12) & 0xF) * 10 + 10
+                elif cond == 1:
+                    mpc = addr | 0x80 if alu_out & 0x8000 else addr
+                else:
+                    mpc = addr | 0x80 if alu_out == 0 else addr
+
+                cycles += 1
+                if mpc == stop_mpc or (mpc == 0 and stops[r[2]]):
+                    break
+                if until is not None:
+                    self._writeback(r, mpc, store[last], alu_out, base + cycles)
+                    if until(self):
+                        break
+        finally:
+            # Também em caso de exceção (ex.: escrita fora da RAM), como em step()
+            self._writeback(r, mpc, store[last], alu_out, base + cycles)
+
+        return cycles
+
+    def _run_instrumented(self, max_cycles: int, until_pc: Optional[PCStop] = None,
+                          until_mpc: Optional[int] = None,
+                          until: Optional[Callable[['CPU'], bool]] = None) -> int:
+        """
+        O laço de _run_micro (mesmos resultados e paradas) com a instrumentação ligada
+        à CPU embutida: os contadores de desempenho (ver perf.py) e a cobertura do
+        microcódigo (ver coverage.py), juntos ou separados, são incrementados a cada
+        microinstrução, nos acessos à memória, nos desvios e no fim de cada instrução;
+        os breakpoints armados (ver breakpoints.py) são consultados nos mesmos pontos e
+        param o laço ao fim do ciclo que os atingiu (o motivo fica em breakpoints.hit).
+        Com a memória instrumentada, o ciclo e o MPC são sincronizados antes de cada rd/wr.
+        """
+        if max_cycles <= 0:
+            return 0
+        from src.hardware.cpu.perf import opcode_key
+
+        memory = self.memory
+        control = self.control_unit
+        store = control.control_store
+        if self._run_table_version != store.version:
+            self._run_table = [self._run_entry(signals) for signals in store.decoded]
+            self._run_table_version = store.version
+        table = self._run_table
+        mem_read = memory.read
+        mem_write = memory.write
+        # Log/modelo de tempo: o MemoryManager lê o ciclo e o MPC de cada acesso da CPU
+        sync = memory.instrumented
+
+        counters = self.counters
+        counting = counters is not None
+        if counting:
+            kinds = counters._fetch_kinds(store)
+            cache = memory.cache
+            block = cache.block_size
+            retired, opcode_cycles = counters.retired, counters.opcode_cycles
+            taken, not_taken = counters.branch_taken, counters.branch_not_taken
+            hits, misses, ram = counters.cache_hits, counters.cache_misses, counters.ram
+            start = -counters._pending  # Início (relativo) da instrução em curso
+
+        coverage = self.coverage
+        covering = coverage is not None
+        if covering:
+            executions, cov_taken, cov_not_taken = coverage.executions, coverage.taken, coverage.not_taken
+            paths = coverage.paths
+            # Caminho pelos desvios da instrução em curso; só vale se acompanhada desde o fetch
+            path = coverage._path
+            valid = path is not None or control.MPC == 0
+            if path is None:
+                path = 1
+
+        breakpoints = self.breakpoints
+        breaking = breakpoints is not None and breakpoints.armed
+        if breaking:
+            from src.hardware.cpu.breakpoints import Hit, WATCH_READ, WATCH_WRITE
+            breakpoints.hit = None
+            pcs, mpcs, watch = breakpoints.pcs, breakpoints.mpcs, breakpoints.watch
+            watching = breakpoints.watching
+            at_fetch = breakpoints._at_fetch
+            watched_registers = breakpoints.registers
+        else:
+            watching = False
+        hit = None  # (tipo, valor) de um watchpoint ou breakpoint de MPC
+
+        r = self.registers.file
+        mpc = last = control.MPC
+        alu_out = -1
+
+        stops = pc_stops(until_pc)
+        stop_mpc = -1 if until_mpc is None else until_mpc
+
+        base = self.cycles
+        cycles = 0
+        try:
+            while cycles < max_cycles:
+                last = mpc
+                if covering:
+                    executions[mpc] += 1
+                src_a, src_b, alu, sh, mar, mbr, dst_c, rd, wr, cond, addr = table[mpc]
+
+                va = r[src_a]
+                vb = r[src_b]
+                if alu == 0:
+                    alu_out = (va + vb) & MASK_16BIT
+                elif alu == 1:
+                    alu_out = va & vb
+                elif alu == 2:
+                    alu_out = va & MASK_16BIT
+                else:
+                    alu_out = ~va & MASK_16BIT
+
+                if sh == 1:
+                    res = alu_out >> 1
+                elif sh == 2:
+                    res = (alu_out << 1) & MASK_16BIT
+                else:
+                    res = alu_out
+
+                if mar:
+                    r[0] = res
+                if mbr:
+                    r[1] = res
+                if dst_c:
+                    r[dst_c] = res
+
+                if rd or wr:
+                    if sync:
+                        self.cycles = base + cycles
+                        control.MPC = last
+                    if rd:
+                        if counting:
+                            before = cache.misses
+                            r[1] = mem_read(r[0])
+                            if cache.misses != before:
+                                misses[kinds[last]] += 1
+                                ram[0] += block
+                            else:
+                                hits[kinds[last]] += 1
+                        else:
+                            r[1] = mem_read(r[0])
+                        if watching and watch[r[0]] & WATCH_READ:
+                            hit = ("read", r[0])
+                    if wr:
+                        mem_write(r[0], r[1])
+                        if counting:
+                            ram[1] += 1
+                        if watching and hit is None and watch[r[0]] & WATCH_WRITE:
+                            hit = ("write", r[0])
+
+                if cond == 0:
+                    mpc = addr
+                    if counting:
+                        taken[0] += 1
+                elif cond == 3:
+                    mpc = ((r[5] >> 12) & 0xF) * 10 + 10
+                    if counting:
+                        taken[3] += 1
+                elif (alu_out & 0x8000) if cond == 1 else (alu_out == 0):
+                    mpc = addr | 0x80
+                    if counting:
+                        taken[cond] += 1
+                    if covering:
+                        cov_taken[last] += 1
+                        path = (path << 1) | 1
+                else:
+                    mpc = addr
+                    if counting:
+                        not_taken[cond] += 1
+                    if covering:
+                        cov_not_taken[last] += 1
+                        path <<= 1
+
+                cycles += 1
+                if mpc == 0:
+                    # Fim de uma instrução: a do IR
+                    if counting:
+                        key = opcode_key(r[5])
+                        retired[key] += 1
+                        opcode_cycles[key] += cycles - start
+                        start = cycles
+                    if covering:
+                        if valid:
+                            counts = paths[opcode_key(r[5])]
+                            counts[path] = counts.get(path, 0) + 1
+                        valid = True
+                        path = 1
+                if breaking:
+                    if hit is not None:
+                        break
+                    if mpcs[mpc]:
+                        hit = ("mpc", mpc)
+                        break
+                    if mpc == 0 and (pcs[r[2] & AMASK] or watched_registers):
+                        found = at_fetch(r, base + cycles)
+                        if found is not None:
+                            breakpoints.hit = found
+                            break
+                if mpc == stop_mpc or (mpc == 0 and stops[r[2]]):
+                    break
+                if until is not None:
+                    self._writeback(r, mpc, store[last], alu_out, base + cycles)
+                    if until(self):
+                        break
+        finally:
+            self._writeback(r, mpc, store[last], alu_out, base + cycles)
+            if counting:
+                counters.cycles += cycles
+                counters._pending = cycles - start
+            if covering:
+                coverage.cycles += cycles
+                coverage._path = path if valid else None
+        if hit is not None:
+            breakpoints.hit = Hit(hit[0], hit[1], base + cycles)
+
+        return cycles
+
+    def _run_steps(self, max_cycles: int, until_pc: Optional[PCStop] = None, until_mpc: Optional[int] = None,
+                   until: Optional[Callable[['CPU'], bool]] = None) -> int:
+        """run() por chamadas a step(), com as mesmas condições de parada de _run_micro."""
+        control = self.control_unit
+        regs = self.registers
+        stops = pc_stops(until_pc)
+        cycles = 0
+        while cycles < max_cycles:
+            self.step()
+            cycles += 1
+            mpc = control.MPC
+            if mpc == until_mpc or (mpc == 0 and stops[regs.PC]):
+                break
+            if until is not None and until(self):
+                break
+        return cycles
+
+    @staticmethod
+    def _run_entry(signals) -> tuple:
+        """
+        Converte os sinais de uma microinstrução na forma usada por run():
+        - fonte do barramento A: 1 (MBR) se AMUX, senão o campo A;
+        - destino do barramento C: o registrador se ENC e não for constante, senão 0 (nenhum).
+          Como MAR é o índice 0, uma escrita 'C=MAR' vira o sinal MAR dedicado.
+        """
+        src_a = 1 if signals.amux else signals.a
+        mar = signals.mar
+        dst_c = 0
+        if signals.enc and BUS_C_WRITABLE[signals.c]:
+            if signals.c == 0:
+                mar = True
+            else:
+                dst_c = signals.c
+        return (src_a, signals.b, signals.alu, signals.sh, mar, signals.mbr, dst_c,
+                signals.rd, signals.wr, signals.cond, signals.addr)
+
+    def _writeback(self, r: List[int], mpc: int, mir: int, alu_out: int, total_cycles: int):
+        """
+        Devolve aos componentes o estado que run() manteve em variáveis locais
+        (r: cópia do banco de registradores, ou o próprio 'registers.file').
+        """
+        regs = self.registers
+        if r is not regs.file:
+            regs.file[:REGISTER_COUNT] = r[:REGISTER_COUNT]
+        self._writeback_sequencer(mpc, mir, alu_out)
+        self.cycles = total_cycles
+
+    def _writeback_sequencer(self, mpc: int, mir: int, alu_out: int):
+        """Atualiza MPC, MIR e as flags N/Z (derivadas da última saída da ULA, se houver)."""
+        self.control_unit.MPC = mpc
+        self.control_unit.MIR = mir
+        if alu_out >= 0:
+            alu = self.datapath.alu
+            alu.output = alu_out
+            alu.N = bool(alu_out & 0x8000)
+            alu.Z = alu_out == 0
 
     def run_debug(self, steps=20):
         """Roda X passos e imprime estado (para testes manuais no terminal)."""
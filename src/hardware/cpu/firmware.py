@@ -35,10 +35,12 @@ CONTROL_STORE = [0] * 256
 # ==============================================================================
 
 # Endereço 0: MAR := PC; rd;
+# CORREÇÃO: a ULA em IDENTITY passa o barramento A, então o PC precisa vir em A
+# (com B=PC e A=0 o MAR recebia o próprio MAR e a busca lia o endereço errado).
 CONTROL_STORE[0] = micro_inst(
     mar=1,      # Carrega MAR
     rd=1,       # Sinaliza leitura da RAM
-    b=2,        # B = PC (2)
+    a=2,        # A = PC (2)
     alu=ALUOp.IDENTITY.value,
     enc=0,      # Apenas MAR
     addr=1      # Próximo passo: 1
@@ -181,4 +183,213 @@ CONTROL_STORE[70] = micro_inst(
     c=2,        # Grava no PC
     enc=1,
     addr=0      # Volta para Fetch
-)
\ No newline at end of file
+)
+# ==============================================================================
+# INSTRUÇÃO 3: SUBD (Subtract Direct) - Opcode 3 -> Endereço 40
+# Semântica: AC := AC - Memory[Endereço]   (AC + NOT(M) + 1)
+# ==============================================================================
+
+# 40: MAR := IR & AMASK; rd;
+CONTROL_STORE[40] = micro_inst(a=5, b=10, alu=ALUOp.AND.value, mar=1, rd=1, addr=41)
+
+# 41: AC := AC + 1; rd;
+CONTROL_STORE[41] = micro_inst(a=4, b=8, alu=ALUOp.ADD.value, c=4, enc=1, rd=1, addr=42)
+
+# 42: TIR := NOT MBR;
+CONTROL_STORE[42] = micro_inst(amux=1, alu=ALUOp.NOT.value, c=6, enc=1, addr=43)
+
+# 43: AC := AC + TIR; goto 0
+CONTROL_STORE[43] = micro_inst(a=4, b=6, alu=ALUOp.ADD.value, c=4, enc=1, addr=0)
+
+# ==============================================================================
+# DESVIOS CONDICIONAIS
+# O sequenciador desvia para (addr | 0x80) quando a condição é verdadeira, então
+# cada teste usa um par de endereços: 'addr' (falso) e 'addr + 128' (verdadeiro).
+#   51 / 179: PC := IR & AMASK  /  não desvia
+#    0 / 128: não desvia (volta direto ao fetch)  /  PC := IR & AMASK
+# ==============================================================================
+
+# 51: PC := IR & AMASK; goto 0
+CONTROL_STORE[51] = micro_inst(a=5, b=10, alu=ALUOp.AND.value, c=2, enc=1, addr=0)
+
+# 179: goto 0 (condição não satisfeita)
+CONTROL_STORE[179] = micro_inst(addr=0)
+
+# 128: PC := IR & AMASK; goto 0
+CONTROL_STORE[128] = micro_inst(a=5, b=10, alu=ALUOp.AND.value, c=2, enc=1, addr=0)
+
+# INSTRUÇÃO 4: JPOS - Opcode 4 -> Endereço 50
+# 50: ALU := AC; if N goto 179 (não desvia) else goto 51 (desvia)
+CONTROL_STORE[50] = micro_inst(a=4, alu=ALUOp.IDENTITY.value, cond=1, addr=51)
+
+# INSTRUÇÃO 5: JZER - Opcode 5 -> Endereço 60
+# 60: ALU := AC; if Z goto 128 (desvia) else goto 0
+CONTROL_STORE[60] = micro_inst(a=4, alu=ALUOp.IDENTITY.value, cond=2, addr=0)
+
+# ==============================================================================
+# INSTRUÇÃO 7: LOCO (Load Constant) - Opcode 7 -> Endereço 80
+# Semântica: AC := Constante (0 <= x <= 4095)
+# ==============================================================================
+
+# 80: AC := IR & AMASK; goto 0
+CONTROL_STORE[80] = micro_inst(a=5, b=10, alu=ALUOp.AND.value, c=4, enc=1, addr=0)
+
+# ==============================================================================
+# INSTRUÇÕES LOCAIS (Endereço relativo ao SP): LODL, STOL, ADDL, SUBL
+# Opcodes 8-11 -> Endereços 90, 100, 110, 120
+# ==============================================================================
+
+# --- LODL: AC := Memory[SP + x] ---
+# 90: TIR := IR & AMASK;
+CONTROL_STORE[90] = micro_inst(a=5, b=10, alu=ALUOp.AND.value, c=6, enc=1, addr=91)
+# 91: MAR := TIR + SP; rd;
+CONTROL_STORE[91] = micro_inst(a=6, b=3, alu=ALUOp.ADD.value, mar=1, rd=1, addr=92)
+# 92: rd;
+CONTROL_STORE[92] = micro_inst(rd=1, addr=93)
+# 93: AC := MBR; goto 0
+CONTROL_STORE[93] = micro_inst(amux=1, alu=ALUOp.IDENTITY.value, c=4, enc=1, addr=0)
+
+# --- STOL: Memory[SP + x] := AC ---
+# 100: TIR := IR & AMASK;
+CONTROL_STORE[100] = micro_inst(a=5, b=10, alu=ALUOp.AND.value, c=6, enc=1, addr=101)
+# 101: MAR := TIR + SP;
+CONTROL_STORE[101] = micro_inst(a=6, b=3, alu=ALUOp.ADD.value, mar=1, addr=102)
+# 102: MBR := AC; wr;
+CONTROL_STORE[102] = micro_inst(a=4, alu=ALUOp.IDENTITY.value, mbr=1, wr=1, addr=103)
+# 103: wr; goto 0
+CONTROL_STORE[103] = micro_inst(wr=1, addr=0)
+
+# --- ADDL: AC := AC + Memory[SP + x] ---
+# 110: TIR := IR & AMASK;
+CONTROL_STORE[110] = micro_inst(a=5, b=10, alu=ALUOp.AND.value, c=6, enc=1, addr=111)
+# 111: MAR := TIR + SP; rd;
+CONTROL_STORE[111] = micro_inst(a=6, b=3, alu=ALUOp.ADD.value, mar=1, rd=1, addr=112)
+# 112: rd;
+CONTROL_STORE[112] = micro_inst(rd=1, addr=113)
+# 113: AC := MBR + AC; goto 0
+CONTROL_STORE[113] = micro_inst(amux=1, b=4, alu=ALUOp.ADD.value, c=4, enc=1, addr=0)
+
+# --- SUBL: AC := AC - Memory[SP + x] ---
+# 120: TIR := IR & AMASK;
+CONTROL_STORE[120] = micro_inst(a=5, b=10, alu=ALUOp.AND.value, c=6, enc=1, addr=121)
+# 121: MAR := TIR + SP; rd;
+CONTROL_STORE[121] = micro_inst(a=6, b=3, alu=ALUOp.ADD.value, mar=1, rd=1, addr=122)
+# 122: AC := AC + 1; rd;
+CONTROL_STORE[122] = micro_inst(a=4, b=8, alu=ALUOp.ADD.value, c=4, enc=1, rd=1, addr=123)
+# 123: TIR := NOT MBR;
+CONTROL_STORE[123] = micro_inst(amux=1, alu=ALUOp.NOT.value, c=6, enc=1, addr=124)
+# 124: AC := AC + TIR; goto 0
+CONTROL_STORE[124] = micro_inst(a=4, b=6, alu=ALUOp.ADD.value, c=4, enc=1, addr=0)
+
+# INSTRUÇÃO 12: JNEG - Opcode 12 -> Endereço 130
+# 130: ALU := AC; if N goto 128 (desvia) else goto 0
+CONTROL_STORE[130] = micro_inst(a=4, alu=ALUOp.IDENTITY.value, cond=1, addr=0)
+
+# INSTRUÇÃO 13: JNZE - Opcode 13 -> Endereço 140
+# 140: ALU := AC; if Z goto 179 (não desvia) else goto 51 (desvia)
+CONTROL_STORE[140] = micro_inst(a=4, alu=ALUOp.IDENTITY.value, cond=2, addr=51)
+
+# ==============================================================================
+# INSTRUÇÃO 14: CALL - Opcode 14 -> Endereço 150
+# Semântica: SP := SP - 1; Memory[SP] := PC; PC := Endereço
+# ==============================================================================
+
+# 150: SP := SP + (-1); MAR := SP - 1;
+CONTROL_STORE[150] = micro_inst(a=3, b=9, alu=ALUOp.ADD.value, c=3, enc=1, mar=1, addr=151)
+# 151: MBR := PC; wr;
+CONTROL_STORE[151] = micro_inst(a=2, alu=ALUOp.IDENTITY.value, mbr=1, wr=1, addr=152)
+# 152: PC := IR & AMASK; wr; goto 0
+CONTROL_STORE[152] = micro_inst(a=5, b=10, alu=ALUOp.AND.value, c=2, enc=1, wr=1, addr=0)
+
+# ==============================================================================
+# OPCODE 15 (Prefixo 1111): PSHI, POPI, PUSH, POP, RETN, SWAP, INSP, DESP
+# Os bits 11-9 do IR escolhem a instrução. O TIR recebe o IR deslocado até o
+# bit testado chegar ao bit 15, e a flag N da ULA faz a árvore de desvios.
+# ==============================================================================
+
+# 160: TIR := lshift(IR + IR);            (TIR = IR << 2)
+CONTROL_STORE[160] = micro_inst(a=5, b=5, alu=ALUOp.ADD.value, sh=ShifterOp.LEFT.value, c=6, enc=1, addr=161)
+# 161: TIR := lshift(TIR + TIR);          (TIR = IR << 4, bit 15 = bit 11 do IR)
+CONTROL_STORE[161] = micro_inst(a=6, b=6, alu=ALUOp.ADD.value, sh=ShifterOp.LEFT.value, c=6, enc=1, addr=162)
+# 162: TIR := lshift(TIR); if N goto 131 else goto 3        (testa bit 11)
+CONTROL_STORE[162] = micro_inst(a=6, alu=ALUOp.IDENTITY.value, sh=ShifterOp.LEFT.value, c=6, enc=1, cond=1, addr=3)
+# 3: TIR := lshift(TIR); if N goto 132 else goto 4          (bit 10: PSHI/POPI x PUSH/POP)
+CONTROL_STORE[3] = micro_inst(a=6, alu=ALUOp.IDENTITY.value, sh=ShifterOp.LEFT.value, c=6, enc=1, cond=1, addr=4)
+# 131: TIR := lshift(TIR); if N goto 133 else goto 5        (bit 10: RETN/SWAP x INSP/DESP)
+CONTROL_STORE[131] = micro_inst(a=6, alu=ALUOp.IDENTITY.value, sh=ShifterOp.LEFT.value, c=6, enc=1, cond=1, addr=5)
+# 4: ALU := TIR; if N goto 134 (POPI) else goto 6 (PSHI)    (bit 9)
+CONTROL_STORE[4] = micro_inst(a=6, alu=ALUOp.IDENTITY.value, cond=1, addr=6)
+# 132: ALU := TIR; if N goto 135 (POP) else goto 7 (PUSH)
+CONTROL_STORE[132] = micro_inst(a=6, alu=ALUOp.IDENTITY.value, cond=1, addr=7)
+# 5: ALU := TIR; if N goto 136 (SWAP) else goto 8 (RETN)
+CONTROL_STORE[5] = micro_inst(a=6, alu=ALUOp.IDENTITY.value, cond=1, addr=8)
+# 133: ALU := TIR; if N goto 137 (DESP) else goto 9 (INSP)
+CONTROL_STORE[133] = micro_inst(a=6, alu=ALUOp.IDENTITY.value, cond=1, addr=9)
+
+# --- PSHI: SP := SP - 1; Memory[SP] := Memory[AC] ---
+# 6: MAR := AC; rd;
+CONTROL_STORE[6] = micro_inst(a=4, alu=ALUOp.IDENTITY.value, mar=1, rd=1, addr=170)
+# 170: SP := SP + (-1); rd;
+CONTROL_STORE[170] = micro_inst(a=3, b=9, alu=ALUOp.ADD.value, c=3, enc=1, rd=1, addr=171)
+# 171: MAR := SP; wr;
+CONTROL_STORE[171] = micro_inst(a=3, alu=ALUOp.IDENTITY.value, mar=1, wr=1, addr=172)
+# 172: wr; goto 0
+CONTROL_STORE[172] = micro_inst(wr=1, addr=0)
+
+# --- POPI: Memory[AC] := Memory[SP]; SP := SP + 1 ---
+# 134: MAR := SP; rd;
+CONTROL_STORE[134] = micro_inst(a=3, alu=ALUOp.IDENTITY.value, mar=1, rd=1, addr=173)
+# 173: SP := SP + 1; rd;
+CONTROL_STORE[173] = micro_inst(a=3, b=8, alu=ALUOp.ADD.value, c=3, enc=1, rd=1, addr=174)
+# 174: MAR := AC; wr;
+CONTROL_STORE[174] = micro_inst(a=4, alu=ALUOp.IDENTITY.value, mar=1, wr=1, addr=175)
+# 175: wr; goto 0
+CONTROL_STORE[175] = micro_inst(wr=1, addr=0)
+
+# --- PUSH: SP := SP - 1; Memory[SP] := AC ---
+# 7: SP := SP + (-1); MAR := SP - 1;
+CONTROL_STORE[7] = micro_inst(a=3, b=9, alu=ALUOp.ADD.value, c=3, enc=1, mar=1, addr=176)
+# 176: MBR := AC; wr;
+CONTROL_STORE[176] = micro_inst(a=4, alu=ALUOp.IDENTITY.value, mbr=1, wr=1, addr=177)
+# 177: wr; goto 0
+CONTROL_STORE[177] = micro_inst(wr=1, addr=0)
+
+# --- POP: AC := Memory[SP]; SP := SP + 1 ---
+# 135: MAR := SP; rd;
+CONTROL_STORE[135] = micro_inst(a=3, alu=ALUOp.IDENTITY.value, mar=1, rd=1, addr=178)
+# 178: SP := SP + 1; rd;
+CONTROL_STORE[178] = micro_inst(a=3, b=8, alu=ALUOp.ADD.value, c=3, enc=1, rd=1, addr=180)
+# 180: AC := MBR; goto 0
+CONTROL_STORE[180] = micro_inst(amux=1, alu=ALUOp.IDENTITY.value, c=4, enc=1, addr=0)
+
+# --- RETN: PC := Memory[SP]; SP := SP + 1 ---
+# 8: MAR := SP; rd;
+CONTROL_STORE[8] = micro_inst(a=3, alu=ALUOp.IDENTITY.value, mar=1, rd=1, addr=181)
+# 181: SP := SP + 1; rd;
+CONTROL_STORE[181] = micro_inst(a=3, b=8, alu=ALUOp.ADD.value, c=3, enc=1, rd=1, addr=182)
+# 182: PC := MBR; goto 0
+CONTROL_STORE[182] = micro_inst(amux=1, alu=ALUOp.IDENTITY.value, c=2, enc=1, addr=0)
+
+# --- SWAP: AC <-> SP (via TIR) ---
+# 136: TIR := AC;
+CONTROL_STORE[136] = micro_inst(a=4, alu=ALUOp.IDENTITY.value, c=6, enc=1, addr=183)
+# 183: AC := SP;
+CONTROL_STORE[183] = micro_inst(a=3, alu=ALUOp.IDENTITY.value, c=4, enc=1, addr=184)
+# 184: SP := TIR; goto 0
+CONTROL_STORE[184] = micro_inst(a=6, alu=ALUOp.IDENTITY.value, c=3, enc=1, addr=0)
+
+# --- INSP: SP := SP + y ---
+# 9: TIR := IR & SMASK;
+CONTROL_STORE[9] = micro_inst(a=5, b=11, alu=ALUOp.AND.value, c=6, enc=1, addr=185)
+# 185: SP := SP + TIR; goto 0
+CONTROL_STORE[185] = micro_inst(a=3, b=6, alu=ALUOp.ADD.value, c=3, enc=1, addr=0)
+
+# --- DESP: SP := SP - y   (SP + NOT(y) + 1) ---
+# 137: TIR := IR & SMASK;
+CONTROL_STORE[137] = micro_inst(a=5, b=11, alu=ALUOp.AND.value, c=6, enc=1, addr=186)
+# 186: TIR := NOT TIR;
+CONTROL_STORE[186] = micro_inst(a=6, alu=ALUOp.NOT.value, c=6, enc=1, addr=187)
+# 187: SP := SP + 1;
+CONTROL_STORE[187] = micro_inst(a=3, b=8, alu=ALUOp.ADD.value, c=3, enc=1, addr=188)
+# 188: SP := SP + TIR; goto 0
+CONTROL_STORE[188] = micro_inst(a=3, b=6, alu=ALUOp.ADD.value, c=3, enc=1, addr=0)
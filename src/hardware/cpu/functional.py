@@ -0,0 +1,311 @@
+"""
+Modo Funcional (nível ISA) do MAC-1.
+Interpreta as instruções MAC-1 diretamente, sem percorrer o microprograma ciclo a ciclo.
+
+Para que os dois modos possam ser alternados sobre o mesmo estado, cada instrução
+reproduz exatamente o que o firmware de referência (firmware.py) faria:
+- a mesma sequência de leituras/escritas no MemoryManager (estatísticas da cache idênticas);
+- o estado final de MAR, MBR, IR, TIR e das flags N/Z;
+- a contagem de microciclos, medida no próprio firmware (ver _instruction_costs).
+
+Se a Memória de Controle carregada for diferente da de referência, a semântica
+escrita à mão deixa de valer e o motor delega tudo ao modo microarquitetural.
+"""
+
+from typing import Callable, List, Optional, Tuple, TYPE_CHECKING
+from src.common.constants import MASK_16BIT, AMASK, SMASK
+from src.hardware.cpu.firmware import CONTROL_STORE
+from src.hardware.cpu.registers import PCStop, pc_stops
+
+if TYPE_CHECKING:
+    from src.hardware.cpu.cpu import CPU
+
+# Chave de custo: opcodes 0-14 usam o próprio opcode; o prefixo 1111 usa 15 + bits 11-9
+# (PSHI, POPI, PUSH, POP, RETN, SWAP, INSP, DESP).
+NUM_KEYS = 23
+
+# Classes do AC no início da instrução (decidem os desvios de JPOS/JZER/JNEG/JNZE)
+AC_POSITIVE, AC_ZERO, AC_NEGATIVE = 0, 1, 2
+
+# Custo de cada instrução: (microciclos, último endereço executado), por classe do AC
+CostTable = List[Tuple[Tuple[int, int], Tuple[int, int], Tuple[int, int]]]
+
+_reference_costs: Optional[CostTable] = None
+
+def _sample_word(key: int) -> int:
+    if key < 15:
+        return (key << 12) | 1
+    return 0xF000 | ((key - 15) << 9) | 1
+
+def _instruction_costs() -> CostTable:
+    """
+    Mede no firmware de referência quantos microciclos cada instrução leva (e qual o
+    último endereço de microcódigo executado), executando-a isoladamente no modo
+    microarquitetural para cada classe do AC. Calculado uma vez por processo.
+    """
+    global _reference_costs
+    if _reference_costs is None:
+        # Importação tardia: cpu.py importa este módulo sob demanda
+        from src.hardware.cpu.cpu import CPU
+        from src.hardware.memory.ram import MainMemory
+        from src.hardware.memory.cache import DirectCache
+        from src.hardware.memory.manager import MemoryManager
+
+        table = []
+        for key in range(NUM_KEYS):
+            row = []
+            for ac in (1, 0, 0x8000):
+                cpu = CPU(MemoryManager(MainMemory(65536), DirectCache()))
+                cpu.memory.write(0, _sample_word(key))
+                cpu.registers.AC = ac
+                cpu.registers.SP = 0x0800
+                while True:
+                    last = cpu.control_unit.MPC
+                    cpu.step()
+                    if cpu.control_unit.MPC == 0 or cpu.cycles > 256:
+                        break
+                row.append((cpu.cycles, last))
+            table.append(tuple(row))
+        _reference_costs = table
+    return _reference_costs
+
+class FunctionalEngine:
+    def __init__(self, cpu: 'CPU'):
+        self.cpu = cpu
+        self.costs = _instruction_costs()
+        # Maior custo possível: perto do fim do orçamento o modo micro termina o trabalho
+        self.max_cost = max(cost for row in self.costs for cost, _ in row)
+        self.instructions = 0  # Instruções MAC-1 executadas neste modo
+
+    def is_reference_firmware(self) -> bool:
+        return list.__eq__(self.cpu.control_unit.control_store, CONTROL_STORE)
+
+    def run(self, max_cycles: int, until_pc: Optional[PCStop] = None, until_mpc: Optional[int] = None,
+            until: Optional[Callable[['CPU'], bool]] = None) -> int:
+        """
+        Executa instruções inteiras até consumir 'max_cycles' microciclos.
+        until_pc e until(cpu) são avaliados nos limites de instrução; until_mpc, um
+        firmware diferente do de referência ou um MPC no meio de uma instrução fazem
+        o trabalho (ou parte dele) ser feito pelo modo microarquitetural.
+        Retorna o número de microciclos executados.
+        """
+        cpu = self.cpu
+        if until_mpc is not None or not self.is_reference_firmware():
+            return cpu._run_micro(max_cycles, until_pc, until_mpc, until)
+
+        cycles = 0
+        if cpu.control_unit.MPC != 0:
+            # Termina a instrução em andamento no nível de microinstrução
+            cycles = cpu._run_micro(max_cycles, None, 0, None)
+            if cpu.control_unit.MPC != 0:
+                return cycles
+            if pc_stops(until_pc)[cpu.registers.PC]:
+                return cycles
+            if until is not None and until(cpu):
+                return cycles
+
+        executed, stopped = self._run_instructions(max_cycles - cycles, until_pc, until)
+        cycles += executed
+        if cycles < max_cycles and not stopped:
+            # Sobra de orçamento menor que a instrução mais longa: completa ciclo a ciclo
+            cycles += cpu._run_micro(max_cycles - cycles, until_pc, None, until)
+        return cycles
+
+    def _run_instructions(self, budget: int, until_pc: Optional[PCStop],
+                          until: Optional[Callable[['CPU'], bool]]) -> Tuple[int, bool]:
+        """Laço de instruções inteiras. Retorna (microciclos, parou por condição)."""
+        cpu = self.cpu
+        regs = cpu.registers
+        read = cpu.memory.read
+        write = cpu.memory.write
+        costs = self.costs
+
+        MAR, MBR, PC, SP, AC, IR, TIR = (regs.MAR, regs.MBR, regs.PC, regs.SP,
+                                         regs.AC, regs.IR, regs.TIR)
+        stops = pc_stops(until_pc)
+        limit = budget - self.max_cost
+        stopped = False
+
+        base = cpu.cycles
+        cycles = 0
+        executed = 0
+        last_mpc = -1
+        alu = -1
+        try:
+            while cycles <= limit:
+                # --- Fetch (0, 1, 2): MAR := PC; rd / PC := PC + 1; rd / IR := MBR ---
+                MAR = PC
+                read(PC)
+                MBR = IR = read(PC)
+                PC = (PC + 1) & MASK_16BIT
+                alu = IR
+                op = IR >> 12
+                x = IR & AMASK
+
+                if op == 0:    # LODD
+                    MAR = x
+                    read(x)
+                    MBR = AC = alu = read(x)
+                    key = 0
+                    cls = AC_POSITIVE
+                elif op == 1:  # STOD
+                    MAR = x
+                    MBR = AC
+                    write(x, AC)
+                    write(x, AC)
+                    alu = (x + x) & MASK_16BIT
+                    key = 1
+                    cls = AC_POSITIVE
+                elif op == 2:  # ADDD
+                    MAR = x
+                    read(x)
+                    MBR = read(x)
+                    AC = alu = (MBR + AC) & MASK_16BIT
+                    key = 2
+                    cls = AC_POSITIVE
+                elif op == 3:  # SUBD
+                    MAR = x
+                    read(x)
+                    MBR = read(x)
+                    TIR = ~MBR & MASK_16BIT
+                    AC = alu = (AC + 1 + TIR) & MASK_16BIT
+                    key = 3
+                    cls = AC_POSITIVE
+                elif op == 6:  # JUMP
+                    PC = alu = x
+                    key = 6
+                    cls = AC_POSITIVE
+                elif op == 7:  # LOCO
+                    AC = alu = x
+                    key = 7
+                    cls = AC_POSITIVE
+                elif op == 4 or op == 5 or op == 12 or op == 13:  # JPOS, JZER, JNEG, JNZE
+                    if AC == 0:
+                        cls = AC_ZERO
+                    elif AC & 0x8000:
+                        cls = AC_NEGATIVE
+                    else:
+                        cls = AC_POSITIVE
+                    if op == 4:
+                        taken = cls != AC_NEGATIVE
+                    elif op == 5:
+                        taken = cls == AC_ZERO
+                    elif op == 12:
+                        taken = cls == AC_NEGATIVE
+                    else:
+                        taken = cls != AC_ZERO
+                    if taken:
+                        PC = alu = x
+                    elif op == 4 or op == 13:
+                        alu = (MAR + MAR) & MASK_16BIT  # 179: goto 0
+                    else:
+                        alu = AC
+                    key = op
+                elif op == 8 or op == 10 or op == 11:  # LODL, ADDL, SUBL
+                    TIR = x
+                    MAR = (x + SP) & MASK_16BIT
+                    read(MAR)
+                    MBR = read(MAR)
+                    if op == 8:
+                        AC = MBR
+                    elif op == 10:
+                        AC = (MBR + AC) & MASK_16BIT
+                    else:
+                        TIR = ~MBR & MASK_16BIT
+                        AC = (AC + 1 + TIR) & MASK_16BIT
+                    alu = AC
+                    key = op
+                    cls = AC_POSITIVE
+                elif op == 9:  # STOL
+                    TIR = x
+                    MAR = (x + SP) & MASK_16BIT
+                    MBR = AC
+                    write(MAR, AC)
+                    write(MAR, AC)
+                    alu = (MAR + MAR) & MASK_16BIT
+                    key = 9
+                    cls = AC_POSITIVE
+                elif op == 14:  # CALL
+                    SP = MAR = (SP + MASK_16BIT) & MASK_16BIT
+                    MBR = PC
+                    write(SP, PC)
+                    PC = alu = x
+                    write(SP, MBR)
+                    key = 14
+                    cls = AC_POSITIVE
+                else:
+                    # Prefixo 1111: a árvore de decodificação deixa TIR = IR << 6
+                    TIR = (IR << 6) & MASK_16BIT
+                    sub = (IR >> 9) & 0x7
+                    if sub == 0:    # PSHI
+                        MAR = AC
+                        read(AC)
+                        MBR = read(AC)
+                        SP = MAR = (SP + MASK_16BIT) & MASK_16BIT
+                        write(SP, MBR)
+                        write(SP, MBR)
+                        alu = (MAR + MAR) & MASK_16BIT
+                    elif sub == 1:  # POPI
+                        MAR = SP
+                        read(SP)
+                        MBR = read(SP)
+                        SP = (SP + 1) & MASK_16BIT
+                        MAR = AC
+                        write(AC, MBR)
+                        write(AC, MBR)
+                        alu = (MAR + MAR) & MASK_16BIT
+                    elif sub == 2:  # PUSH
+                        SP = MAR = (SP + MASK_16BIT) & MASK_16BIT
+                        MBR = AC
+                        write(SP, AC)
+                        write(SP, AC)
+                        alu = (MAR + MAR) & MASK_16BIT
+                    elif sub == 3 or sub == 4:  # POP, RETN
+                        MAR = SP
+                        read(SP)
+                        MBR = alu = read(SP)
+                        SP = (SP + 1) & MASK_16BIT
+                        if sub == 3:
+                            AC = MBR
+                        else:
+                            PC = MBR
+                    elif sub == 5:  # SWAP
+                        TIR = alu = AC
+                        AC = SP
+                        SP = TIR
+                    elif sub == 6:  # INSP
+                        TIR = IR & SMASK
+                        SP = alu = (SP + TIR) & MASK_16BIT
+                    else:           # DESP
+                        TIR = ~(IR & SMASK) & MASK_16BIT
+                        SP = alu = (SP + 1 + TIR) & MASK_16BIT
+                    key = 15 + sub
+                    cls = AC_POSITIVE
+
+                cost, last_mpc = costs[key][cls]
+                cycles += cost
+                executed += 1
+
+                if stops[PC]:
+                    stopped = True
+                    break
+                if until is not None:
+                    self._writeback(MAR, MBR, PC, SP, AC, IR, TIR, last_mpc, alu, base + cycles)
+                    if until(cpu):
+                        stopped = True
+                        break
+        finally:
+            self.instructions += executed
+            self._writeback(MAR, MBR, PC, SP, AC, IR, TIR, last_mpc, alu, base + cycles)
+
+        return cycles, stopped
+
+    def _writeback(self, MAR: int, MBR: int, PC: int, SP: int, AC: int, IR: int, TIR: int,
+                   last_mpc: int, alu_out: int, total_cycles: int):
+        """Devolve o estado à CPU como se o firmware tivesse executado até o limite da instrução."""
+        cpu = self.cpu
+        regs = cpu.registers
+        regs.MAR, regs.MBR, regs.PC, regs.SP, regs.AC, regs.IR, regs.TIR = MAR, MBR, PC, SP, AC, IR, TIR
+        if last_mpc >= 0:
+            cpu._writeback_sequencer(0, cpu.control_unit.control_store[last_mpc], alu_out)
+        cpu.cycles = total_cycles
@@ -0,0 +1,209 @@
+"""
+Depuração com volta no tempo (reverse step) para a CPU.
+ExecutionJournal executa a CPU ciclo a ciclo (CPU.step) e guarda, num buffer circular
+limitado, o delta de cada ciclo: os registradores escritos pela microinstrução (já com
+MAR/MBR finais), MPC e a saída da ULA/flags. De 'checkpoint_interval' em
+'checkpoint_interval' ciclos guarda também um checkpoint completo (CPU.snapshot()).
+
+step_back(n) e goto_cycle(k) restauram o checkpoint mais próximo antes de k e
+reaplicam os deltas até k. As leituras/escritas de memória do delta são refeitas pelo
+MemoryManager (MBR := memória[MAR] já está no delta; memória[MAR] := MBR é regravada),
+o que reproduz exatamente as substituições de linha e os contadores da cache sem
+depender da implementação da cache.
+
+Memória limitada: no máximo 'capacity' deltas e os checkpoints que ainda têm deltas
+até o presente (~capacity / checkpoint_interval snapshots de ~9 KiB para 4096 palavras).
+Alterações de estado fora de step() (carregar programa, editar memória, trocar o
+firmware) exigem reset(); uma troca de firmware durante a gravação reinicia o histórico.
+"""
+
+from bisect import bisect_right
+from collections import deque
+from operator import itemgetter
+from typing import Callable, Deque, List, Optional, Tuple, TYPE_CHECKING
+from src.hardware.cpu.microcompiler import written_registers
+
+if TYPE_CHECKING:
+    from src.hardware.cpu.cpu import CPU
+
+DEFAULT_CAPACITY = 100_000
+DEFAULT_CHECKPOINT_INTERVAL = 1_000
+
+# Delta de um ciclo: (MPC executado, valores dos registradores escritos, saída da ULA, N, Z)
+Delta = Tuple[int, tuple, int, bool, bool]
+
+def _recorded_registers(signals) -> tuple:
+    """
+    Registradores guardados no delta de uma microinstrução: os escritos por ela, mais
+    MAR e MBR sempre (regravar um valor inalterado na reaplicação é inócuo, e com pelo
+    menos dois índices o itemgetter devolve sempre uma tupla).
+    """
+    return tuple(sorted(set(written_registers(signals)) | {0, 1}))
+
+class ExecutionJournal:
+    def __init__(self, cpu: 'CPU', capacity: int = DEFAULT_CAPACITY,
+                 checkpoint_interval: int = DEFAULT_CHECKPOINT_INTERVAL):
+        if not 0 < checkpoint_interval <= capacity:
+            raise ValueError("Use 0 < checkpoint_interval <= capacity.")
+        self.cpu = cpu
+        self.capacity = capacity
+        self.checkpoint_interval = checkpoint_interval
+        self.reset()
+
+    def reset(self):
+        """Descarta o histórico; o estado atual vira o primeiro checkpoint."""
+        # Os deltas terminam sempre no ciclo atual da CPU: o primeiro é o ciclo
+        # cpu.cycles - len(_deltas); o deque descarta sozinho os mais antigos
+        self._deltas: Deque[Delta] = deque(maxlen=self.capacity)
+        self._checkpoints: List[Tuple[int, bytes]] = []
+        self._store = self.cpu.control_unit.control_store
+        self._version = -1
+        self._checkpoint()
+
+    # --- Execução para frente ---
+
+    def step(self):
+        """Um ciclo (CPU.step), gravando o delta e, quando devido, um checkpoint."""
+        cpu = self.cpu
+        if self._store.version != self._version:
+            self.reset()
+        elif cpu.cycles >= self._next_checkpoint:
+            self._checkpoint()
+        mpc = cpu.control_unit.MPC
+        cpu.step()
+        alu = cpu.datapath.alu
+        self._deltas.append((mpc, self._getters[mpc](cpu.registers.file), alu.output, alu.N, alu.Z))
+
+    def run(self, cycles: int, until: Optional[Callable[['CPU'], bool]] = None) -> int:
+        """
+        Executa (e grava) até 'cycles' ciclos, em trechos de um checkpoint ao próximo;
+        para antes se until(cpu) retornar True ao fim de um ciclo. Retorna os ciclos executados.
+        """
+        cpu = self.cpu
+        control = cpu.control_unit
+        alu = cpu.datapath.alu
+        file = cpu.registers.file
+        step = cpu.step
+        done = 0
+        while cycles > 0:
+            # O firmware só muda fora de step(), então basta conferir a cada trecho
+            if self._store.version != self._version:
+                self.reset()
+            elif cpu.cycles >= self._next_checkpoint:
+                self._checkpoint()
+            chunk = min(cycles, self._next_checkpoint - cpu.cycles)
+            append = self._deltas.append
+            getters = self._getters
+            for _ in range(chunk):
+                mpc = control.MPC
+                step()
+                append((mpc, getters[mpc](file), alu.output, alu.N, alu.Z))
+                done += 1
+                if until is not None and until(cpu):
+                    return done
+            cycles -= chunk
+        return done
+
+    # --- Volta no tempo ---
+
+    @property
+    def oldest_cycle(self) -> int:
+        """Ciclo mais antigo que ainda pode ser restaurado."""
+        self._prune()
+        return self._checkpoints[0][0]
+
+    def step_back(self, n: int = 1):
+        """Volta 'n' ciclos (até o ciclo mais antigo disponível)."""
+        self.goto_cycle(max(self.cpu.cycles - n, self.oldest_cycle))
+
+    def goto_cycle(self, cycle: int):
+        """
+        Leva a CPU ao estado do fim do ciclo 'cycle'. Para trás, restaura o checkpoint
+        mais próximo e reaplica os deltas (o histórico posterior é descartado); para
+        frente, executa e grava os ciclos que faltam.
+        """
+        cpu = self.cpu
+        if cycle >= cpu.cycles:
+            self.run(cycle - cpu.cycles)
+            return
+        if cycle < self.oldest_cycle:
+            raise ValueError(f"Ciclo {cycle} fora do histórico (mais antigo: {self.oldest_cycle}).")
+
+        first = cpu.cycles - len(self._deltas)
+        position = bisect_right([c for c, _ in self._checkpoints], cycle) - 1
+        start, data = self._checkpoints[position]
+        del self._checkpoints[position + 1:]
+        for _ in range(cpu.cycles - cycle):
+            self._deltas.pop()
+        cpu.restore(data)
+        self._replay(start - first)
+        self._next_checkpoint = start + self.checkpoint_interval
+
+    def _replay(self, index: int):
+        """Reaplica os deltas a partir de _deltas[index] sobre o estado restaurado."""
+        cpu = self.cpu
+        file = cpu.registers.file
+        control = cpu.control_unit
+        decoded = control.control_store.decoded
+        memory = cpu.memory
+        # Os métodos da classe, sem a instrumentação: o log de acessos e o modelo de tempo
+        # já contaram estes acessos quando eles foram executados
+        read = type(memory).read
+        write = type(memory).write
+        alu = cpu.datapath.alu
+        recorded = self._recorded
+        deltas = self._deltas
+
+        count = len(deltas) - index
+        for i in range(index, len(deltas)):
+            mpc, values, output, n, z = deltas[i]
+            for register, value in zip(recorded[mpc], values):
+                file[register] = value
+            signals = decoded[mpc]
+            if signals.rd:
+                read(memory, file[0])
+            if signals.wr:
+                write(memory, file[0], file[1])
+            alu.output, alu.N, alu.Z = output, n, z
+
+        if count:
+            last = deltas[-1]
+            control.MIR = control.control_store[last[0]]
+            control.MPC = self._next_mpc(last)
+        cpu.cycles += count
+
+    def _next_mpc(self, delta: Delta) -> int:
+        """Próximo MPC depois de um delta (o mesmo sequenciamento de CPU.step)."""
+        mpc, _, _, n, z = delta
+        control = self.cpu.control_unit
+        signals = control.control_store.decoded[mpc]
+        return control.get_next_mpc(signals, n, z, self.cpu.registers.IR)
+
+    # --- Gerência do histórico ---
+
+    def _checkpoint(self):
+        cpu = self.cpu
+        store = self._store
+        if self._version != store.version:
+            self._recorded = [_recorded_registers(signals) for signals in store.decoded]
+            self._getters = [itemgetter(*indices) for indices in self._recorded]
+            self._version = store.version
+        self._prune()
+        self._checkpoints.append((cpu.cycles, cpu.snapshot()))
+        self._next_checkpoint = cpu.cycles + self.checkpoint_interval
+
+    def _prune(self):
+        """Descarta os checkpoints anteriores ao delta mais antigo (sem deltas até o presente)."""
+        first = self.cpu.cycles - len(self._deltas)
+        checkpoints = self._checkpoints
+        while len(checkpoints) > 1 and checkpoints[0][0] < first:
+            checkpoints.pop(0)
+
+    def get_stats(self) -> dict:
+        """Tamanho atual do histórico."""
+        return {
+            "deltas": len(self._deltas),
+            "checkpoints": len(self._checkpoints),
+            "checkpoint_bytes": sum(len(data) for _, data in self._checkpoints),
+            "oldest_cycle": self.oldest_cycle,
+        }
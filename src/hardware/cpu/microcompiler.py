@@ -0,0 +1,227 @@
+"""
+Compilador de Microinstruções do MIC-1.
+Transforma cada palavra da Memória de Controle numa função Python especializada,
+que executa apenas o trabalho que os seus sinais exigem (sem os desvios genéricos
+de barramentos, AMUX, ULA, deslocador e habilitação de escrita de Datapath.run_cycle).
+
+O código gerado opera sobre uma cópia do banco de registradores (Registers.file),
+indexada pelo número do barramento (0=MAR, 1=MBR, 2=PC, 3=SP, 4=AC, 5=IR, 6=TIR,
+7-11 constantes, 12-15 rascunho A-D), e guarda a saída da ULA em ALU_SLOT (as flags N/Z são derivadas dela quando necessário).
+Cada função retorna o próximo MPC.
+
+Cache em dois níveis, ambos LRU e limitados (MAX_CACHED_STORES Memórias de Controle):
+- por palavra: uma palavra de 32 bits vista recentemente não é recompilada;
+- por Memória de Controle: a tabela de 256 entradas é indexada por um hash do conteúdo,
+  então recarregar o mesmo firmware é gratuito e alterar uma palavra recompila só ela.
+"""
+
+import hashlib
+from array import array
+from typing import Callable, Dict, List, Optional, TYPE_CHECKING
+from src.common.constants import MASK_16BIT
+from src.common.utils import LRUCache
+from src.hardware.cpu.control import CONTROL_STORE_SIZE, ControlSignals, decode_microinstruction
+from src.hardware.cpu.registers import BUS_CONSTANTS, BUS_C_WRITABLE, REGISTER_COUNT, PCStop, pc_stops
+
+if TYPE_CHECKING:
+    from src.hardware.cpu.cpu import CPU
+
+# Posição da saída da ULA na lista de estado (logo após os registradores)
+ALU_SLOT = REGISTER_COUNT
+
+# Fábrica: recebe (read, write) da memória e devolve a função da microinstrução
+MicroFactory = Callable[[Callable, Callable], Callable[[List[int]], int]]
+
+# Tabelas de firmwares distintos mantidas; as fábricas por palavra cabem nelas
+MAX_CACHED_STORES = 8
+_factory_cache: Dict[int, MicroFactory] = LRUCache(MAX_CACHED_STORES * CONTROL_STORE_SIZE)
+_table_cache: Dict[str, List[MicroFactory]] = LRUCache(MAX_CACHED_STORES)
+
+def _register(index: int) -> str:
+    """Nome, no código gerado, do registrador de índice 'index' na lista de estado."""
+    return f"r[{index}]"
+
+def _bus(index: int, reg: Callable[[int], str]) -> str:
+    """Operando de um barramento: as constantes (7-11) viram literais."""
+    if index in BUS_CONSTANTS:
+        return str(BUS_CONSTANTS[index])
+    return reg(index)
+
+def _bus_a(signals: ControlSignals, reg: Callable[[int], str]) -> str:
+    if signals.amux:
+        return reg(1)
+    return _bus(signals.a, reg)
+
+def _bus_b(signals: ControlSignals, reg: Callable[[int], str]) -> str:
+    return _bus(signals.b, reg)
+
+def _alu_expression(signals: ControlSignals, reg: Callable[[int], str]) -> str:
+    a = _bus_a(signals, reg)
+    b = _bus_b(signals, reg)
+    if signals.alu == 0:
+        if b == "0":
+            return a
+        if a == "0":
+            return b
+        return f"({a} + {b}) & {MASK_16BIT}"
+    if signals.alu == 1:
+        return f"{a} & {b}"
+    if signals.alu == 2:
+        return a
+    return f"~{a} & {MASK_16BIT}"
+
+def emit_datapath(signals: ControlSignals, reg: Callable[[int], str] = _register,
+                  alu_target: str = "alu") -> List[str]:
+    """
+    Comandos de um ciclo de datapath + memória: saída da ULA em 'alu_target'
+    (que deve incluir a variável 'alu'), escrita via MAR/MBR/barramento C, rd e wr.
+    'reg' dá o nome de cada registrador (lista de estado ou variáveis locais).
+    """
+    s = signals
+    body = [f"{alu_target} = {_alu_expression(s, reg)}"]
+
+    if s.sh == 1:
+        result = "alu >> 1"
+    elif s.sh == 2:
+        result = f"(alu << 1) & {MASK_16BIT}"
+    else:
+        result = "alu"
+
+    targets = [reg(index) for index in bus_c_targets(s)]
+    if targets:
+        body.append(f"{' = '.join(targets)} = {result}")
+
+    if s.rd:
+        body.append(f"{reg(1)} = read({reg(0)})")
+    if s.wr:
+        body.append(f"write({reg(0)}, {reg(1)})")
+    return body
+
+def bus_c_targets(signals: ControlSignals) -> List[int]:
+    """Registradores que recebem a saída do deslocador (MAR/MBR dedicados + barramento C)."""
+    s = signals
+    targets = []
+    if s.mar or (s.enc and s.c == 0):
+        targets.append(0)
+    if s.mbr or (s.enc and s.c == 1):
+        targets.append(1)
+    if s.enc and s.c >= 2 and BUS_C_WRITABLE[s.c]:
+        targets.append(s.c)
+    return targets
+
+def written_registers(signals: ControlSignals) -> List[int]:
+    """Índices dos registradores alterados por uma microinstrução (incluindo a leitura em MBR)."""
+    written = bus_c_targets(signals)
+    if signals.rd and 1 not in written:
+        written.append(1)
+    return written
+
+def generate_source(word: int, name: str = "micro") -> str:
+    """Gera o código-fonte da fábrica especializada para uma palavra de 32 bits."""
+    s = decode_microinstruction(word)
+    body = emit_datapath(s, alu_target=f"r[{ALU_SLOT}] = alu")
+
+    if s.cond == 0:
+        body.append(f"return {s.addr}")
+    elif s.cond == 3:
+        body.append("return (r[5] >> 12) * 10 + 10")
+    elif s.cond == 1:
+        body.append(f"return {s.addr | 0x80} if alu & 0x8000 else {s.addr}")
+    else:
+        body.append(f"return {s.addr | 0x80} if alu == 0 else {s.addr}")
+
+    lines = [f"def {name}(read, write):", f"    def run(r):"]
+    lines += [f"        {line}" for line in body]
+    lines.append("    return run")
+    return "\n".join(lines) + "\n"
+
+def compile_microinstruction(word: int) -> MicroFactory:
+    """Compila (ou reaproveita do cache) a fábrica de uma microinstrução."""
+    factory = _factory_cache.get(word)
+    if factory is None:
+        name = f"micro_{word:08X}"
+        namespace: dict = {}
+        exec(compile(generate_source(word, name), f"<microcode {word:08X}>", "exec"), namespace)
+        factory = _factory_cache[word] = namespace[name]
+    return factory
+
+def control_store_key(store: List[int]) -> str:
+    """Hash estável do conteúdo da Memória de Controle."""
+    return hashlib.sha1(array('I', store).tobytes()).hexdigest()
+
+def compile_control_store(store: List[int]) -> List[MicroFactory]:
+    """Tabela de fábricas (uma por endereço), cacheada pelo hash do conteúdo."""
+    key = control_store_key(store)
+    table = _table_cache.get(key)
+    if table is None:
+        table = _table_cache[key] = [compile_microinstruction(word) for word in store]
+    return table
+
+class CompiledEngine:
+    """Motor de execução que despacha, a cada ciclo, a função compilada do MPC."""
+
+    def __init__(self, cpu: 'CPU'):
+        self.cpu = cpu
+        self._version = -1
+        self._memory = None
+        self._table: List[Callable[[List[int]], int]] = []
+        # Funções já ligadas à memória atual, por palavra
+        self._bound: Dict[int, Callable[[List[int]], int]] = {}
+
+    def table(self) -> List[Callable[[List[int]], int]]:
+        """Tabela de 256 funções ligadas à memória da CPU, refeita só quando algo muda."""
+        store = self.cpu.control_unit.control_store
+        memory = self.cpu.memory
+        if memory is not self._memory:
+            self._memory = memory
+            self._bound = {}
+            self._version = -1
+        if self._version != store.version:
+            factories = compile_control_store(store)
+            previous = self._bound
+            bound = {}  # Só as palavras da tabela atual (edições não acumulam funções)
+            table = []
+            for word, factory in zip(store, factories):
+                fn = bound.get(word) or previous.get(word)
+                if fn is None:
+                    fn = factory(memory.read, memory.write)
+                bound[word] = fn
+                table.append(fn)
+            self._bound = bound
+            self._table = table
+            self._version = store.version
+        return self._table
+
+    def run(self, max_cycles: int, until_pc: Optional[PCStop] = None, until_mpc: Optional[int] = None,
+            until: Optional[Callable[['CPU'], bool]] = None) -> int:
+        """Mesma interface e resultado de CPU.run() no modo micro."""
+        if max_cycles <= 0:
+            return 0
+
+        cpu = self.cpu
+        regs = cpu.registers
+        store = cpu.control_unit.control_store
+        table = self.table()
+
+        r = regs.file + [-1]
+        mpc = last = cpu.control_unit.MPC
+        stops = pc_stops(until_pc)
+        stop_mpc = -1 if until_mpc is None else until_mpc
+
+        base = cpu.cycles
+        cycles = 0
+        try:
+            while cycles < max_cycles:
+                last = mpc
+                mpc = table[mpc](r)
+                cycles += 1
+                if mpc == stop_mpc or (mpc == 0 and stops[r[2]]):
+                    break
+                if until is not None:
+                    cpu._writeback(r, mpc, store[last], r[ALU_SLOT], base + cycles)
+                    if until(cpu):
+                        break
+        finally:
+            cpu._writeback(r, mpc, store[last], r[ALU_SLOT], base + cycles)
+
+        return cycles
@@ -0,0 +1,110 @@
+"""
+Contadores de desempenho do hardware (como os PMCs de um processador real).
+Ligados a uma CPU (cpu.start_counters(counters)), contam durante CPU.run():
+
+- instruções MAC-1 completadas e microciclos gastos, por opcode;
+- hits/misses da cache separados em busca de instrução e dado;
+- leituras (palavras trazidas em blocos nos misses) e escritas na RAM;
+- desvios de microcódigo tomados/não tomados, por campo COND;
+- ciclos, instruções e CPI acumulados.
+
+Os contadores são arrays de tamanho fixo alocados uma vez; com eles ligados, run()
+usa o laço instrumentado da CPU (CPU._run_instrumented), que os incrementa (o resultado
+da execução é o mesmo em qualquer modo). Desligados, nada muda no caminho quente.
+Os ciclos de uma instrução (fetch incluído) são atribuídos ao seu opcode quando ela
+termina, isto é, quando o MPC volta a 0. Contagens de cache e RAM são por acesso ao
+MemoryManager (o firmware segura rd/wr por dois ciclos: cada ciclo é um acesso).
+
+Uso: cpu.start_counters(PerfCounters()); cpu.run(...); counters.get_stats() ou
+to_json(); reset_stats() recomeça a contagem (uma região de interesse).
+"""
+
+import json
+from array import array
+from typing import Optional, TYPE_CHECKING
+from src.assembler.isa import MAC1_INSTRUCTIONS
+from src.hardware.cpu.functional import NUM_KEYS
+from src.hardware.memory.access_log import fetch_microaddresses
+
+if TYPE_CHECKING:
+    from src.hardware.cpu.cpu import CPU
+
+def opcode_key(ir: int) -> int:
+    """Índice do opcode de uma instrução: 0-14 pelo nibble alto; o prefixo 1111 usa 15 + bits 11-9."""
+    key = ir >> 12
+    if key == 15:
+        key = 15 + ((ir >> 9) & 0x7)
+    return key
+
+# Mnemônico de cada índice de opcode_key()
+OPCODE_NAMES = [""] * NUM_KEYS
+for _name, (_base, _) in MAC1_INSTRUCTIONS.items():
+    OPCODE_NAMES[opcode_key(_base)] = _name
+
+# Nome de cada valor do campo COND da microinstrução
+COND_NAMES = ("always", "n", "z", "dispatch")
+
+# Índices dos arrays de cache
+DATA, FETCH = 0, 1
+
+def _counters(size: int) -> array:
+    return array('Q', [0]) * size
+
+class PerfCounters:
+    def __init__(self):
+        self.cpu: Optional['CPU'] = None
+        self.retired = _counters(NUM_KEYS)        # Instruções completadas por opcode
+        self.opcode_cycles = _counters(NUM_KEYS)  # Microciclos por opcode
+        self.branch_taken = _counters(4)          # Por COND (0 e 3 sempre "tomados")
+        self.branch_not_taken = _counters(4)
+        self.cache_hits = _counters(2)            # [dado, busca de instrução]
+        self.cache_misses = _counters(2)
+        self.ram = _counters(2)                   # [palavras lidas, palavras escritas]
+        self._fetch_version = -1
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Zera todos os contadores; a região medida começa agora."""
+        for counters in (self.retired, self.opcode_cycles, self.branch_taken, self.branch_not_taken,
+                         self.cache_hits, self.cache_misses, self.ram):
+            for i in range(len(counters)):
+                counters[i] = 0
+        self.cycles = 0
+        self._pending = 0  # Ciclos da instrução em curso (ainda sem opcode atribuído)
+
+    @property
+    def instructions(self) -> int:
+        return sum(self.retired)
+
+    def _fetch_kinds(self, store) -> bytearray:
+        """FETCH para as microinstruções do fetch, DATA para as demais."""
+        if store.version != self._fetch_version:
+            fetch = fetch_microaddresses(store.decoded)
+            self._kinds = bytearray(FETCH if mpc in fetch else DATA for mpc in range(len(store.decoded)))
+            self._fetch_version = store.version
+        return self._kinds
+
+    # --- Leitura ---
+
+    def get_stats(self) -> dict:
+        """Contadores da região medida (só opcodes executados), prontos para JSON."""
+        instructions = self.instructions
+        opcodes = {}
+        for key, name in enumerate(OPCODE_NAMES):
+            count, cycles = self.retired[key], self.opcode_cycles[key]
+            if count:
+                opcodes[name] = {"retired": count, "cycles": cycles, "cpi": cycles / count}
+        return {
+            "cycles": self.cycles,
+            "instructions": instructions,
+            "cpi": self.cycles / instructions if instructions else 0.0,
+            "opcodes": opcodes,
+            "branches": {name: {"taken": self.branch_taken[cond], "not_taken": self.branch_not_taken[cond]}
+                         for cond, name in enumerate(COND_NAMES)},
+            "cache": {name: {"hits": self.cache_hits[kind], "misses": self.cache_misses[kind]}
+                      for kind, name in ((FETCH, "fetch"), (DATA, "data"))},
+            "ram": {"reads": self.ram[0], "writes": self.ram[1]},
+        }
+
+    def to_json(self, indent: Optional[int] = None) -> str:
+        return json.dumps(self.get_stats(), indent=indent)
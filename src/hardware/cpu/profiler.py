@@ -0,0 +1,203 @@
+"""
+Profiler de programas MAC-1: pontos quentes por PC e grafo de chamadas.
+Ligado a uma CPU (cpu.start_profiler(profiler)), run() executa uma instrução MAC-1
+por vez (no laço do modo micro, qualquer que seja o modo) e atribui ao PC da
+instrução os microciclos e os misses de cache que ela causou. Os contadores são
+arrays de 4096 posições (o espaço de endereçamento do MAC-1), indexados pelo PC:
+perfilar 100M ciclos usa a mesma memória que perfilar mil.
+
+O grafo de chamadas é reconstruído com uma pilha sombra: um CALL empilha a função
+chamada (o PC de destino) junto com o SP logo após a chamada; depois de cada
+instrução, os quadros cujo SP ficou abaixo do SP atual são desempilhados (RETN, mas
+também um INSP/POP que descarte o endereço de retorno). Os ciclos de cada instrução
+também vão para a pilha de funções em curso, no formato "folded" dos flame graphs
+(uma linha "main;F;G ciclos" por pilha distinta).
+
+Nomes vêm do montador: load_symbols(codegen.symbol_table, linhas) dá rótulos às
+funções e a cada PC (ex.: LOOP+2) e a linha do código-fonte de cada instrução.
+
+Com o profiler ligado, until_pc e until(cpu) são avaliados nos limites de instrução;
+until_mpc diferente de 0 é verificado a cada ciclo (mais lento).
+"""
+
+from array import array
+from typing import Callable, Dict, IO, List, Optional, Tuple, TYPE_CHECKING
+from src.common.constants import AMASK
+from src.hardware.cpu.registers import PCStop, pc_stops
+
+if TYPE_CHECKING:
+    from src.assembler.parser import ParsedLine
+    from src.hardware.cpu.cpu import CPU
+
+ADDRESS_SPACE = AMASK + 1  # PCs de 12 bits
+
+# Colunas de flat_profile()
+COLUMNS = ("pc", "location", "line", "executions", "cycles", "percent", "misses")
+
+class Profiler:
+    def __init__(self, root: str = "main"):
+        """:param root: nome da função de topo (o código fora de qualquer CALL)."""
+        self.root = root
+        self.cpu: Optional['CPU'] = None
+        self.labels: Dict[int, str] = {}  # Endereço -> rótulo
+        self.lines: Dict[int, int] = {}   # PC -> linha do código-fonte
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Zera os contadores e a pilha sombra (a região medida começa agora)."""
+        self.executions = array('Q', [0]) * ADDRESS_SPACE
+        self.cycles = array('Q', [0]) * ADDRESS_SPACE
+        self.misses = array('Q', [0]) * ADDRESS_SPACE
+        self.total_cycles = 0                     # Inclui instruções pegas pela metade
+        self.stacks: Dict[Tuple[int, ...], int] = {}  # Pilha de funções -> ciclos
+        self.calls: Dict[Tuple[int, int], int] = {}   # (função chamadora, chamada) -> CALLs
+        self._frames: List[Tuple[int, int]] = []  # (função, SP após o CALL)
+        self._stack: Tuple[int, ...] = ()
+
+    def load_symbols(self, symbol_table: Dict[str, int], lines: Optional[List['ParsedLine']] = None):
+        """
+        Rótulos de CodeGenerator.symbol_table e, opcionalmente, as linhas do
+        AssemblyParser que o geraram (a n-ésima instrução está no endereço n).
+        """
+        self.labels = {}
+        for label, address in symbol_table.items():
+            self.labels.setdefault(address, label)
+        if lines is not None:
+            instructions = [line for line in lines if line.mnemonic]
+            self.lines = {pc: line.line_num for pc, line in enumerate(instructions)}
+
+    # --- Execução perfilada ---
+
+    def run(self, max_cycles: int, until_pc: Optional[PCStop] = None, until_mpc: Optional[int] = None,
+            until: Optional[Callable[['CPU'], bool]] = None) -> int:
+        """CPU.run() da CPU associada, uma instrução por vez (ver o cabeçalho do módulo)."""
+        cpu = self.cpu
+        control = cpu.control_unit
+        regs = cpu.registers
+        cache = cpu.memory.cache
+        stops = pc_stops(until_pc)
+        # Parando a cada instrução, os motores rápidos perdem a vantagem: o laço do
+        # modo micro é o mais rápido (salvo com instrumentação, que run() já escolhe)
+        breakpoints = cpu.breakpoints
+        if breakpoints is not None and not breakpoints.armed:
+            breakpoints = None
+        if cpu.counters is None and cpu.coverage is None and breakpoints is None and not cpu.memory.instrumented:
+            run = cpu._run_micro
+        else:
+            run = cpu._run_mode
+        if until_mpc in (None, 0):
+            step_mpc, boundary = 0, None
+        else:
+            step_mpc, boundary = None, lambda c: c.control_unit.MPC in (0, until_mpc)
+
+        executions, cycles_at, misses_at = self.executions, self.cycles, self.misses
+        stacks, calls, frames = self.stacks, self.calls, self._frames
+        cycles = 0
+        try:
+            while cycles < max_cycles:
+                if control.MPC != 0:
+                    # Instrução pela metade (início da região ou parada no meio): só o total
+                    cycles += run(max_cycles - cycles, None, step_mpc, boundary)
+                    if control.MPC != 0:
+                        break
+                    continue
+
+                pc = regs.PC & AMASK
+                before = cache.misses
+                spent = run(max_cycles - cycles, None, step_mpc, boundary)
+                cycles += spent
+                executions[pc] += 1
+                cycles_at[pc] += spent
+                misses_at[pc] += cache.misses - before
+                stacks[self._stack] = stacks.get(self._stack, 0) + spent
+                if control.MPC != 0:
+                    break  # Orçamento ou until_mpc no meio da instrução
+
+                # Pilha sombra
+                sp = regs.SP
+                ir = regs.IR
+                if ir >> 12 == 0xE:
+                    caller = self._stack[-1] if self._stack else -1
+                    callee = regs.PC & AMASK
+                    calls[caller, callee] = calls.get((caller, callee), 0) + 1
+                    frames.append((callee, sp))
+                    self._stack += (callee,)
+                elif frames and sp > frames[-1][1]:
+                    while frames and sp > frames[-1][1]:
+                        frames.pop()
+                    self._stack = self._stack[:len(frames)]
+
+                if until_mpc == 0 or stops[regs.PC] or (until is not None and until(cpu)):
+                    break
+                if breakpoints is not None and breakpoints.hit is not None:
+                    break
+        finally:
+            self.total_cycles += cycles
+        return cycles
+
+    # --- Relatórios ---
+
+    def name(self, function: int) -> str:
+        """Nome de uma função (PC de entrada; -1 é a raiz)."""
+        if function < 0:
+            return self.root
+        return self.labels.get(function, f"0x{function:03X}")
+
+    def location(self, pc: int) -> str:
+        """PC como rótulo + deslocamento (ex.: LOOP+2), ou em hexadecimal sem rótulo anterior."""
+        best = None
+        for address, label in self.labels.items():
+            if address <= pc and (best is None or address > best[0]):
+                best = (address, label)
+        if best is None:
+            return f"0x{pc:03X}"
+        return best[1] if best[0] == pc else f"{best[1]}+{pc - best[0]}"
+
+    def flat_profile(self, top: Optional[int] = None) -> List[dict]:
+        """PCs executados, do que mais gastou ciclos ao que menos (colunas de COLUMNS)."""
+        total = sum(self.cycles)
+        pcs = sorted((pc for pc in range(ADDRESS_SPACE) if self.executions[pc]),
+                     key=lambda pc: (-self.cycles[pc], pc))
+        rows = []
+        for pc in pcs[:top]:
+            rows.append(dict(zip(COLUMNS, (pc, self.location(pc), self.lines.get(pc), self.executions[pc],
+                                           self.cycles[pc], 100.0 * self.cycles[pc] / total if total else 0.0,
+                                           self.misses[pc]))))
+        return rows
+
+    def functions(self) -> Dict[str, dict]:
+        """Ciclos próprios e inclusivos por função (de stacks) e quantas vezes foi chamada."""
+        result: Dict[str, dict] = {}
+        def entry(function):
+            return result.setdefault(self.name(function), {"self": 0, "inclusive": 0, "calls": 0})
+        for stack, cycles in self.stacks.items():
+            path = (-1,) + stack
+            entry(path[-1])["self"] += cycles
+            for function in set(path):
+                entry(function)["inclusive"] += cycles
+        for (_, callee), count in self.calls.items():
+            entry(callee)["calls"] += count
+        return result
+
+    def call_graph(self) -> Dict[Tuple[str, str], int]:
+        """Arestas (chamadora, chamada) -> número de CALLs."""
+        graph: Dict[Tuple[str, str], int] = {}
+        for (caller, callee), count in self.calls.items():
+            key = (self.name(caller), self.name(callee))
+            graph[key] = graph.get(key, 0) + count
+        return graph
+
+    def write_flat(self, file: IO[str], top: Optional[int] = None):
+        """Perfil plano em texto, uma linha por PC."""
+        file.write(f"{'PC':>5}  {'Local':<16} {'Linha':>5} {'Execuções':>10} {'Ciclos':>12} {'%':>6} {'Misses':>8}\n")
+        for row in self.flat_profile(top):
+            line = "" if row["line"] is None else row["line"]
+            file.write(f"{row['pc']:>5}  {row['location']:<16} {line:>5} {row['executions']:>10} "
+                       f"{row['cycles']:>12} {row['percent']:>6.2f} {row['misses']:>8}\n")
+
+    def write_folded(self, file: IO[str]):
+        """Pilhas no formato "folded" (flamegraph.pl, speedscope, inferno): "main;F;G ciclos"."""
+        for stack, cycles in sorted(self.stacks.items()):
+            if cycles:
+                names = [self.root] + [self.name(function) for function in stack]
+                file.write(f"{';'.join(names)} {cycles}\n")
@@ -1,25 +1,93 @@
 """
 Implementação do Banco de Registradores do MIC-1.
 Simula o comportamento de registradores de 16 bits com truncamento automático (overflow).
+
+Os valores ficam numa lista fixa ('file') indexada pelo número do registrador nos
+barramentos A, B e C, para que o datapath nunca precise resolver nomes:
+0=MAR, 1=MBR, 2=PC, 3=SP, 4=AC, 5=IR, 6=TIR, 7-11 constantes (0, +1, -1, AMASK, SMASK),
+12-15 rascunho A-D. Os rascunhos E e F (desenhados no DatapathView) ficam nas
+posições 16 e 17: o campo de 4 bits dos barramentos não os alcança.
 """
 
-from src.common.constants import MASK_16BIT
+from typing import Collection, Optional, Union
+from src.common.constants import MASK_16BIT, AMASK, SMASK
+from src.common.utils import LRUCache
+from src.hardware.snapshot import SnapshotError, pack_snapshot, pack_words, unpack_snapshot, unpack_words
+
+# Posições de cada registrador nomeado na lista 'file'
+REGISTER_INDEX = {
+    "MAR": 0, "MBR": 1, "PC": 2, "SP": 3, "AC": 4, "IR": 5, "TIR": 6,
+    "A": 12, "B": 13, "C": 14, "D": 15, "E": 16, "F": 17,
+}
+
+# Constantes pré-carregadas (somente leitura), pelo número no barramento
+BUS_CONSTANTS = {7: 0, 8: 1, 9: MASK_16BIT, 10: AMASK, 11: SMASK}
+
+BUS_SIZE = 16        # Registradores endereçáveis pelos campos A, B e C
+REGISTER_COUNT = 18  # Tamanho de 'file' (barramento + E, F)
+
+# Se o barramento C pode escrever em cada índice (as constantes não)
+BUS_C_WRITABLE = tuple(index not in BUS_CONSTANTS for index in range(BUS_SIZE))
+
+# until_pc de CPU.run(): um PC ou um conjunto de PCs
+PCStop = Union[int, Collection[int]]
+
+_NO_STOPS = bytes(1 << 16)
+_stop_tables = LRUCache(32)
+
+def pc_stops(until_pc: Optional[PCStop]) -> bytes:
+    """
+    Tabela de parada indexada pelo PC (64K posições, 1 nos PCs de until_pc): os laços
+    de execução testam stops[PC] com o mesmo custo para um PC ou para um conjunto.
+    """
+    if until_pc is None:
+        return _NO_STOPS
+    key = frozenset((until_pc,)) if isinstance(until_pc, int) else frozenset(until_pc)
+    table = _stop_tables.get(key)
+    if table is None:
+        stops = bytearray(1 << 16)
+        for pc in key:
+            if 0 <= pc <= MASK_16BIT:
+                stops[pc] = 1
+        table = _stop_tables[key] = bytes(stops)
+    return table
+
+def _register_property(index: int) -> property:
+    """Atributo nomeado (ex.: registers.AC) como visão de uma posição de 'file'."""
+    def getter(self) -> int:
+        return self.file[index]
+
+    def setter(self, value: int):
+        self.file[index] = value
+
+    return property(getter, setter)
 
 class Registers:
+    # Registradores visíveis ao programador (MAC-1)
+    PC = _register_property(2)   # Program Counter (12 bits efetivos, mas armazenado em 16) [cite: 2327]
+    AC = _register_property(4)   # Accumulator [cite: 2328]
+    SP = _register_property(3)   # Stack Pointer [cite: 2302]
+
+    # Registradores internos da Microarquitetura
+    IR = _register_property(5)   # Instruction Register (guarda a instrução sendo executada) [cite: 2331]
+    TIR = _register_property(6)  # Temp Instruction Register (usado na decodificação) [cite: 2332]
+    MAR = _register_property(0)  # Memory Address Register [cite: 2339]
+    MBR = _register_property(1)  # Memory Buffer Register [cite: 2343]
+
+    # Registradores de rascunho
+    A = _register_property(12)
+    B = _register_property(13)
+    C = _register_property(14)
+    D = _register_property(15)
+    E = _register_property(16)
+    F = _register_property(17)
+
     def __init__(self):
-        # Inicializa todos os registradores com 0.
-        # Fonte: Diagrama "Via de Dados - MIC-1" 
-        
-        # Registradores visíveis ao programador (MAC-1)
-        self.PC = 0   # Program Counter (12 bits efetivos, mas armazenado em 16) [cite: 2327]
-        self.AC = 0   # Accumulator [cite: 2328]
-        self.SP = 0   # Stack Pointer [cite: 2302]
-        
-        # Registradores internos da Microarquitetura
-        self.IR = 0   # Instruction Register (guarda a instrução sendo executada) [cite: 2331]
-        self.TIR = 0  # Temp Instruction Register (usado na decodificação) [cite: 2332]
-        self.MAR = 0  # Memory Address Register [cite: 2339]
-        self.MBR = 0  # Memory Buffer Register [cite: 2343]
+        # Inicializa todos os registradores com 0 e as constantes do barramento.
+        # Fonte: Diagrama "Via de Dados - MIC-1"
+        self.file = [0] * REGISTER_COUNT
+        for index, value in BUS_CONSTANTS.items():
+            self.file[index] = value
 
     def _clamp(self, value: int) -> int:
         """
@@ -29,29 +97,31 @@ class Registers:
         return value & MASK_16BIT
 
     # Métodos de acesso seguro (Getters/Setters) para garantir o clamp
-    
+
     def read(self, register_name: str) -> int:
         """Lê o valor de um registrador pelo nome (string)."""
-        if hasattr(self, register_name):
-            return getattr(self, register_name)
+        if register_name in REGISTER_INDEX:
+            return self.file[REGISTER_INDEX[register_name]]
         raise ValueError(f"Registrador {register_name} não existe na arquitetura MIC-1.")
 
     def write(self, register_name: str, value: int):
         """Escreve um valor num registrador, aplicando a máscara de 16 bits."""
-        if hasattr(self, register_name):
-            clamped_value = self._clamp(value)
-            setattr(self, register_name, clamped_value)
+        if register_name in REGISTER_INDEX:
+            self.file[REGISTER_INDEX[register_name]] = self._clamp(value)
         else:
             raise ValueError(f"Registrador {register_name} não existe na arquitetura MIC-1.")
 
     def debug_state(self) -> dict:
         """Retorna um dicionário com o estado atual para visualização/debug."""
-        return {
-            "PC": self.PC,
-            "AC": self.AC,
-            "SP": self.SP,
-            "IR": self.IR,
-            "TIR": self.TIR,
-            "MAR": self.MAR,
-            "MBR": self.MBR
-        }
\ No newline at end of file
+        return {name: self.file[index] for name, index in REGISTER_INDEX.items()}
+
+    def snapshot(self) -> bytes:
+        """Banco de registradores ('file' inteiro) num buffer de 16 bits."""
+        return pack_snapshot(b"REGS", pack_words(self.file))
+
+    def restore(self, data: bytes):
+        (buffer,) = unpack_snapshot(data, b"REGS")
+        values = unpack_words(buffer)
+        if len(values) != REGISTER_COUNT:
+            raise SnapshotError("Snapshot de registradores com tamanho inconsistente.")
+        self.file[:] = values
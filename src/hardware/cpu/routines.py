@@ -0,0 +1,295 @@
+"""
+Compilador de Microrrotinas do MIC-1 (modo "routine").
+Segue estaticamente o microprograma carregado e funde cada instrução MAC-1 inteira
+numa única função Python: o fetch (do endereço 0 até a microinstrução de decodificação)
+seguido, para cada opcode, da microrrotina que começa em opcode * 10 + 10 e termina
+no 'goto 0'. Onde a rotina desvia por N/Z, o código gerado ganha um 'if' com os dois
+caminhos. Não há semântica da ISA escrita à mão: o firmware é a única fonte de verdade.
+
+Cada microinstrução é emitida pelo mesmo gerador do modo "compiled" (emit_datapath),
+só que sobre variáveis locais em vez da lista de estado, então as leituras/escritas no
+MemoryManager saem exatamente na ordem do modo microarquitetural. Cada folha devolve
+uma tupla constante (microciclos, último endereço executado, retomada).
+
+Rotinas que não podem ser seguidas estaticamente (laço no microcódigo, nova decodificação,
+caminho longo demais) viram uma folha de "retomada": o handler para logo após o fetch e
+devolve o endereço de entrada da rotina, que o motor executa no modo "compiled".
+Se nem o fetch puder ser seguido, o motor inteiro delega ao modo "compiled".
+"""
+
+import re
+from typing import Callable, Dict, List, Optional, Set, Tuple, TYPE_CHECKING
+from src.common.utils import LRUCache
+from src.hardware.cpu.control import ControlSignals
+from src.hardware.cpu.microcompiler import (ALU_SLOT, MAX_CACHED_STORES, bus_c_targets,
+                                            control_store_key, emit_datapath, written_registers)
+from src.hardware.cpu.registers import REGISTER_COUNT, PCStop, pc_stops
+
+if TYPE_CHECKING:
+    from src.hardware.cpu.cpu import CPU
+
+# Nomes das variáveis locais dos registradores, pelo índice no barramento
+# (as constantes 7-11 viram literais e não têm variável)
+REGISTER_NAMES = ("MAR", "MBR", "PC", "SP", "AC", "IR", "TIR",
+                  None, None, None, None, None, "A", "B", "C", "D")
+
+def load_registers(source: str) -> List[str]:
+    """Linhas que carregam as variáveis locais; A-D só se o código gerado as usa."""
+    lines = [f"{', '.join(REGISTER_NAMES[:7])} = r[:7]"]
+    if re.search(r"\b[ABCD]\b", source):
+        lines.append(f"{', '.join(REGISTER_NAMES[12:])} = r[12:16]")
+    return lines
+
+# Limites da análise estática (por caminho e por rotina)
+MAX_PATH_CYCLES = 64
+MAX_ROUTINE_CYCLES = 512
+
+# Fábrica: recebe (read, write) da memória e devolve o handler de uma instrução
+RoutineFactory = Callable[[Callable, Callable], Callable[[List[int]], Tuple[int, int, int]]]
+
+# Por hash da Memória de Controle: (fábrica, maior custo em microciclos) ou None;
+# LRU com os mesmos limites das tabelas do microcompilador
+_program_cache: Dict[str, Optional[Tuple[RoutineFactory, int]]] = LRUCache(MAX_CACHED_STORES)
+
+class _Unsupported(Exception):
+    """O caminho não pode ser seguido estaticamente."""
+
+def _local(index: int) -> str:
+    return REGISTER_NAMES[index]
+
+class _RoutineBuilder:
+    """Gera o código-fonte do handler de instrução a partir da tabela decodificada."""
+
+    def __init__(self, decoded: List[ControlSignals]):
+        self.decoded = decoded
+        self.lines: List[str] = []
+        self.max_cost = 0
+        self.budget = 0  # Microinstruções que ainda podem ser emitidas na rotina atual
+
+    def build(self, name: str) -> str:
+        self.budget = MAX_ROUTINE_CYCLES
+        self._path(0, 0, frozenset(), frozenset(), 2, decoding=True)
+        header = [f"def {name}(read, write):", "    def instruction(r):"]
+        header += ["        " + line for line in load_registers("\n".join(self.lines))]
+        return "\n".join(header + self.lines + ["    return instruction"]) + "\n"
+
+    def _emit(self, indent: int, line: str):
+        self.lines.append("    " * indent + line)
+
+    def _leaf(self, indent: int, cycles: int, last: int, written: Set[int], resume: int = 0):
+        """Fim de um caminho: devolve à lista de estado o que mudou e o custo do caminho."""
+        for index in sorted(written):
+            self._emit(indent, f"r[{index}] = {REGISTER_NAMES[index]}")
+        self._emit(indent, f"r[{ALU_SLOT}] = alu")
+        self._emit(indent, f"return ({cycles}, {last}, {resume})")
+        self.max_cost = max(self.max_cost, cycles)
+
+    def _path(self, mpc: int, cycles: int, visited: frozenset, written: frozenset,
+              indent: int, decoding: bool):
+        """
+        Emite o caminho que começa em 'mpc'. 'decoding' indica que ainda estamos no
+        fetch (a microinstrução com cond=3 leva à árvore de opcodes).
+        """
+        while True:
+            if mpc in visited or cycles >= MAX_PATH_CYCLES or self.budget <= 0:
+                raise _Unsupported()
+            self.budget -= 1
+            visited = visited | {mpc}
+            s = self.decoded[mpc]
+            lines = emit_datapath(s, _local)
+            if s.cond == 0 and s.addr != 0 and not bus_c_targets(s):
+                # Saída da ULA descartada: a próxima microinstrução a sobrescreve
+                lines = lines[1:]
+            for line in lines:
+                self._emit(indent, line)
+            written = written | set(written_registers(s))
+            cycles += 1
+
+            if s.cond == 3:
+                if not decoding:
+                    raise _Unsupported()
+                self._dispatch(cycles, mpc, written, indent)
+                return
+
+            taken = s.addr | 0x80
+            if s.cond == 0 or taken == s.addr:
+                if s.addr == 0:
+                    self._leaf(indent, cycles, mpc, written)
+                    return
+                mpc = s.addr
+                continue
+
+            self._emit(indent, "if alu & 0x8000:" if s.cond == 1 else "if alu == 0:")
+            self._branch(taken, cycles, mpc, visited, written, indent + 1, decoding)
+            self._emit(indent, "else:")
+            self._branch(s.addr, cycles, mpc, visited, written, indent + 1, decoding)
+            return
+
+    def _branch(self, target: int, cycles: int, last: int, visited: frozenset,
+                written: frozenset, indent: int, decoding: bool):
+        if target == 0:
+            self._leaf(indent, cycles, last, written)
+        else:
+            self._path(target, cycles, visited, written, indent, decoding)
+
+    def _dispatch(self, cycles: int, last: int, written: frozenset, indent: int):
+        """Árvore binária sobre o opcode, com a rotina de cada um nas folhas."""
+        self._emit(indent, "op = (IR >> 12) & 0xF")
+        self._opcodes(0, 16, cycles, last, written, indent)
+
+    def _opcodes(self, low: int, high: int, cycles: int, last: int, written: frozenset, indent: int):
+        if high - low > 1:
+            middle = (low + high) // 2
+            self._emit(indent, f"if op < {middle}:")
+            self._opcodes(low, middle, cycles, last, written, indent + 1)
+            self._emit(indent, "else:")
+            self._opcodes(middle, high, cycles, last, written, indent + 1)
+            return
+
+        entry = low * 10 + 10
+        mark = len(self.lines)
+        saved_budget, saved_cost = self.budget, self.max_cost
+        self.budget = MAX_ROUTINE_CYCLES
+        try:
+            self._path(entry, cycles, frozenset(), written, indent, decoding=False)
+        except _Unsupported:
+            # Rotina executada microinstrução a microinstrução a partir da entrada
+            del self.lines[mark:]
+            self.max_cost = saved_cost
+            self._leaf(indent, cycles, last, written, resume=entry)
+        self.budget = saved_budget
+
+def compile_routines(decoded: List[ControlSignals], key: str) -> Optional[Tuple[RoutineFactory, int]]:
+    """
+    Fábrica do handler de instrução e o maior custo (microciclos) de uma instrução,
+    cacheados pelo hash da Memória de Controle. None se o fetch não pode ser seguido.
+    """
+    if key in _program_cache:
+        return _program_cache[key]
+    builder = _RoutineBuilder(decoded)
+    name = "routines"
+    try:
+        source = builder.build(name)
+    except _Unsupported:
+        result = None
+    else:
+        namespace: dict = {}
+        exec(compile(source, f"<routines {key[:12]}>", "exec"), namespace)
+        result = (namespace[name], builder.max_cost)
+    _program_cache[key] = result
+    return result
+
+class RoutineEngine:
+    """Motor de execução que despacha uma instrução MAC-1 inteira por chamada."""
+
+    def __init__(self, cpu: 'CPU'):
+        self.cpu = cpu
+        self._version = -1
+        self._memory = None
+        self._instruction: Optional[Callable[[List[int]], Tuple[int, int, int]]] = None
+        self.max_cost = 0
+        self.instructions = 0  # Instruções MAC-1 despachadas neste modo
+        self.resumes = 0       # Rotinas executadas no modo "compiled" por não serem compiláveis
+
+    def program(self) -> Optional[Callable[[List[int]], Tuple[int, int, int]]]:
+        """Handler ligado à memória da CPU (None se o fetch não é compilável)."""
+        store = self.cpu.control_unit.control_store
+        memory = self.cpu.memory
+        if memory is not self._memory or self._version != store.version:
+            compiled = compile_routines(store.decoded, control_store_key(store))
+            if compiled is None:
+                self._instruction, self.max_cost = None, 0
+            else:
+                factory, self.max_cost = compiled
+                self._instruction = factory(memory.read, memory.write)
+            self._memory = memory
+            self._version = store.version
+        return self._instruction
+
+    def run(self, max_cycles: int, until_pc: Optional[PCStop] = None, until_mpc: Optional[int] = None,
+            until: Optional[Callable[['CPU'], bool]] = None) -> int:
+        """
+        Executa instruções inteiras até consumir 'max_cycles' microciclos.
+        until_pc e until(cpu) são avaliados nos limites de instrução; until_mpc, um
+        fetch não compilável ou um MPC no meio de uma instrução fazem o trabalho
+        (ou parte dele) ser feito pelo modo "compiled". Retorna os microciclos executados.
+        """
+        if max_cycles <= 0:
+            return 0
+        cpu = self.cpu
+        fallback = cpu.engine("compiled")
+        if until_mpc is not None or self.program() is None:
+            return fallback.run(max_cycles, until_pc, until_mpc, until)
+
+        cycles = 0
+        if cpu.control_unit.MPC != 0:
+            # Termina a instrução em andamento
+            cycles = fallback.run(max_cycles, None, 0, None)
+            if cpu.control_unit.MPC != 0:
+                return cycles
+            if pc_stops(until_pc)[cpu.registers.PC]:
+                return cycles
+            if until is not None and until(cpu):
+                return cycles
+
+        executed, stopped = self._run_instructions(max_cycles - cycles, until_pc, until)
+        cycles += executed
+        if cycles < max_cycles and not stopped:
+            # Sobra de orçamento menor que a instrução mais longa
+            cycles += fallback.run(max_cycles - cycles, until_pc, None, until)
+        return cycles
+
+    def _run_instructions(self, budget: int, until_pc: Optional[PCStop],
+                          until: Optional[Callable[['CPU'], bool]]) -> Tuple[int, bool]:
+        """Laço de instruções inteiras. Retorna (microciclos, parou por condição)."""
+        cpu = self.cpu
+        regs = cpu.registers
+        store = cpu.control_unit.control_store
+        instruction = self._instruction
+        fallback = cpu.engine("compiled")
+
+        r = regs.file + [-1]
+        stops = pc_stops(until_pc)
+        limit = budget - self.max_cost
+        stopped = False
+
+        mpc = cpu.control_unit.MPC
+        mir = cpu.control_unit.MIR
+        alu_out = -1
+        base = cpu.cycles
+        cycles = 0
+        executed = 0
+        try:
+            while cycles <= limit:
+                n, last, resume = instruction(r)
+                cycles += n
+                executed += 1
+                mir = store[last]
+                alu_out = r[ALU_SLOT]
+
+                if resume:
+                    # Rotina não compilável: continua microinstrução a microinstrução
+                    self.resumes += 1
+                    cpu._writeback(r, resume, mir, alu_out, base + cycles)
+                    cycles += fallback.run(budget - cycles, None, 0, None)
+                    r[:REGISTER_COUNT] = regs.file
+                    mpc = cpu.control_unit.MPC
+                    mir = cpu.control_unit.MIR
+                    alu_out = -1  # Flags já atualizadas pelo modo "compiled"
+                    if mpc != 0:
+                        break  # Orçamento esgotado no meio da rotina
+                mpc = 0
+
+                if stops[r[2]]:
+                    stopped = True
+                    break
+                if until is not None:
+                    cpu._writeback(r, 0, mir, alu_out, base + cycles)
+                    if until(cpu):
+                        stopped = True
+                        break
+        finally:
+            self.instructions += executed
+            cpu._writeback(r, mpc, mir, alu_out, base + cycles)
+
+        return cycles, stopped
@@ -3,26 +3,25 @@ Deslocador (Shifter) do MIC-1.
 Processa o resultado da ULA antes de ser escrito no barramento C.
 """
 
-from src.common.constants import ShifterOp, MASK_16BIT
+from src.common.constants import MASK_16BIT
+
+# Operações indexadas pelo código do deslocador (ShifterOp)
+_SHIFTS = (
+    lambda value: value & MASK_16BIT,
+    # Deslocamento à Direita: o MIC-1 padrão costuma usar lógico aqui (>>>),
+    # o que simplifica operações de bits comuns.
+    lambda value: (value & MASK_16BIT) >> 1,
+    # Deslocamento à Esquerda (Multiplicação por 2): o bit 15 é perdido, entra 0 no bit 0.
+    lambda value: (value << 1) & MASK_16BIT,
+    # O quarto estado (3) é indefinido nos documentos: sem deslocamento.
+    lambda value: value & MASK_16BIT,
+)
 
 class Shifter:
     def shift(self, op: int, value: int) -> int:
         """
         Aplica o deslocamento de bits conforme o sinal de controle.
         """
-        result = value & MASK_16BIT
-
-        if op == ShifterOp.NO_SHIFT.value:
-            return result
-        
-        elif op == ShifterOp.RIGHT.value:
-            # Deslocamento Aritmético à Direita (Mantém sinal? O MIC-1 padrão costuma usar lógico aqui, 
-            # mas vamos assumir lógico (>>>) para simplificar operações de bits comuns).
-            return (result >> 1) & MASK_16BIT
-            
-        elif op == ShifterOp.LEFT.value:
-            # Deslocamento à Esquerda (Multiplicação por 2)
-            # O bit 15 é perdido, entra 0 no bit 0.
-            return (result << 1) & MASK_16BIT
-        
-        return result
\ No newline at end of file
+        if 0 <= op < 4:
+            return _SHIFTS[op](value)
+        return value & MASK_16BIT
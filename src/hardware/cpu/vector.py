@@ -0,0 +1,215 @@
+"""
+Simulação vetorizada (NumPy) de muitas máquinas MIC-1 independentes.
+Registradores, MPC, memória e cache de N máquinas ficam em arrays — por exemplo,
+'memory' é uint16[N, ram_size] — e todas executam a mesma Memória de Controle em
+passo travado (lockstep): a cada ciclo, cada máquina busca os sinais do seu próprio
+MPC, então microdesvios divergentes são só máscaras sobre os mesmos arrays.
+
+O resultado por máquina é o de CPU.step() com MemoryManager(MainMemory, DirectCache):
+registradores, flags, MPC/MIR, ciclos, memória e estatísticas da cache (mesma
+decodificação de endereço de DirectCache). Uma escrita fora da RAM, que em CPU.step()
+levanta ValueError, aqui marca a máquina como 'faulted' (e parada) sem concluir o ciclo.
+
+Requer NumPy (dependência opcional, usada só por este módulo).
+"""
+
+from typing import List, Optional, Sequence
+import numpy as np
+from src.hardware.cpu.control import ControlStore
+from src.hardware.cpu.firmware import CONTROL_STORE
+from src.hardware.memory.cache import address_bits
+from src.hardware.cpu.registers import (BUS_CONSTANTS, BUS_C_WRITABLE, REGISTER_COUNT,
+                                        REGISTER_INDEX)
+
+# Colunas da tabela de sinais (uma linha por endereço da Memória de Controle)
+_FIELDS = ("amux", "cond", "alu", "sh", "mbr", "mar", "rd", "wr", "enc", "c", "b", "a", "addr")
+
+class VectorCPU:
+    def __init__(self, count: int, ram_size: int = 4096, control_store: Optional[List[int]] = None,
+                 cache_lines: int = 16, block_size: int = 4):
+        self.count = count
+        self.ram_size = ram_size
+        self.cache_lines = cache_lines
+        self.block_size = block_size
+        self._offset_bits = address_bits(block_size, "block_size")
+        self._tag_shift = self._offset_bits + address_bits(cache_lines, "cache_lines")
+
+        self.store = ControlStore()
+        microprogram = CONTROL_STORE if control_store is None else control_store
+        self.store[:len(microprogram)] = microprogram
+        self._table = np.array([[getattr(s, f) for f in _FIELDS] for s in self.store.decoded],
+                               dtype=np.int64)
+        self._writable = np.array(BUS_C_WRITABLE, dtype=bool)
+
+        # Banco de registradores: uma linha por índice do barramento, uma coluna por máquina
+        self.registers = np.zeros((REGISTER_COUNT, count), dtype=np.uint16)
+        for index, value in BUS_CONSTANTS.items():
+            self.registers[index] = value
+        self.memory = np.zeros((count, ram_size), dtype=np.uint16)
+
+        self.mpc = np.zeros(count, dtype=np.int64)
+        self.mir_address = np.full(count, -1, dtype=np.int64)  # Endereço da última microinstrução
+        self.alu_out = np.full(count, -1, dtype=np.int64)      # -1: ULA ainda não usada (N=Z=False)
+        self.cycles = np.zeros(count, dtype=np.int64)
+
+        # Cache de mapeamento direto, por máquina (os dados são sempre iguais aos da RAM:
+        # write-through + write-update), então bastam validade e tag
+        self.cache_valid = np.zeros((count, cache_lines), dtype=bool)
+        self.cache_tag = np.zeros((count, cache_lines), dtype=np.int64)
+        self.hits = np.zeros(count, dtype=np.int64)
+        self.misses = np.zeros(count, dtype=np.int64)
+
+        self.halted = np.zeros(count, dtype=bool)
+        self.faulted = np.zeros(count, dtype=bool)
+        self._active = np.arange(count)
+
+    # --- Carga de estado ---
+
+    def load_program(self, program: Sequence[int], start_address: int = 0):
+        """Carrega o mesmo binário em todas as máquinas."""
+        if start_address + len(program) > self.ram_size:
+            raise ValueError("Programa excede o tamanho da memória.")
+        self.memory[:, start_address:start_address + len(program)] = np.asarray(program, dtype=np.uint16)
+
+    def load_memory(self, images, start_address: int = 0):
+        """Carrega uma imagem por máquina (array/lista [N, tamanho])."""
+        images = np.asarray(images, dtype=np.uint16)
+        if images.shape[0] != self.count or start_address + images.shape[1] > self.ram_size:
+            raise ValueError("Imagens incompatíveis com o número de máquinas ou o tamanho da memória.")
+        self.memory[:, start_address:start_address + images.shape[1]] = images
+
+    def set_register(self, name: str, values):
+        """Define um registrador nomeado (ex.: 'SP') em todas as máquinas (escalar ou array [N])."""
+        if name not in REGISTER_INDEX:
+            raise ValueError(f"Registrador {name} não existe na arquitetura MIC-1.")
+        self.registers[REGISTER_INDEX[name]] = np.asarray(values) & 0xFFFF
+
+    def register(self, name: str) -> np.ndarray:
+        return self.registers[REGISTER_INDEX[name]]
+
+    # --- Execução ---
+
+    def run(self, max_cycles: int, until_pc: Optional[int] = None) -> int:
+        """
+        Executa até 'max_cycles' ciclos em passo travado. Uma máquina para (halted) quando
+        volta ao fetch (MPC=0) com PC == until_pc, ou numa escrita fora da RAM.
+        Retorna o número de ciclos do laço (o de cada máquina está em 'cycles').
+        """
+        self._refresh_active()
+        executed = 0
+        while executed < max_cycles and len(self._active):
+            if self._cycle(self._active, until_pc):
+                self._refresh_active()
+            executed += 1
+        return executed
+
+    def _refresh_active(self):
+        self._active = np.flatnonzero(~self.halted)
+
+    def _cycle(self, cols: np.ndarray, until_pc: Optional[int]) -> bool:
+        """Um ciclo das máquinas 'cols'. Retorna True se alguma parou."""
+        R = self.registers
+        mpc = self.mpc[cols]
+        sig = self._table[mpc]
+        amux, cond, alu, sh, mbr, mar, rd, wr, enc, c, b, a, addr = sig.T
+
+        # Barramentos, ULA e deslocador (as quatro operações, selecionadas por máquina)
+        va = R[np.where(amux == 1, 1, a), cols]
+        vb = R[b, cols]
+        out = np.where(alu == 0, va + vb,
+              np.where(alu == 1, va & vb,
+              np.where(alu == 2, va, ~va)))
+        res = np.where(sh == 1, out >> 1, np.where(sh == 2, out << 1, out))
+
+        # Escrita: MAR/MBR dedicados + barramento C (constantes não são graváveis)
+        enc = enc == 1
+        m = (mar == 1) | (enc & (c == 0))
+        R[0, cols[m]] = res[m]
+        m = (mbr == 1) | (enc & (c == 1))
+        R[1, cols[m]] = res[m]
+        m = enc & (c >= 2) & self._writable[c]
+        R[c[m], cols[m]] = res[m]
+
+        # Memória: leitura (com a cache) e escrita (write-through)
+        m = rd == 1
+        if m.any():
+            self._read(cols[m])
+        stopped = False
+        done = np.ones(len(cols), dtype=bool)
+        m = wr == 1
+        if m.any():
+            sel = cols[m]
+            address = R[0, sel].astype(np.int64)
+            bad = address >= self.ram_size
+            if bad.any():
+                self.faulted[sel[bad]] = True
+                self.halted[sel[bad]] = True
+                done[np.flatnonzero(m)[bad]] = False
+                stopped = True
+                sel, address = sel[~bad], address[~bad]
+            self.memory[sel, address] = R[1, sel]
+
+        # Sequenciamento (flags da saída da ULA, antes do deslocador)
+        negative = (out & 0x8000) != 0
+        zero = out == 0
+        jump = ((cond == 1) & negative) | ((cond == 2) & zero)
+        decoded = ((R[5, cols] >> 12) & 0xF).astype(np.int64) * 10 + 10
+        next_mpc = np.where(cond == 3, decoded, np.where(jump, addr | 0x80, addr))
+
+        # Uma máquina com falha (como CPU.step() ao levantar a exceção) já buscou a
+        # microinstrução e atualizou as flags, mas não avança MPC nem ciclos
+        self.mir_address[cols] = mpc
+        self.alu_out[cols] = out
+        ok = cols[done]
+        self.mpc[ok] = next_mpc[done]
+        self.cycles[ok] += 1
+
+        if until_pc is not None:
+            finished = ok[(self.mpc[ok] == 0) & (R[2, ok] == until_pc)]
+            if len(finished):
+                self.halted[finished] = True
+                stopped = True
+        return stopped
+
+    def _read(self, sel: np.ndarray):
+        """MBR := memória[MAR] para as máquinas 'sel', contabilizando a cache."""
+        R = self.registers
+        address = R[0, sel].astype(np.int64)
+        inside = address < self.ram_size
+        value = np.zeros(len(sel), dtype=np.uint16)
+        value[inside] = self.memory[sel[inside], address[inside]]
+
+        # Mesma decodificação de DirectCache._decode_address
+        mask = self.cache_lines - 1
+        index = (address >> self._offset_bits) & mask
+        tag = address >> self._tag_shift
+        hit = self.cache_valid[sel, index] & (self.cache_tag[sel, index] == tag)
+        self.hits[sel] += hit
+        self.misses[sel] += ~hit
+
+        # Miss: o bloco alinhado é carregado (índice/tag do endereço base do bloco)
+        miss = ~hit
+        if miss.any():
+            start = address[miss] - address[miss] % self.block_size
+            self.cache_valid[sel[miss], (start >> self._offset_bits) & mask] = True
+            self.cache_tag[sel[miss], (start >> self._offset_bits) & mask] = start >> self._tag_shift
+
+        R[1, sel] = value
+
+    # --- Consulta ---
+
+    def machine_state(self, i: int) -> dict:
+        """Estado da máquina 'i' no mesmo formato dos componentes de CPU."""
+        out = int(self.alu_out[i])
+        address = int(self.mir_address[i])
+        return {
+            "registers": {name: int(self.registers[index, i]) for name, index in REGISTER_INDEX.items()},
+            "MPC": int(self.mpc[i]),
+            "MIR": self.store[address] if address >= 0 else 0,
+            "N": out >= 0 and bool(out & 0x8000),
+            "Z": out == 0,
+            "cycles": int(self.cycles[i]),
+            "stats": {"hits": int(self.hits[i]), "misses": int(self.misses[i])},
+            "halted": bool(self.halted[i]),
+            "faulted": bool(self.faulted[i]),
+        }
@@ -0,0 +1,153 @@
+"""
+Registro dos acessos à memória (MemoryManager.read/write) e replay offline numa cache.
+Cada acesso vira um registro compacto: ciclo da CPU, endereço e tipo (leitura/escrita,
+busca de instrução ou dado). O registro vai para um buffer circular em arrays
+(as 'capacity' entradas mais recentes) ou é gravado em disco à medida que chega.
+
+MemoryManager.start_recording(log, cpu) liga a gravação trocando, só naquele objeto,
+read/write por versões que registram; desligada, os métodos da classe são usados
+sem nenhum teste extra. Com a gravação ligada, CPU.run() executa ciclo a ciclo
+(CPU.step), de modo que o ciclo e a microinstrução de cada acesso são exatos em
+qualquer modo. Uma leitura é "busca de instrução" quando feita pelas
+microinstruções do fetch (do endereço 0 até a decodificação do IR).
+
+replay() alimenta uma cache qualquer (DirectCache, SetAssociativeCache...) com um log
+gravado, sem CPU: estudos de cache rodam na velocidade do sistema de memória.
+"""
+
+import struct
+from array import array
+from typing import Iterable, Iterator, Optional, Set, Tuple
+from src.hardware.memory.ram import MainMemory
+
+ACCESS_LOG_MAGIC = b"MACC"
+ACCESS_LOG_VERSION = 1
+
+_HEADER = struct.Struct("<4sHH8x")  # Assinatura, versão, tamanho do registro
+_RECORD = struct.Struct("<QHB")     # Ciclo, endereço, tipo
+
+_CHUNK_RECORDS = 4096
+
+# Bits do campo 'tipo'
+ACCESS_WRITE, ACCESS_FETCH = 1, 2
+
+# Um acesso: (ciclo, endereço, tipo)
+Access = Tuple[int, int, int]
+
+class AccessLogError(ValueError):
+    """Arquivo que não é um log de acessos (ou de outra versão)."""
+
+def fetch_microaddresses(decoded) -> Set[int]:
+    """
+    Microinstruções do fetch: do endereço 0, seguindo os desvios incondicionais, até a
+    que decodifica o IR (cond=3), inclusive.
+    """
+    addresses: Set[int] = set()
+    mpc = 0
+    while mpc not in addresses:
+        addresses.add(mpc)
+        signals = decoded[mpc]
+        if signals.cond != 0:
+            break
+        mpc = signals.addr
+    return addresses
+
+class AccessLog:
+    def __init__(self, capacity: int = 1 << 20, path: Optional[str] = None,
+                 buffer_size: int = 1 << 20):
+        """
+        :param capacity: entradas do buffer circular em memória (os acessos mais antigos
+            são sobrescritos).
+        :param path: se dado, os acessos são gravados neste arquivo (sem limite) em vez
+            de ficarem em memória; leia-o com read_access_log().
+        """
+        if capacity <= 0:
+            raise ValueError("capacity deve ser positivo.")
+        self.capacity = capacity
+        self.total = 0  # Acessos registrados desde a criação
+        self._file = None
+        if path is not None:
+            self._file = open(path, "wb", buffering=buffer_size)
+            self._file.write(_HEADER.pack(ACCESS_LOG_MAGIC, ACCESS_LOG_VERSION, _RECORD.size))
+            self._pack = _RECORD.pack
+        else:
+            self.cycles = array('Q', [0]) * capacity
+            self.addresses = array('H', [0]) * capacity
+            self.kinds = bytearray(capacity)
+
+    def append(self, cycle: int, address: int, kind: int):
+        if self._file is not None:
+            self._file.write(self._pack(cycle, address, kind))
+        else:
+            i = self.total % self.capacity
+            self.cycles[i] = cycle
+            self.addresses[i] = address
+            self.kinds[i] = kind
+        self.total += 1
+
+    def __len__(self) -> int:
+        """Acessos disponíveis no buffer (em disco, todos os gravados)."""
+        return self.total if self._file is not None else min(self.total, self.capacity)
+
+    def __iter__(self) -> Iterator[Access]:
+        """Acessos do buffer em memória, do mais antigo ao mais recente."""
+        if self._file is not None:
+            raise ValueError("Log gravado em disco: use read_access_log() depois de close().")
+        start = self.total - len(self)
+        for n in range(start, self.total):
+            i = n % self.capacity
+            yield self.cycles[i], self.addresses[i], self.kinds[i]
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self) -> 'AccessLog':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def read_access_log(path: str) -> Iterator[Access]:
+    """Acessos de um log gravado em disco (AccessLog(path=...)), em ordem."""
+    with open(path, "rb") as f:
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise AccessLogError("Log de acessos truncado.")
+        magic, version, size = _HEADER.unpack(header)
+        if magic != ACCESS_LOG_MAGIC or version != ACCESS_LOG_VERSION or size != _RECORD.size:
+            raise AccessLogError("Arquivo não é um log de acessos do MIC-1 nesta versão.")
+        while True:
+            chunk = f.read(_CHUNK_RECORDS * _RECORD.size)
+            whole = len(chunk) - len(chunk) % _RECORD.size  # Registro incompleto no fim: ignorado
+            yield from _RECORD.iter_unpack(chunk[:whole])
+            if len(chunk) < _CHUNK_RECORDS * _RECORD.size:
+                return
+
+def replay(accesses: Iterable[Access], cache, fetches: bool = True, data: bool = True,
+           ram_size: int = 1 << 16) -> dict:
+    """
+    Alimenta 'cache' com os acessos de um log (leituras e escritas pelo mesmo
+    MemoryManager da CPU, numa RAM zerada: os valores não importam para hits/misses).
+    fetches/data escolhem quais leituras entram (ex.: só dados, para uma cache de dados
+    separada). Retorna as estatísticas da cache e a contagem de acessos repassados.
+    """
+    # Importado aqui: manager importa este módulo
+    from src.hardware.memory.manager import MemoryManager
+    memory = MemoryManager(MainMemory(ram_size), cache)
+    read, write = memory.read, memory.write
+    counts = [0, 0, 0]  # Leituras de dados, escritas, buscas de instrução
+    for _, address, kind in accesses:
+        if kind & ACCESS_WRITE:
+            write(address, 0)
+            counts[1] += 1
+        elif kind & ACCESS_FETCH:
+            if fetches:
+                read(address)
+                counts[2] += 1
+        elif data:
+            read(address)
+            counts[0] += 1
+    stats = cache.get_stats()
+    stats.update(reads=counts[0], writes=counts[1], fetches=counts[2])
+    return stats
@@ -1,19 +1,48 @@
 """
-Cache com Mapeamento Direto e Suporte a Blocos.
-Implementa a lógica de Tag, Index e Offset.
+Caches com Suporte a Blocos.
+Implementa a lógica de Tag, Index e Offset, com os deslocamentos e máscaras derivados
+da geometria (número de linhas/conjuntos e palavras por bloco, potências de 2):
+- DirectCache: mapeamento direto (uma linha por índice);
+- SetAssociativeCache: associativa por conjunto, com política de substituição
+  plugável (LRU, FIFO, aleatória com semente e pseudo-LRU em árvore).
+Ambas têm a mesma interface usada pelo MemoryManager (read, fill_block, load_block,
+write_word, block_size, get_stats, reset_stats). Tags, bits de validade e dados ficam
+em arrays planos pré-alocados; um miss copia o bloco das páginas da RAM direto para
+a linha (fill_block), sem alocar.
 """
 
+import random
+import struct
+from array import array
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Dict, List, Optional, TYPE_CHECKING
+from src.common.constants import MASK_16BIT
+from src.hardware.snapshot import (SnapshotError, pack_dwords, pack_snapshot, pack_words,
+                                   unpack_dwords, unpack_snapshot, unpack_words)
+
+if TYPE_CHECKING:
+    from src.hardware.memory.ram import MainMemory
+
+_GEOMETRY = struct.Struct("<HHQQ")  # Linhas, palavras por bloco, hits, misses
+
+def address_bits(value: int, name: str) -> int:
+    """log2 de um parâmetro de geometria (que deve ser potência de 2)."""
+    if value <= 0 or value & (value - 1):
+        raise ValueError(f"{name} deve ser uma potência de 2 (recebeu {value}).")
+    return value.bit_length() - 1
 
 @dataclass
 class CacheLine:
+    """Cópia de uma linha, para visualização/depuração (ver DirectCache.lines)."""
     valid: bool = False
     tag: int = 0
-    # Agora 'data' é uma lista de palavras (o bloco), não apenas um inteiro.
+    # 'data' é uma lista de palavras (o bloco), não apenas um inteiro.
     data: List[int] = field(default_factory=lambda: [0, 0, 0, 0])
 
 class DirectCache:
+    SNAPSHOT_KIND = b"DCAC"
+
     def __init__(self, size_lines: int = 16, block_size: int = 4):
         """
         Inicializa a cache.
@@ -22,28 +51,49 @@ class DirectCache:
         """
         self.size_lines = size_lines
         self.block_size = block_size
-        self.lines: List[CacheLine] = [CacheLine(data=[0]*block_size) for _ in range(size_lines)]
+        self._set_geometry()
+        self._clear()
         
         self.hits = 0
         self.misses = 0
 
+    def _set_geometry(self):
+        """Deslocamentos e máscaras do endereço, derivados de size_lines e block_size."""
+        self.offset_bits = address_bits(self.block_size, "block_size")
+        self.index_bits = address_bits(self.size_lines, "size_lines")
+        self._tag_shift = self.offset_bits + self.index_bits
+
+    def _clear(self):
+        """
+        Linhas em arrays planos pré-alocados (nenhuma alocação por acesso ou miss):
+        bit de validade e tag da linha i em valid[i]/tags[i], e o bloco dela em
+        data[i * block_size:(i + 1) * block_size].
+        """
+        self.valid = bytearray(self.size_lines)
+        self.tags = array('I', [0]) * self.size_lines
+        self.data = array('H', [0]) * (self.size_lines * self.block_size)
+
+    @property
+    def lines(self) -> List[CacheLine]:
+        """Cópia das linhas como CacheLine (para visualização; não altera a cache)."""
+        size = self.block_size
+        return [CacheLine(bool(self.valid[i]), self.tags[i], self.data[i * size:(i + 1) * size].tolist())
+                for i in range(self.size_lines)]
+
     def _decode_address(self, address: int):
         """
         Quebra o endereço em Tag, Index e Offset.
-        Considerando Block=4 (2 bits) e Lines=16 (4 bits).
+        Ex.: Block=4 (2 bits de offset) e Lines=16 (4 bits de índice): tag = address >> 6.
         """
         # Offset: Bits menos significativos (log2(block_size))
-        # Para size 4, são 2 bits (mask 0x3)
         offset = address & (self.block_size - 1)
         
         # Index: Bits do meio (log2(size_lines))
         # Shiftamos o offset para descartá-lo, depois aplicamos a máscara
-        address_shifted = address >> 2  # Desloca 2 bits (offset)
-        index = address_shifted & (self.size_lines - 1) # Mask 0xF para 16 linhas
+        index = (address >> self.offset_bits) & (self.size_lines - 1)
         
-        # Tag: Bits restantes
-        # Shiftamos offset (2) + index (4) = 6 bits
-        tag = address >> 6
+        # Tag: Bits restantes (acima de offset + index)
+        tag = address >> (self.offset_bits + self.index_bits)
         
         return tag, index, offset
 
@@ -53,21 +103,36 @@ class DirectCache:
         Retorna o valor (int) se for HIT.
         Retorna None se for MISS.
         """
-        tag, index, offset = self._decode_address(address)
-        line = self.lines[index]
+        # Mesma quebra de _decode_address, sem a chamada (caminho quente)
+        index = (address >> self.offset_bits) & (self.size_lines - 1)
 
         # Verifica HIT: Bit de validade está ativo E a Tag bate?
-        if line.valid and line.tag == tag:
+        if self.valid[index] and self.tags[index] == address >> self._tag_shift:
             self.hits += 1
-            return line.data[offset] # Retorna apenas a palavra solicitada do bloco
+            # Apenas a palavra solicitada do bloco
+            return self.data[index * self.block_size + (address & (self.block_size - 1))]
         
         # MISS
         self.misses += 1
         return None
 
+    def fill_block(self, address: int, ram: 'MainMemory') -> int:
+        """
+        Carrega o bloco de 'address' (endereço base) direto das páginas da RAM para a
+        linha (após um Miss), sem listas intermediárias. Retorna a posição, em 'data',
+        da primeira palavra da linha. As páginas da RAM já são arrays 'H', então as
+        palavras copiadas estão sempre em 16 bits (sem máscara por palavra).
+        """
+        index = (address >> self.offset_bits) & (self.size_lines - 1)
+        start = index * self.block_size
+        ram.copy_block(address, self.block_size, self.data, start)
+        self.valid[index] = 1
+        self.tags[index] = address >> self._tag_shift
+        return start
+
     def load_block(self, address: int, data_block: List[int]):
         """
-        Carrega um bloco inteiro vindo da RAM para a Cache (após um Miss).
+        Carrega um bloco inteiro (lista de palavras) para a Cache.
         'address' deve ser o endereço base do bloco.
         """
         if len(data_block) != self.block_size:
@@ -76,7 +141,10 @@ class DirectCache:
         tag, index, _ = self._decode_address(address)
         
         # Substitui a linha inteira
-        self.lines[index] = CacheLine(valid=True, tag=tag, data=data_block)
+        start = index * self.block_size
+        self.data[start:start + self.block_size] = array('H', [word & MASK_16BIT for word in data_block])
+        self.valid[index] = 1
+        self.tags[index] = tag
 
     def write_word(self, address: int, value: int) -> bool:
         """
@@ -84,11 +152,11 @@ class DirectCache:
         Retorna True se foi Hit (atualizou), False se foi Miss (ignora).
         """
         tag, index, offset = self._decode_address(address)
-        line = self.lines[index]
 
-        if line.valid and line.tag == tag:
+        if self.valid[index] and self.tags[index] == tag:
             # HIT: Atualiza apenas a palavra específica dentro do bloco
-            line.data[offset] = value
+            # 'data' é um array 'H': a máscara mantém a palavra igual à gravada na RAM
+            self.data[index * self.block_size + offset] = value & MASK_16BIT
             # (Em um sistema real, marcaríamos 'dirty bit' aqui se fosse Write-Back)
             return True
         
@@ -99,4 +167,321 @@ class DirectCache:
     
     def reset_stats(self):
         self.hits = 0
-        self.misses = 0
\ No newline at end of file
+        self.misses = 0
+
+    # --- Snapshot / clone ---
+
+    def clone(self) -> 'DirectCache':
+        """Cópia independente (linhas, tags, bits de validade e contadores)."""
+        other = DirectCache.__new__(DirectCache)
+        other.size_lines = self.size_lines
+        other.block_size = self.block_size
+        other._set_geometry()
+        other.valid = self.valid[:]
+        other.tags = self.tags[:]
+        other.data = self.data[:]
+        other.hits = self.hits
+        other.misses = self.misses
+        return other
+
+    def snapshot(self) -> bytes:
+        """Estado em formato binário: geometria e contadores, bits de validade, tags e dados."""
+        return pack_snapshot(
+            self.SNAPSHOT_KIND,
+            _GEOMETRY.pack(self.size_lines, self.block_size, self.hits, self.misses),
+            bytes(self.valid),
+            pack_dwords(self.tags),
+            pack_words(self.data),
+        )
+
+    def restore(self, data: bytes):
+        """Restaura um snapshot de snapshot() (a geometria passa a ser a salva)."""
+        geometry, valid, tags, words = unpack_snapshot(data, self.SNAPSHOT_KIND)
+        size_lines, block_size, hits, misses = _GEOMETRY.unpack(geometry)
+        tags = unpack_dwords(tags)
+        words = unpack_words(words)
+        if len(valid) != size_lines or len(tags) != size_lines or len(words) != size_lines * block_size:
+            raise SnapshotError("Snapshot de cache com tamanho inconsistente.")
+        self.size_lines = size_lines
+        self.block_size = block_size
+        self._set_geometry()
+        self.valid = bytearray(valid)
+        self.tags = array('I', tags)
+        self.data = array('H', words)
+        self.hits = hits
+        self.misses = misses
+
+# --- Políticas de substituição (uma instância por cache, estado por conjunto) ---
+
+class LRUPolicy:
+    """Menos recentemente usada: ordem de uso por conjunto (OrderedDict, O(1))."""
+    name = "lru"
+
+    def __init__(self, sets: int, ways: int, seed: int = 0):
+        self.ways = ways
+        self._order = [OrderedDict.fromkeys(range(ways)) for _ in range(sets)]
+
+    def touch(self, index: int, way: int):
+        self._order[index].move_to_end(way)
+
+    insert = touch
+
+    def victim(self, index: int) -> int:
+        return next(iter(self._order[index]))
+
+    def get_state(self) -> List[int]:
+        return [way for order in self._order for way in order]
+
+    def set_state(self, values: List[int]):
+        ways = self.ways
+        self._order = [OrderedDict.fromkeys(values[i:i + ways]) for i in range(0, len(values), ways)]
+
+class FIFOPolicy:
+    """Primeira a entrar: as vias são ocupadas em ordem, então basta um ponteiro circular."""
+    name = "fifo"
+
+    def __init__(self, sets: int, ways: int, seed: int = 0):
+        self.ways = ways
+        self._next = [0] * sets
+
+    def touch(self, index: int, way: int):
+        pass  # O uso não altera a ordem de chegada
+
+    def insert(self, index: int, way: int):
+        self._next[index] = (way + 1) % self.ways
+
+    def victim(self, index: int) -> int:
+        return self._next[index]
+
+    def get_state(self) -> List[int]:
+        return list(self._next)
+
+    def set_state(self, values: List[int]):
+        self._next = list(values)
+
+class RandomPolicy:
+    """Vítima aleatória, de um gerador com semente (execuções reproduzíveis)."""
+    name = "random"
+
+    def __init__(self, sets: int, ways: int, seed: int = 0):
+        self.ways = ways
+        self._random = random.Random(seed)
+
+    def touch(self, index: int, way: int):
+        pass
+
+    insert = touch
+
+    def victim(self, index: int) -> int:
+        return self._random.randrange(self.ways)
+
+    def get_state(self) -> List[int]:
+        return list(self._random.getstate()[1])  # Estado do Mersenne Twister (625 palavras)
+
+    def set_state(self, values: List[int]):
+        self._random.setstate((3, tuple(values), None))
+
+class PLRUPolicy:
+    """
+    Pseudo-LRU em árvore: ways - 1 bits por conjunto (heap: nó 1 é a raiz), cada um
+    apontando para a metade menos usada. Exige ways potência de 2; O(log2(ways)).
+    """
+    name = "plru"
+
+    def __init__(self, sets: int, ways: int, seed: int = 0):
+        self.ways = ways
+        self._levels = address_bits(ways, "ways")
+        self._bits = [0] * sets
+
+    def touch(self, index: int, way: int):
+        bits = self._bits[index]
+        node = 1
+        for level in range(self._levels - 1, -1, -1):
+            right = (way >> level) & 1
+            # O bit passa a apontar para o lado oposto ao acessado (1 = direita)
+            if right:
+                bits &= ~(1 << node)
+            else:
+                bits |= 1 << node
+            node = 2 * node + right
+        self._bits[index] = bits
+
+    insert = touch
+
+    def victim(self, index: int) -> int:
+        bits = self._bits[index]
+        node = 1
+        for _ in range(self._levels):
+            node = 2 * node + ((bits >> node) & 1)
+        return node - self.ways
+
+    def get_state(self) -> List[int]:
+        return list(self._bits)
+
+    def set_state(self, values: List[int]):
+        self._bits = list(values)
+
+REPLACEMENT_POLICIES = {policy.name: policy for policy in (LRUPolicy, FIFOPolicy, RandomPolicy, PLRUPolicy)}
+
+_SA_GEOMETRY = struct.Struct("<HHHQQQ")  # Conjuntos, vias, palavras por bloco, hits, misses, semente
+
+class SetAssociativeCache:
+    SNAPSHOT_KIND = b"SACH"
+
+    def __init__(self, sets: int = 4, ways: int = 4, block_size: int = 4,
+                 policy: str = "lru", seed: int = 0):
+        """
+        Cache associativa por conjunto (mesma interface de DirectCache).
+        :param sets: Número de conjuntos (potência de 2).
+        :param ways: Vias (linhas) por conjunto. ways=1 equivale a DirectCache(sets, block_size).
+        :param block_size: Palavras por linha (potência de 2).
+        :param policy: Substituição: "lru", "fifo", "random" ou "plru".
+        :param seed: Semente da política "random".
+        """
+        if policy not in REPLACEMENT_POLICIES:
+            raise ValueError(f"Política desconhecida: {policy!r} (use {', '.join(REPLACEMENT_POLICIES)}).")
+        if ways <= 0:
+            raise ValueError("ways deve ser positivo.")
+        self.sets = sets
+        self.ways = ways
+        self.block_size = block_size
+        self.offset_bits = address_bits(block_size, "block_size")
+        self.index_bits = address_bits(sets, "sets")
+        self.policy_name = policy
+        self.seed = seed
+        self._clear()
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def size_lines(self) -> int:
+        return self.sets * self.ways
+
+    def _clear(self):
+        """Todas as linhas inválidas; política no estado inicial."""
+        lines = self.size_lines
+        self.valid = bytearray(lines)  # Linha do conjunto 's', via 'w': s * ways + w
+        self.tags = array('I', [0]) * lines
+        self.data = array('H', [0]) * (lines * self.block_size)
+        # Tag -> via, por conjunto: busca O(1) em vez de comparar todas as vias
+        self._where: List[Dict[int, int]] = [{} for _ in range(self.sets)]
+        self.policy = REPLACEMENT_POLICIES[self.policy_name](self.sets, self.ways, self.seed)
+
+    def _decode_address(self, address: int):
+        """Tag, índice do conjunto e offset (mesma quebra de DirectCache, com 'sets' índices)."""
+        offset = address & (self.block_size - 1)
+        index = (address >> self.offset_bits) & (self.sets - 1)
+        tag = address >> (self.offset_bits + self.index_bits)
+        return tag, index, offset
+
+    def read(self, address: int) -> Optional[int]:
+        """Valor (int) se for HIT, None se for MISS."""
+        tag, index, offset = self._decode_address(address)
+        way = self._where[index].get(tag)
+        if way is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.policy.touch(index, way)
+        return self.data[(index * self.ways + way) * self.block_size + offset]
+
+    def fill_block(self, address: int, ram: 'MainMemory') -> int:
+        """Carrega o bloco de 'address' direto da RAM (ver DirectCache.fill_block)."""
+        start = self._allocate(address) * self.block_size
+        ram.copy_block(address, self.block_size, self.data, start)
+        return start
+
+    def load_block(self, address: int, data_block: List[int]):
+        """Carrega o bloco de 'address' (endereço base) numa via livre ou na vítima da política."""
+        if len(data_block) != self.block_size:
+            raise ValueError(f"Tamanho do bloco incorreto. Esperado {self.block_size}, recebeu {len(data_block)}.")
+        start = self._allocate(address) * self.block_size
+        self.data[start:start + self.block_size] = array('H', [word & MASK_16BIT for word in data_block])
+
+    def _allocate(self, address: int) -> int:
+        """Escolhe (e marca como do bloco de 'address') a linha que vai recebê-lo."""
+        tag, index, _ = self._decode_address(address)
+        where = self._where[index]
+        way = where.get(tag)
+        if way is not None:
+            # Bloco já residente: recarregar é um uso, não uma nova chegada
+            self.policy.touch(index, way)
+            return index * self.ways + way
+        if len(where) < self.ways:
+            # Vias livres primeiro (nunca há invalidação, então são ocupadas em ordem)
+            way = len(where)
+        else:
+            way = self.policy.victim(index)
+            del where[self.tags[index * self.ways + way]]
+        where[tag] = way
+        line = index * self.ways + way
+        self.valid[line] = 1
+        self.tags[line] = tag
+        self.policy.insert(index, way)
+        return line
+
+    def write_word(self, address: int, value: int) -> bool:
+        """
+        Write Hit: atualiza a palavra e retorna True; Miss: ignora e retorna False.
+        Como em DirectCache (write-through, sem alocação), a escrita não mexe na ordem
+        de substituição: o conteúdo da cache depende só das leituras.
+        """
+        tag, index, offset = self._decode_address(address)
+        way = self._where[index].get(tag)
+        if way is None:
+            return False
+        self.data[(index * self.ways + way) * self.block_size + offset] = value & MASK_16BIT
+        return True
+
+    def get_stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    # --- Snapshot / clone ---
+
+    def clone(self) -> 'SetAssociativeCache':
+        """Cópia independente (linhas, estado da política e contadores)."""
+        other = SetAssociativeCache(self.sets, self.ways, self.block_size, self.policy_name, self.seed)
+        other.restore(self.snapshot())
+        return other
+
+    def snapshot(self) -> bytes:
+        """Estado em formato binário: geometria, política, validade, tags, dados e estado da política."""
+        return pack_snapshot(
+            self.SNAPSHOT_KIND,
+            _SA_GEOMETRY.pack(self.sets, self.ways, self.block_size, self.hits, self.misses, self.seed),
+            self.policy_name.encode(),
+            bytes(self.valid),
+            pack_dwords(self.tags),
+            pack_words(self.data),
+            pack_dwords(self.policy.get_state()),
+        )
+
+    def restore(self, data: bytes):
+        """Restaura um snapshot de snapshot() (a geometria e a política passam a ser as salvas)."""
+        geometry, policy, valid, tags, words, state = unpack_snapshot(data, self.SNAPSHOT_KIND)
+        sets, ways, block_size, hits, misses, seed = _SA_GEOMETRY.unpack(geometry)
+        policy = bytes(policy).decode()
+        tags = unpack_dwords(tags)
+        words = unpack_words(words)
+        lines = sets * ways
+        if (policy not in REPLACEMENT_POLICIES or len(valid) != lines or len(tags) != lines
+                or len(words) != lines * block_size):
+            raise SnapshotError("Snapshot de cache com tamanho inconsistente.")
+        self.__init__(sets, ways, block_size, policy, seed)
+        self.valid = bytearray(valid)
+        self.tags = array('I', tags)
+        self.data = array('H', words)
+        for line in range(lines):
+            if self.valid[line]:
+                self._where[line // ways][tags[line]] = line % ways
+        self.policy.set_state(unpack_dwords(state))
+        self.hits = hits
+        self.misses = misses
+
+# Tipo de cache por tipo de snapshot (MemoryManager.restore troca a cache se preciso)
+CACHE_TYPES = {cache.SNAPSHOT_KIND: cache for cache in (DirectCache, SetAssociativeCache)}
@@ -2,13 +2,29 @@
 Gerenciador de Memória (Memory Management Unit - MMU simplificada).
 Coordena o acesso entre a CPU, a Cache (L1) e a Memória Principal (RAM).
 Implementa a lógica de busca de blocos em caso de Cache Miss.
+Opcionalmente registra cada acesso num AccessLog (ver access_log.py) e/ou conta o
+tempo de cada acesso num modelo de latências (ver timing.py).
 """
 
+from typing import Optional, Union, TYPE_CHECKING
 from src.hardware.memory.ram import MainMemory
-from src.hardware.memory.cache import DirectCache
+from src.hardware.memory.cache import CACHE_TYPES, DirectCache, SetAssociativeCache
+from src.hardware.memory.access_log import ACCESS_FETCH, ACCESS_WRITE, AccessLog, fetch_microaddresses
+from src.hardware.memory.timing import MemoryTiming
+from src.hardware.snapshot import SnapshotError, pack_snapshot, snapshot_kind, unpack_snapshot
+
+if TYPE_CHECKING:
+    from src.hardware.cpu.cpu import CPU
 
 class MemoryManager:
-    def __init__(self, ram: MainMemory, cache: DirectCache):
+    log: Optional[AccessLog] = None        # Log da gravação em curso (ver start_recording)
+    timing: Optional[MemoryTiming] = None  # Modelo de tempo em uso (ver start_timing)
+    _cpu: Optional['CPU'] = None
+    # Com log ou modelo de tempo, read/write são instrumentados e CPU.run() executa
+    # ciclo a ciclo (o ciclo e a microinstrução de cada acesso precisam ser exatos)
+    instrumented = False
+
+    def __init__(self, ram: MainMemory, cache: Union[DirectCache, SetAssociativeCache]):
         self.ram = ram
         self.cache = cache
 
@@ -20,8 +36,7 @@ class MemoryManager:
         2. Se HIT: Retorna valor.
         3. Se MISS: 
            - Calcula endereço base do bloco.
-           - Busca bloco inteiro na RAM.
-           - Carrega bloco na Cache.
+           - Copia o bloco inteiro da RAM para a linha da Cache.
            - Retorna valor diretamente do bloco (sem gerar Hit falso).
         """
         # 1. Tenta ler da Cache
@@ -37,16 +52,12 @@ class MemoryManager:
         # Alinhamento: Se block_size=4 e address=6, start=4.
         block_start_address = address - (address % block_size)
         
-        # Lê o bloco de palavras da RAM
-        data_block = self.ram.read_block(block_start_address, block_size)
-        
-        # Carrega na Cache (substituindo a linha antiga)
-        self.cache.load_block(block_start_address, data_block)
+        # Copia o bloco da RAM direto para a linha da Cache (substituindo a antiga)
+        line_start = self.cache.fill_block(block_start_address, self.ram)
         
-        # CORREÇÃO: Retorna o valor diretamente do bloco lido, 
+        # Retorna o valor diretamente da linha preenchida,
         # sem chamar cache.read() novamente para não poluir as estatísticas de Hit.
-        offset = address % block_size
-        return data_block[offset]
+        return self.cache.data[line_start + address % block_size]
 
     def write(self, address: int, value: int):
         """
@@ -61,4 +72,102 @@ class MemoryManager:
 
     def get_stats(self):
         """Retorna estatísticas de desempenho da memória."""
-        return self.cache.get_stats()
\ No newline at end of file
+        return self.cache.get_stats()
+
+    # --- Instrumentação: gravação de acessos e modelo de tempo ---
+
+    def start_recording(self, log: AccessLog, cpu: Optional['CPU'] = None):
+        """
+        Passa a registrar cada read/write em 'log', com o ciclo e a microinstrução da
+        'cpu' (sem CPU, ciclo 0 e nenhuma leitura marcada como busca de instrução).
+        Só este objeto troca de read/write: desligada, a gravação não custa nada.
+        """
+        self.log = log
+        self._instrument(cpu)
+
+    def stop_recording(self) -> Optional[AccessLog]:
+        """Desliga a gravação e devolve o log usado."""
+        log = self.log
+        self.log = None
+        self._instrument(None)
+        return log
+
+    def start_timing(self, timing: MemoryTiming, cpu: 'CPU'):
+        """Passa a contar latências e stalls de cada acesso em 'timing' (ver timing.py)."""
+        self.timing = timing
+        timing.bind(self, cpu)
+        self._instrument(cpu)
+
+    def stop_timing(self) -> Optional[MemoryTiming]:
+        timing = self.timing
+        self.timing = None
+        self._instrument(None)
+        return timing
+
+    def _instrument(self, cpu: Optional['CPU']):
+        """Instala o read/write instrumentado enquanto houver log ou modelo de tempo."""
+        if self.log is None and self.timing is None:
+            for name in ("read", "write", "instrumented", "_cpu"):
+                self.__dict__.pop(name, None)
+            return
+        if cpu is not None:
+            self._cpu = cpu
+        self._fetch_version = -1
+        self.read = self._instrumented_read
+        self.write = self._instrumented_write
+        self.instrumented = True
+
+    def _access_context(self):
+        """(ciclo, MPC, tipo de leitura) do acesso em curso, a partir da CPU associada."""
+        cpu = self._cpu
+        if cpu is None:
+            return 0, 0, 0
+        control = cpu.control_unit
+        store = control.control_store
+        if store.version != self._fetch_version:
+            fetch = fetch_microaddresses(store.decoded)
+            self._fetch_kinds = bytearray(ACCESS_FETCH if mpc in fetch else 0
+                                          for mpc in range(len(store.decoded)))
+            self._fetch_version = store.version
+        mpc = control.MPC
+        return cpu.cycles, mpc, self._fetch_kinds[mpc]
+
+    def _instrumented_read(self, address: int) -> int:
+        cycle, mpc, kind = self._access_context()
+        if self.log is not None:
+            self.log.append(cycle, address, kind)
+        if self.timing is None:
+            return MemoryManager.read(self, address)
+        misses = self.cache.misses
+        value = MemoryManager.read(self, address)
+        self.timing.access(cycle, mpc, address, False, self.cache.misses != misses, kind == ACCESS_FETCH)
+        return value
+
+    def _instrumented_write(self, address: int, value: int):
+        cycle, mpc, _ = self._access_context()
+        if self.log is not None:
+            self.log.append(cycle, address, ACCESS_WRITE)
+        MemoryManager.write(self, address, value)
+        if self.timing is not None:
+            self.timing.access(cycle, mpc, address, True, False, False)
+
+    # --- Snapshot / clone ---
+
+    def clone(self) -> 'MemoryManager':
+        """Hierarquia independente; a RAM é compartilhada em copy-on-write (ver MainMemory.clone)."""
+        return MemoryManager(self.ram.clone(), self.cache.clone())
+
+    def snapshot(self) -> bytes:
+        return pack_snapshot(b"MMU", self.ram.snapshot(), self.cache.snapshot())
+
+    def restore(self, data: bytes):
+        ram, cache = unpack_snapshot(data, b"MMU")
+        self.ram.restore(ram)
+        kind = snapshot_kind(cache)
+        if kind != self.cache.SNAPSHOT_KIND:
+            # Snapshot de outro tipo de cache (ex.: CPU.from_snapshot): troca a cache
+            if kind not in CACHE_TYPES:
+                raise SnapshotError(f"Tipo de cache desconhecido no snapshot: '{kind.decode()}'.")
+            cls = CACHE_TYPES[kind]
+            self.cache = cls.__new__(cls)
+        self.cache.restore(cache)
\ No newline at end of file
@@ -2,10 +2,30 @@
 Memória Principal (RAM) do MIC-1.
 Armazena o programa e os dados.
 Simula a latência (opcional) e o armazenamento persistente.
+
+As palavras ficam em páginas de PAGE_SIZE palavras (buffers compactos de 16 bits,
+array 'H'). clone() compartilha as páginas entre as duas memórias (copy-on-write):
+cada uma só copia uma página na primeira escrita nela, então clones de uma máquina
+não duplicam a memória não tocada. copy_block() copia fatias das páginas direto para
+o buffer de outro componente (o preenchimento de linhas da cache), sem listas
+intermediárias.
 """
 
-from typing import List
+import struct
+from array import array
+from typing import Callable, List, Optional
 from src.common.constants import AMASK
+from src.hardware.snapshot import (SnapshotError, pack_snapshot, pack_words, unpack_snapshot,
+                                   unpack_words)
+
+PAGE_BITS = 8
+PAGE_SIZE = 1 << PAGE_BITS
+PAGE_MASK = PAGE_SIZE - 1
+
+_SIZE = struct.Struct("<I")
+
+# Observador de escrita: recebe o intervalo [início, fim) de endereços alterados
+WriteWatcher = Callable[[int, int], None]
 
 class MainMemory:
     def __init__(self, size: int = 4096):
@@ -14,45 +34,148 @@ class MainMemory:
         Padrão MIC-1: 4096 palavras (endereçamento de 12 bits).
         """
         self.size = size
-        # Array de inteiros inicializado com 0
-        self._store: List[int] = [0] * self.size
+        # Páginas de 16 bits inicializadas com 0 (a última pode ser menor)
+        self._pages: List[array] = [array('H', [0]) * min(PAGE_SIZE, size - start)
+                                    for start in range(0, size, PAGE_SIZE)]
+        # 1 se a página é só desta memória; 0 se é compartilhada com um clone
+        self._owned = bytearray(b'\x01' * len(self._pages))
+
+        # Endereços vigiados (ex.: código traduzido em blocos) e seus observadores.
+        # Sem observadores, o custo de write() é um único teste de None.
+        self._watched: Optional[bytearray] = None
+        self._watchers: List[WriteWatcher] = []
 
     def read(self, address: int) -> int:
         """Lê uma palavra única da memória."""
         self._validate_address(address)
-        return self._store[address]
+        return self._pages[address >> PAGE_BITS][address & PAGE_MASK]
 
     def write(self, address: int, value: int):
         """Escreve uma palavra na memória."""
         self._validate_address(address)
-        self._store[address] = value & 0xFFFF  # Garante 16 bits
+        page = address >> PAGE_BITS
+        if not self._owned[page]:
+            self._own(page)
+        self._pages[page][address & PAGE_MASK] = value & 0xFFFF  # Garante 16 bits
+        if self._watched is not None and self._watched[address]:
+            self._notify(address, address + 1)
 
     def read_block(self, start_address: int, block_size: int) -> List[int]:
         """
-        Lê um bloco contínuo de memória (usado para preencher a Cache).
-        Retorna uma lista de inteiros.
+        Lê um bloco contínuo de memória.
+        Retorna uma lista de inteiros (a cache usa copy_block, sem lista intermediária).
         """
-        block = []
-        for i in range(block_size):
-            addr = start_address + i
-            if addr < self.size:
-                block.append(self._store[addr])
-            else:
-                block.append(0) # Padding se passar do fim da memória
-        return block
+        block = self.dump(start_address, block_size)
+        return block + [0] * (block_size - len(block)) # Padding se passar do fim da memória
+
+    def copy_block(self, start_address: int, block_size: int, dest: array, dest_start: int):
+        """
+        Copia o bloco [start_address, start_address + block_size) para dest[dest_start:]
+        (um array 'H', ex.: os dados da cache) por fatias das páginas, sem alocar listas.
+        Palavras além do fim da memória viram 0.
+        """
+        page = self._pages[start_address >> PAGE_BITS] if start_address < self.size else None
+        first = start_address & PAGE_MASK
+        if page is not None and first + block_size <= len(page):
+            # Caso comum: o bloco (alinhado) está inteiro numa página
+            dest[dest_start:dest_start + block_size] = page[first:first + block_size]
+            return
+        end = min(start_address + block_size, self.size)
+        address = start_address
+        while address < end:
+            page = self._pages[address >> PAGE_BITS]
+            first = address & PAGE_MASK
+            count = min(end - address, len(page) - first)
+            dest[dest_start:dest_start + count] = page[first:first + count]
+            dest_start += count
+            address += count
+        padding = start_address + block_size - address
+        if padding:
+            dest[dest_start:dest_start + padding] = array('H', [0]) * padding
 
     def load_program(self, program_data: List[int], start_address: int = 0):
         """Carrega um binário (lista de inteiros) na memória."""
         for i, instruction in enumerate(program_data):
-            if start_address + i < self.size:
-                self._store[start_address + i] = instruction
+            address = start_address + i
+            if address < self.size:
+                page = address >> PAGE_BITS
+                if not self._owned[page]:
+                    self._own(page)
+                self._pages[page][address & PAGE_MASK] = instruction & 0xFFFF
             else:
                 raise ValueError("Programa excede o tamanho da memória.")
+        if self._watched is not None:
+            end = start_address + len(program_data)
+            if any(self._watched[start_address:end]):
+                self._notify(start_address, end)
+
+    def add_watcher(self, watcher: WriteWatcher):
+        """Registra um observador, chamado quando um endereço vigiado é escrito."""
+        if self._watched is None:
+            self._watched = bytearray(self.size)
+        if watcher not in self._watchers:
+            self._watchers.append(watcher)
+
+    def watch(self, start: int, end: int):
+        """Passa a vigiar os endereços [start, end) (requer um observador registrado)."""
+        self._watched[start:end] = b'\x01' * (end - start)
+
+    def _notify(self, start: int, end: int):
+        for watcher in self._watchers:
+            watcher(start, end)
 
     def _validate_address(self, address: int):
         if not (0 <= address < self.size):
             raise ValueError(f"Endereço de memória inválido: {hex(address)}")
 
+    def _own(self, page: int):
+        """Copia uma página compartilhada antes da primeira escrita nela."""
+        self._pages[page] = self._pages[page][:]
+        self._owned[page] = 1
+
     def dump(self, start: int, length: int) -> List[int]:
         """Retorna uma fatia da memória para visualização/debug."""
-        return self._store[start : start + length]
\ No newline at end of file
+        end = min(start + length, self.size)
+        if start >= end:
+            return []
+        first, last = start >> PAGE_BITS, (end - 1) >> PAGE_BITS
+        if first == last:
+            return self._pages[first][start & PAGE_MASK:(end - 1 & PAGE_MASK) + 1].tolist()
+        words = self._pages[first][start & PAGE_MASK:]
+        for page in range(first + 1, last):
+            words += self._pages[page]
+        return (words + self._pages[last][:(end - 1 & PAGE_MASK) + 1]).tolist()
+
+    # --- Snapshot / clone ---
+
+    def clone(self) -> 'MainMemory':
+        """Cópia independente que compartilha as páginas até a primeira escrita (sem observadores)."""
+        other = MainMemory.__new__(MainMemory)
+        other.size = self.size
+        other._pages = self._pages[:]
+        other._owned = bytearray(len(self._pages))
+        other._watched = None
+        other._watchers = []
+        self._owned = bytearray(len(self._pages))
+        return other
+
+    def snapshot(self) -> bytes:
+        """Estado em formato binário: tamanho + todas as palavras num buffer de 16 bits."""
+        words = array('H')
+        for page in self._pages:
+            words += page
+        return pack_snapshot(b"RAM", _SIZE.pack(self.size), pack_words(words))
+
+    def restore(self, data: bytes):
+        """Restaura um snapshot de snapshot() (o tamanho da memória passa a ser o salvo)."""
+        header, buffer = unpack_snapshot(data, b"RAM")
+        (size,) = _SIZE.unpack(header)
+        words = unpack_words(buffer)
+        if len(words) != size:
+            raise SnapshotError("Snapshot de memória com tamanho inconsistente.")
+        self.size = size
+        self._pages = [array('H', words[start:start + PAGE_SIZE]) for start in range(0, size, PAGE_SIZE)]
+        self._owned = bytearray(b'\x01' * len(self._pages))
+        if self._watched is not None:
+            self._watched = bytearray(size)
+            self._notify(0, size)
\ No newline at end of file
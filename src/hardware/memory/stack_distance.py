@@ -0,0 +1,213 @@
+"""
+Simulação de várias geometrias de cache numa única passada (análise de distância de pilha).
+Para LRU, uma cache com 'ways' vias acerta uma leitura exatamente quando o bloco está
+entre os 'ways' mais recentes do seu conjunto (propriedade de inclusão de Mattson).
+Então, para cada par (palavras por bloco, número de conjuntos), basta manter uma pilha
+LRU por conjunto e contar em que profundidade cada leitura encontra o seu bloco: o
+histograma de profundidades dá os hits de todas as associatividades de uma vez.
+
+Modelo igual ao das caches do simulador (DirectCache, SetAssociativeCache com "lru"):
+só leituras contam hits/misses e alocam linhas; escritas (write-through, sem alocação)
+não alteram o conteúdo nem a ordem de substituição.
+
+Fontes do fluxo de acessos:
+- qualquer iterável de pares (endereço, é_escrita);
+- trace_accesses(): um trace binário gravado por TraceWriter (trace.py);
+- log_accesses(): um log de acessos do MemoryManager (access_log.py);
+- capture(): os acessos de um MemoryManager enquanto a CPU executa.
+
+Saída: results() (um dicionário por configuração), CSV (write_csv) e séries prontas
+para gráfico (series: taxa de miss por tamanho, uma curva por bloco/associatividade).
+Uso:
+    python -m src.hardware.memory.stack_distance prog.mtrc --sizes 64,128,256 --ways 1,2,4 --blocks 2,4,8
+"""
+
+import argparse
+import csv
+import json
+import sys
+from contextlib import contextmanager
+from typing import Dict, IO, Iterable, Iterator, List, Optional, Sequence, Tuple
+from src.hardware.memory.access_log import ACCESS_WRITE, Access
+from src.hardware.memory.cache import address_bits
+from src.hardware.memory.manager import MemoryManager
+from src.hardware.trace import TraceReader
+
+# Colunas de results() / do CSV
+COLUMNS = ("size", "block_size", "ways", "sets", "reads", "hits", "misses", "miss_rate")
+
+class StackDistanceAnalyzer:
+    def __init__(self, sizes: Sequence[int], ways: Sequence[int], block_sizes: Sequence[int]):
+        """
+        Grade de configurações: todo tamanho (em palavras) x associatividade x palavras
+        por bloco (todos potências de 2). Combinações em que o tamanho não comporta um
+        conjunto inteiro (size < ways * block_size) ficam de fora.
+        """
+        for name, values in (("sizes", sizes), ("ways", ways), ("block_sizes", block_sizes)):
+            if not values:
+                raise ValueError(f"{name} não pode ser vazio.")
+            for value in values:
+                address_bits(value, name)
+        self.configs: List[Tuple[int, int, int, int]] = []  # (tamanho, bloco, vias, conjuntos)
+        depth: Dict[Tuple[int, int], int] = {}               # (bloco, conjuntos) -> vias máximas
+        for block in sorted(set(block_sizes)):
+            for size in sorted(set(sizes)):
+                for way in sorted(set(ways)):
+                    if size >= way * block:
+                        sets = size // (way * block)
+                        self.configs.append((size, block, way, sets))
+                        depth[block, sets] = max(depth.get((block, sets), 0), way)
+
+        # Por tamanho de bloco: deslocamento e, por número de conjuntos, as pilhas LRU
+        # (limitadas à maior associatividade pedida) e o histograma de profundidades
+        self._groups: List[Tuple[int, List[tuple]]] = []
+        self._histograms: Dict[Tuple[int, int], List[int]] = {}
+        for block in sorted({b for b, _ in depth}):
+            stacks = []
+            for (b, sets), ways_max in sorted(depth.items()):
+                if b == block:
+                    histogram = self._histograms[block, sets] = [0] * ways_max
+                    stacks.append((sets - 1, ways_max, [[] for _ in range(sets)], histogram))
+            self._groups.append((address_bits(block, "block_size"), stacks))
+
+        self.reads = 0
+        self.writes = 0
+
+    def access(self, address: int, write: bool = False):
+        """Processa um acesso (endereço de palavra)."""
+        if write:
+            self.writes += 1
+            return
+        self.reads += 1
+        for offset_bits, stacks in self._groups:
+            block = address >> offset_bits
+            for mask, depth, sets, histogram in stacks:
+                stack = sets[block & mask]
+                # Pilha do conjunto, do mais recente (0) ao menos recente
+                try:
+                    distance = stack.index(block)
+                except ValueError:
+                    # Miss em todas as associatividades: entra no topo
+                    stack.insert(0, block)
+                    if len(stack) > depth:
+                        stack.pop()
+                    continue
+                histogram[distance] += 1
+                if distance:
+                    del stack[distance]
+                    stack.insert(0, block)
+
+    def feed(self, accesses: Iterable[Tuple[int, bool]]) -> 'StackDistanceAnalyzer':
+        """Processa um fluxo de pares (endereço, é_escrita)."""
+        access = self.access
+        for address, write in accesses:
+            access(address, write)
+        return self
+
+    # --- Resultados ---
+
+    def hits(self, block_size: int, ways: int, sets: int) -> int:
+        """Hits de leitura de uma configuração da grade."""
+        return sum(self._histograms[block_size, sets][:ways])
+
+    def results(self) -> List[dict]:
+        """Uma linha por configuração (colunas de COLUMNS), na ordem bloco, tamanho, vias."""
+        rows = []
+        for size, block, ways, sets in self.configs:
+            hits = self.hits(block, ways, sets)
+            misses = self.reads - hits
+            rows.append(dict(zip(COLUMNS, (size, block, ways, sets, self.reads, hits, misses,
+                                           misses / self.reads if self.reads else 0.0))))
+        return rows
+
+    def write_csv(self, file: IO[str]):
+        writer = csv.DictWriter(file, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(self.results())
+
+    def series(self) -> Dict[str, List[Tuple[int, float]]]:
+        """Curvas de taxa de miss por tamanho: {"B=4 W=2": [(tamanho, taxa), ...], ...}."""
+        curves: Dict[str, List[Tuple[int, float]]] = {}
+        for row in self.results():
+            key = f"B={row['block_size']} W={row['ways']}"
+            curves.setdefault(key, []).append((row["size"], row["miss_rate"]))
+        return curves
+
+# --- Fontes de acessos ---
+
+def trace_accesses(path: str) -> Iterator[Tuple[int, bool]]:
+    """Acessos de um trace de TraceWriter (ciclos com rd ou wr), em ordem."""
+    with TraceReader(path) as reader:
+        for record in reader:
+            if record.rd:
+                yield record.address, False
+            if record.wr:
+                yield record.address, True
+
+def log_accesses(accesses: Iterable[Access]) -> Iterator[Tuple[int, bool]]:
+    """Acessos de um AccessLog (ou de read_access_log()), em ordem."""
+    for _, address, kind in accesses:
+        yield address, bool(kind & ACCESS_WRITE)
+
+class _Tap:
+    """Cache que repassa tudo à original e avisa o analisador de cada acesso."""
+
+    def __init__(self, cache, analyzer: StackDistanceAnalyzer):
+        self._cache = cache
+        self._access = analyzer.access
+
+    def read(self, address: int):
+        self._access(address, False)
+        return self._cache.read(address)
+
+    def write_word(self, address: int, value: int) -> bool:
+        self._access(address, True)
+        return self._cache.write_word(address, value)
+
+    def __getattr__(self, name: str):
+        return getattr(self._cache, name)
+
+@contextmanager
+def capture(memory: MemoryManager, analyzer: StackDistanceAnalyzer):
+    """
+    Durante o bloco 'with', cada leitura/escrita do MemoryManager (de qualquer modo de
+    execução: todos consultam a cache exatamente uma vez por acesso) vai ao analisador.
+    """
+    cache = memory.cache
+    memory.cache = _Tap(cache, analyzer)
+    try:
+        yield analyzer
+    finally:
+        memory.cache = cache
+
+# --- Linha de comando ---
+
+def _powers(text: str) -> List[int]:
+    return [int(value, 0) for value in text.split(",") if value]
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.hardware.memory.stack_distance",
+                                     description="Hits/misses LRU de uma grade de caches numa passada por um trace.")
+    parser.add_argument("trace", help="trace binário (TraceWriter)")
+    parser.add_argument("--sizes", type=_powers, default=[16, 32, 64, 128, 256, 512],
+                        help="tamanhos em palavras (ex.: 64,128,256)")
+    parser.add_argument("--ways", type=_powers, default=[1, 2, 4, 8], help="associatividades")
+    parser.add_argument("--blocks", type=_powers, default=[1, 2, 4, 8], help="palavras por bloco")
+    parser.add_argument("-o", "--output", help="CSV de saída (padrão: stdout)")
+    parser.add_argument("--json", help="grava também as séries para gráfico (JSON)")
+    args = parser.parse_args(argv)
+
+    analyzer = StackDistanceAnalyzer(args.sizes, args.ways, args.blocks).feed(trace_accesses(args.trace))
+    out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    try:
+        analyzer.write_csv(out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(analyzer.series(), f, indent=1)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+Modelo de tempo da memória (latências configuráveis e stalls).
+Na simulação o acesso é instantâneo: 'rd' carrega o MBR no mesmo ciclo. No MIC-1 a
+memória é lenta e o firmware segura rd/wr por ciclos seguidos (ex.: 10-11, 21-22,
+30-31) até o dado ficar pronto. Este modelo conta quanto tempo cada operação de memória
+levaria e, quando o firmware não espera o suficiente, os ciclos de stall:
+
+- leitura com hit: hit_latency ciclos;
+- leitura com miss: hit_latency + miss_penalty + block_transfer * palavras do bloco;
+- escrita (write-through, sempre vai à RAM): write_latency ciclos.
+
+Uma operação começa no primeiro ciclo com rd (ou wr) num endereço e continua enquanto
+os ciclos seguintes repetem o sinal no mesmo endereço. Os ciclos que o firmware dá a
+uma operação vêm da Memória de Controle: a sequência de microinstruções com o mesmo
+sinal, por desvios incondicionais, a partir da que iniciou a operação; o stall é a
+latência menos esses ciclos (quando positivo). Os stalls são contabilizados, não
+simulados: o resultado da execução é o mesmo, e o tempo total é ciclos + stalls.
+
+Uso: memory.start_timing(MemoryTiming(...), cpu); cpu.run(...); timing.get_stats().
+check_wait_states() aponta as operações do firmware que não cobrem nem um hit.
+"""
+
+from typing import List, NamedTuple, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from src.hardware.cpu.cpu import CPU
+    from src.hardware.memory.manager import MemoryManager
+
+class WaitState(NamedTuple):
+    mpc: int       # Microinstrução que inicia a operação
+    kind: str      # "rd" ou "wr"
+    provided: int  # Ciclos seguidos com o sinal
+    required: int  # Latência mínima (hit ou escrita)
+
+def _run_lengths(decoded, flag: str) -> List[int]:
+    """Ciclos seguidos com o sinal 'flag' a partir de cada microinstrução (0 se ela não o tem)."""
+    lengths = [0] * len(decoded)
+    for mpc in range(len(decoded)):
+        length = 0
+        current = mpc
+        seen = set()
+        while getattr(decoded[current], flag) and current not in seen:
+            seen.add(current)
+            length += 1
+            if decoded[current].cond != 0:
+                break
+            current = decoded[current].addr
+        lengths[mpc] = length
+    return lengths
+
+def check_wait_states(decoded, hit_latency: int, write_latency: int) -> List[WaitState]:
+    """
+    Operações de memória do firmware com menos ciclos de espera que a latência mínima
+    (hit para rd, escrita para wr). Uma operação começa numa microinstrução com o sinal
+    que não é continuação (desvio incondicional) de outra com o mesmo sinal.
+    """
+    problems = []
+    for flag, required in (("rd", hit_latency), ("wr", write_latency)):
+        lengths = _run_lengths(decoded, flag)
+        continued = {s.addr for s in decoded if getattr(s, flag) and s.cond == 0}
+        for mpc, signals in enumerate(decoded):
+            if getattr(signals, flag) and mpc not in continued and lengths[mpc] < required:
+                problems.append(WaitState(mpc, flag, lengths[mpc], required))
+    return problems
+
+class MemoryTiming:
+    def __init__(self, hit_latency: int = 2, miss_penalty: int = 6, block_transfer: int = 1,
+                 write_latency: int = 2):
+        """
+        Latências em ciclos de clock. O padrão (hit e escrita em 2 ciclos) é o que o
+        firmware padrão espera: ele segura rd/wr por dois ciclos.
+        """
+        if hit_latency < 1 or write_latency < 1 or miss_penalty < 0 or block_transfer < 0:
+            raise ValueError("Latências devem ser >= 1 (hit/escrita) e >= 0 (miss/transferência).")
+        self.hit_latency = hit_latency
+        self.miss_penalty = miss_penalty
+        self.block_transfer = block_transfer
+        self.write_latency = write_latency
+        self.memory: Optional['MemoryManager'] = None
+        self.cpu: Optional['CPU'] = None
+        self._version = -1
+        self.reset_stats()
+
+    def bind(self, memory: 'MemoryManager', cpu: 'CPU'):
+        """Associa o modelo à hierarquia e à CPU medidas (feito por MemoryManager.start_timing)."""
+        self.memory = memory
+        self.cpu = cpu
+        self._version = -1
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Zera os contadores; a região medida passa a começar no ciclo atual."""
+        self.start_cycle = self.cpu.cycles if self.cpu is not None else 0
+        self.instructions = 0
+        self.reads = 0
+        self.read_hits = 0
+        self.read_misses = 0
+        self.writes = 0
+        self.stall_cycles = 0
+        self.short_waits = 0  # Operações que pararam a CPU
+        self._op = None       # (é_escrita, endereço) da operação em curso
+        self._last_cycle = -2
+
+    def miss_latency(self, block_size: int) -> int:
+        return self.hit_latency + self.miss_penalty + self.block_transfer * block_size
+
+    def check_firmware(self) -> List[WaitState]:
+        """check_wait_states() da Memória de Controle da CPU associada, com estas latências."""
+        return check_wait_states(self.cpu.control_unit.control_store.decoded,
+                                 self.hit_latency, self.write_latency)
+
+    def access(self, cycle: int, mpc: int, address: int, write: bool, miss: bool, fetch: bool):
+        """Um acesso do MemoryManager no ciclo 'cycle', feito pela microinstrução 'mpc'."""
+        op = (write, address)
+        if op == self._op and cycle == self._last_cycle + 1:
+            # Mesmo sinal repetido: a operação continua (já contabilizada)
+            self._last_cycle = cycle
+            return
+        self._op = op
+        self._last_cycle = cycle
+
+        store = self.cpu.control_unit.control_store
+        if store.version != self._version:
+            self._provided = (_run_lengths(store.decoded, "rd"), _run_lengths(store.decoded, "wr"))
+            self._version = store.version
+
+        if write:
+            self.writes += 1
+            latency = self.write_latency
+        else:
+            self.reads += 1
+            if fetch:
+                self.instructions += 1  # Cada busca de instrução é uma operação
+            if miss:
+                self.read_misses += 1
+                latency = self.miss_latency(self.memory.cache.block_size)
+            else:
+                self.read_hits += 1
+                latency = self.hit_latency
+        stall = latency - self._provided[write][mpc]
+        if stall > 0:
+            self.stall_cycles += stall
+            self.short_waits += 1
+
+    def get_stats(self) -> dict:
+        """Contadores da região medida, com ciclos totais (com stalls) e CPI."""
+        cycles = self.cpu.cycles - self.start_cycle if self.cpu is not None else 0
+        total = cycles + self.stall_cycles
+        instructions = self.instructions
+        return {
+            "cycles": cycles,
+            "stall_cycles": self.stall_cycles,
+            "total_cycles": total,
+            "instructions": instructions,
+            "cpi": cycles / instructions if instructions else 0.0,
+            "effective_cpi": total / instructions if instructions else 0.0,
+            "reads": self.reads,
+            "read_hits": self.read_hits,
+            "read_misses": self.read_misses,
+            "writes": self.writes,
+            "short_waits": self.short_waits,
+        }
@@ -0,0 +1,89 @@
+"""
+Fonte de estado a partir de um trace gravado (replay), no lugar do hardware ao vivo.
+Reconstrói registradores e memória de qualquer ciclo de um trace com keyframes
+(TraceWriter(..., keyframe_interval=N)) sem executar a CPU: restaura o keyframe mais
+próximo antes do ciclo (busca binária) e reaplica, registro a registro, as escritas
+na memória até ele; os registradores vêm do próprio registro do ciclo.
+
+Avançar a partir da posição atual (reprodução) só reaplica os registros novos. Os
+rascunhos A-F não estão nos registros: mostram o valor do keyframe (o firmware
+padrão não os escreve).
+"""
+
+from bisect import bisect_right
+from typing import Optional
+from src.hardware.cpu.control import ControlSignals, decode_microinstruction
+from src.hardware.cpu.cpu import CPU
+from src.hardware.memory.ram import MainMemory
+from src.hardware.memory.cache import DirectCache
+from src.hardware.memory.manager import MemoryManager
+from src.hardware.trace import TraceError, TraceReader, TraceRecord
+
+class ReplaySource:
+    def __init__(self, path: str):
+        self.reader = TraceReader(path)
+        self._keyframes = self.reader.keyframes()
+        if not self._keyframes or not len(self.reader):
+            self.reader.close()
+            raise TraceError("O trace não tem keyframes (grave com keyframe_interval).")
+        self._key_indices = [index for _, index, _ in self._keyframes]
+
+        # Componentes que guardam o estado mostrado (mesma interface do hardware ao vivo)
+        self._cpu = CPU(MemoryManager(MainMemory(), DirectCache()))
+        self.registers = self._cpu.registers
+        self.ram = self._cpu.memory.ram
+
+        self.index = -1  # Registro mostrado
+        self.record: Optional[TraceRecord] = None
+        self.signals: Optional[ControlSignals] = None
+        self.seek(self.first_cycle)
+
+    @property
+    def first_cycle(self) -> int:
+        return self.reader[0].cycle
+
+    @property
+    def last_cycle(self) -> int:
+        return self.reader[-1].cycle
+
+    @property
+    def cycle(self) -> int:
+        return self.record.cycle
+
+    def seek(self, cycle: int):
+        """Mostra o estado do fim do ciclo 'cycle' (limitado ao trecho gravado)."""
+        index = min(self.reader.index_of(cycle), len(self.reader) - 1)
+        key = bisect_right(self._key_indices, index) - 1
+        start = self._key_indices[key]
+        if not start <= self.index <= index:
+            # Fora do trecho já reconstruído: volta ao keyframe
+            self._cpu.restore(self._keyframes[key][2])
+            self.index = start - 1
+        self._apply(self.index + 1, index + 1)
+
+    def step(self, cycles: int = 1) -> bool:
+        """Avança (ou volta, se negativo) 'cycles' ciclos. False se já estava no limite."""
+        target = min(max(self.cycle + cycles, self.first_cycle), self.last_cycle)
+        if target == self.cycle:
+            return False
+        self.seek(target)
+        return True
+
+    def _apply(self, start: int, stop: int):
+        """Reaplica as escritas na memória dos registros [start, stop) e mostra o último."""
+        write = self.ram.write
+        record = self.record
+        for record in self.reader.records(start, stop):
+            if record.wr:
+                write(record.address, record.mbr)
+        if stop > start:
+            regs = self.registers
+            regs.PC, regs.AC, regs.SP = record.pc, record.ac, record.sp
+            regs.IR, regs.TIR = record.ir, record.tir
+            regs.MAR, regs.MBR = record.mar, record.mbr
+            self.index = stop - 1
+            self.record = record
+            self.signals = decode_microinstruction(record.mir)
+
+    def close(self):
+        self.reader.close()
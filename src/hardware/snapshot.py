@@ -0,0 +1,96 @@
+"""
+Formato binário versionado dos snapshots de estado da máquina.
+Cada componente (CPU, Registers, ControlUnit, MainMemory, DirectCache,
+SetAssociativeCache, MemoryManager)
+gera um contêiner: cabeçalho (assinatura, versão do formato, tipo do componente e
+número de seções) seguido das seções, cada uma prefixada pelo seu tamanho. Os
+subcomponentes entram como seções (o snapshot da CPU contém o dos registradores, da
+unidade de controle e do MemoryManager).
+
+Inteiros em little-endian; memória e registradores como buffers compactos de 16 bits
+(array 'H'), a Memória de Controle como buffer de 32 bits.
+"""
+
+import struct
+import sys
+from array import array
+from typing import Iterable, List
+
+SNAPSHOT_MAGIC = b"MIC1"
+SNAPSHOT_VERSION = 1
+
+_HEADER = struct.Struct("<4sH4sH")  # Assinatura, versão, tipo, número de seções
+_SECTION = struct.Struct("<I")      # Tamanho da seção
+
+class SnapshotError(ValueError):
+    """Snapshot corrompido, de outra versão ou de outro componente."""
+
+def pack_snapshot(kind: bytes, *sections: bytes) -> bytes:
+    """Monta o contêiner de um componente ('kind' tem até 4 bytes, ex.: b"CPU")."""
+    parts = [_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, kind, len(sections))]
+    for section in sections:
+        parts.append(_SECTION.pack(len(section)))
+        parts.append(section)
+    return b"".join(parts)
+
+def unpack_snapshot(data: bytes, kind: bytes) -> List[memoryview]:
+    """Seções de um contêiner (sem cópia), validando assinatura, versão e tipo."""
+    view = memoryview(data)
+    if len(view) < _HEADER.size:
+        raise SnapshotError("Snapshot truncado.")
+    magic, version, found, count = _HEADER.unpack_from(view)
+    if magic != SNAPSHOT_MAGIC:
+        raise SnapshotError("Dados não são um snapshot do MIC-1.")
+    if version != SNAPSHOT_VERSION:
+        raise SnapshotError(f"Versão de snapshot não suportada: {version} (esperada {SNAPSHOT_VERSION}).")
+    found = found.rstrip(b"\0")
+    if found != kind:
+        raise SnapshotError(f"Snapshot de '{found.decode()}', esperado '{kind.decode()}'.")
+
+    sections = []
+    offset = _HEADER.size
+    for _ in range(count):
+        if offset + _SECTION.size > len(view):
+            raise SnapshotError("Snapshot truncado.")
+        (size,) = _SECTION.unpack_from(view, offset)
+        offset += _SECTION.size
+        if offset + size > len(view):
+            raise SnapshotError("Snapshot truncado.")
+        sections.append(view[offset:offset + size])
+        offset += size
+    return sections
+
+def snapshot_kind(data: bytes) -> bytes:
+    """Tipo do componente de um contêiner (sem validar as seções)."""
+    if len(data) < _HEADER.size or bytes(data[:4]) != SNAPSHOT_MAGIC:
+        raise SnapshotError("Dados não são um snapshot do MIC-1.")
+    return _HEADER.unpack_from(data)[2].rstrip(b"\0")
+
+def _pack_array(typecode: str, values: Iterable[int]) -> bytes:
+    packed = array(typecode, values)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+def _unpack_array(typecode: str, buffer) -> array:
+    values = array(typecode)
+    if len(buffer) % values.itemsize:
+        raise SnapshotError("Buffer com tamanho inválido.")
+    values.frombytes(buffer)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+def pack_words(values: Iterable[int]) -> bytes:
+    """Palavras de 16 bits -> buffer compacto."""
+    return _pack_array("H", values)
+
+def unpack_words(buffer) -> List[int]:
+    return _unpack_array("H", buffer).tolist()
+
+def pack_dwords(values: Iterable[int]) -> bytes:
+    """Palavras de 32 bits (microinstruções, tags) -> buffer compacto."""
+    return _pack_array("I", values)
+
+def unpack_dwords(buffer) -> List[int]:
+    return _unpack_array("I", buffer).tolist()
@@ -0,0 +1,277 @@
+"""
+Trace binário de execução (um registro de tamanho fixo por microciclo).
+TraceWriter grava, por um escritor bufferizado, registros compactos com o estado do
+fim de cada ciclo: número do ciclo, MPC/MIR executados, PC, AC, SP, IR, TIR, MAR, MBR,
+flags N/Z, a operação de memória do ciclo (rd/wr) e o seu endereço. A captura pode ser
+limitada a uma janela de ciclos e/ou a um intervalo de PC; antes da janela a CPU anda
+no modo rápido (CPU.run), sem custo de gravação.
+
+Opcionalmente o escritor grava keyframes (CPU.snapshot() a cada N registros) num arquivo
+auxiliar '<trace>.keys', para que o estado completo de qualquer ciclo possa ser
+reconstruído sem simular de novo (ver replay.py).
+
+TraceReader mapeia o arquivo em memória (mmap) e expõe os registros sem carregá-los:
+iteração, acesso por índice, busca binária por número de ciclo e, com NumPy, um
+array estruturado (visão do próprio arquivo).
+
+Formato: cabeçalho de 16 bytes (assinatura, versão, tamanho do registro) seguido dos
+registros, little-endian e sem alinhamento.
+"""
+
+import mmap
+import os
+import struct
+from typing import Iterator, List, NamedTuple, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from src.hardware.cpu.cpu import CPU
+
+TRACE_MAGIC = b"MTRC"
+TRACE_VERSION = 2
+
+_HEADER = struct.Struct("<4sHH8x")  # Assinatura, versão, tamanho do registro
+# Ciclo, MIR, MPC, flags, PC, AC, SP, IR, TIR, MAR, MBR, endereço da operação de memória
+_RECORD = struct.Struct("<QIBBHHHHHHHH")
+
+# Keyframe: ciclo, índice do registro daquele ciclo, tamanho do snapshot (que vem em seguida)
+_KEYFRAME = struct.Struct("<QQI")
+KEYFRAME_SUFFIX = ".keys"
+
+_CHUNK_RECORDS = 4096  # Registros decodificados por vez na iteração
+
+# Bits do campo 'flags'
+FLAG_N, FLAG_Z, FLAG_RD, FLAG_WR = 1, 2, 4, 8
+
+# Mesmo layout, para NumPy (np.dtype(TRACE_DTYPE))
+TRACE_DTYPE = [("cycle", "<u8"), ("mir", "<u4"), ("mpc", "u1"), ("flags", "u1"),
+               ("pc", "<u2"), ("ac", "<u2"), ("sp", "<u2"), ("ir", "<u2"), ("tir", "<u2"),
+               ("mar", "<u2"), ("mbr", "<u2"), ("address", "<u2")]
+
+class TraceRecord(NamedTuple):
+    cycle: int    # Ciclo (0 = primeiro ciclo executado pela CPU)
+    mir: int      # Microinstrução executada
+    mpc: int      # Endereço dela na Memória de Controle
+    flags: int    # FLAG_N | FLAG_Z | FLAG_RD | FLAG_WR
+    pc: int
+    ac: int
+    sp: int
+    ir: int
+    tir: int
+    mar: int
+    mbr: int
+    address: int  # Endereço acessado (MAR) se FLAG_RD/FLAG_WR, senão 0
+
+    @property
+    def n(self) -> bool:
+        return bool(self.flags & FLAG_N)
+
+    @property
+    def z(self) -> bool:
+        return bool(self.flags & FLAG_Z)
+
+    @property
+    def rd(self) -> bool:
+        return bool(self.flags & FLAG_RD)
+
+    @property
+    def wr(self) -> bool:
+        return bool(self.flags & FLAG_WR)
+
+class TraceError(ValueError):
+    """Arquivo que não é um trace (ou de outra versão)."""
+
+class TraceWriter:
+    def __init__(self, path: str, cycles: Optional[Tuple[int, int]] = None,
+                 pc_range: Optional[Tuple[int, int]] = None, buffer_size: int = 1 << 20,
+                 keyframe_interval: Optional[int] = None):
+        """
+        :param cycles: janela [início, fim) de ciclos gravados (None: todos).
+        :param pc_range: intervalo [início, fim) do PC (após o ciclo) gravado (None: todos).
+        :param keyframe_interval: registros entre keyframes (None: sem keyframes). Exige
+            um trace contínuo, então não pode ser combinado com pc_range.
+        """
+        if keyframe_interval is not None and (keyframe_interval <= 0 or pc_range is not None):
+            raise ValueError("keyframe_interval deve ser positivo e não pode ser usado com pc_range.")
+        self.cycles = cycles
+        self.pc_range = pc_range
+        self.keyframe_interval = keyframe_interval
+        self.records = 0
+        self._file = open(path, "wb", buffering=buffer_size)
+        self._file.write(_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, _RECORD.size))
+        self._keys = open(path + KEYFRAME_SUFFIX, "wb") if keyframe_interval else None
+        self._next_keyframe = 0
+
+    def run(self, cpu: 'CPU', max_cycles: int, until_pc: Optional[int] = None) -> int:
+        """
+        Executa até 'max_cycles' ciclos gravando os que caem na janela/intervalo.
+        Para, como CPU.run, no fetch com PC == until_pc, e também no fim da janela de
+        ciclos. Retorna os ciclos executados.
+        """
+        executed = 0
+        if self.cycles is not None:
+            first, end = self.cycles
+            if cpu.cycles < first:
+                # Fora da janela: modo rápido, sem gravar
+                executed = cpu.run(min(max_cycles, first - cpu.cycles), until_pc)
+                if cpu.cycles < first or self._stopped(cpu, until_pc):
+                    return executed
+            max_cycles = min(max_cycles, executed + max(0, end - cpu.cycles))
+
+        control = cpu.control_unit
+        regs = cpu.registers
+        file = regs.file
+        alu = cpu.datapath.alu
+        decoded = control.control_store.decoded
+        write = self._file.write
+        pack = _RECORD.pack
+        low, high = self.pc_range if self.pc_range is not None else (0, 1 << 16)
+        stop_pc = -1 if until_pc is None else until_pc
+        records = 0
+        keys = self._keys
+        try:
+            while executed < max_cycles:
+                cycle = cpu.cycles
+                if keys is not None and self.records + records == self._next_keyframe:
+                    self._keyframe(cpu, self.records + records)
+                mpc = control.MPC
+                cpu.step()
+                executed += 1
+                pc = file[2]
+                if low <= pc < high:
+                    s = decoded[mpc]
+                    flags = (alu.N and FLAG_N) | (alu.Z and FLAG_Z) | (s.rd and FLAG_RD) | (s.wr and FLAG_WR)
+                    write(pack(cycle, control.MIR, mpc, flags, pc, file[4], file[3], file[5], file[6],
+                               file[0], file[1], file[0] if s.rd or s.wr else 0))
+                    records += 1
+                if control.MPC == 0 and pc == stop_pc:
+                    break
+        finally:
+            self.records += records
+        return executed
+
+    @staticmethod
+    def _stopped(cpu: 'CPU', until_pc: Optional[int]) -> bool:
+        return until_pc is not None and cpu.control_unit.MPC == 0 and cpu.registers.PC == until_pc
+
+    def _keyframe(self, cpu: 'CPU', index: int):
+        """Estado completo antes do ciclo do registro 'index'."""
+        data = cpu.snapshot()
+        self._keys.write(_KEYFRAME.pack(cpu.cycles, index, len(data)))
+        self._keys.write(data)
+        self._next_keyframe = index + self.keyframe_interval
+
+    def close(self):
+        self._file.close()
+        if self._keys is not None:
+            self._keys.close()
+
+    def __enter__(self) -> 'TraceWriter':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class TraceReader:
+    def __init__(self, path: str):
+        self._path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Arquivo vazio
+            self._file.close()
+            raise TraceError("Arquivo de trace vazio.") from None
+        if len(self._map) < _HEADER.size:
+            self.close()
+            raise TraceError("Arquivo de trace truncado.")
+        magic, version, size = _HEADER.unpack_from(self._map)
+        if magic != TRACE_MAGIC or version != TRACE_VERSION or size != _RECORD.size:
+            self.close()
+            raise TraceError("Arquivo não é um trace do MIC-1 nesta versão.")
+        self._count = (len(self._map) - _HEADER.size) // _RECORD.size
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> TraceRecord:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("Índice de registro fora do trace.")
+        return TraceRecord._make(_RECORD.unpack_from(self._map, _HEADER.size + index * _RECORD.size))
+
+    def __iter__(self) -> Iterator[TraceRecord]:
+        return self.records()
+
+    def records(self, start: int = 0, stop: Optional[int] = None) -> Iterator[TraceRecord]:
+        """Gerador dos registros [start, stop) (índices, não ciclos)."""
+        stop = self._count if stop is None else min(stop, self._count)
+        make = TraceRecord._make
+        view = memoryview(self._map)
+        try:
+            # Em blocos, para não copiar o arquivo inteiro de uma vez
+            for chunk in range(start, stop, _CHUNK_RECORDS):
+                offset = _HEADER.size + chunk * _RECORD.size
+                end = _HEADER.size + min(chunk + _CHUNK_RECORDS, stop) * _RECORD.size
+                for fields in _RECORD.iter_unpack(view[offset:end]):
+                    yield make(fields)
+        finally:
+            view.release()
+
+    def cycle_at(self, index: int) -> int:
+        return struct.unpack_from("<Q", self._map, _HEADER.size + index * _RECORD.size)[0]
+
+    def index_of(self, cycle: int) -> int:
+        """Índice do primeiro registro com ciclo >= 'cycle' (busca binária)."""
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self.cycle_at(middle) < cycle:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def find(self, cycle: int) -> Optional[TraceRecord]:
+        """Registro do ciclo 'cycle' (None se ele não foi gravado)."""
+        index = self.index_of(cycle)
+        if index < self._count and self.cycle_at(index) == cycle:
+            return self[index]
+        return None
+
+    def keyframes(self) -> List[Tuple[int, int, bytes]]:
+        """Keyframes do arquivo auxiliar: (ciclo, índice do registro, snapshot). [] se não houver."""
+        path = self._path + KEYFRAME_SUFFIX
+        if not os.path.exists(path):
+            return []
+        with open(path, "rb") as f:
+            data = f.read()
+        frames = []
+        offset = 0
+        while offset + _KEYFRAME.size <= len(data):
+            cycle, index, size = _KEYFRAME.unpack_from(data, offset)
+            offset += _KEYFRAME.size
+            if offset + size > len(data):
+                break  # Keyframe incompleto (gravação interrompida)
+            frames.append((cycle, index, data[offset:offset + size]))
+            offset += size
+        return frames
+
+    def to_numpy(self):
+        """Array estruturado (TRACE_DTYPE) sobre o mapeamento, sem cópia. Requer NumPy."""
+        import numpy as np
+        return np.frombuffer(self._map, dtype=np.dtype(TRACE_DTYPE), count=self._count,
+                             offset=_HEADER.size)
+
+    def close(self):
+        """Fecha o arquivo (o mapeamento fica vivo enquanto houver um array de to_numpy())."""
+        try:
+            self._map.close()
+        except BufferError:
+            pass
+        self._file.close()
+
+    def __enter__(self) -> 'TraceReader':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,153 @@
+"""
+Linha de comando do simulador (sem interface gráfica).
+    python -m src run prog.asm --cycles N --until-halt --dump 100:120 --stats
+    python -m src gui
+
+'run' monta o programa, carrega-o no endereço 0 e executa no modo escolhido; ao
+fim imprime o estado final (registradores e as faixas de memória pedidas), os
+ciclos executados, o tempo de parede e os ciclos simulados por segundo. Nada de
+src.gui (nem o tkinter) é importado fora de 'gui', e o próprio simulador só é
+importado depois de os argumentos serem lidos: --stats mostra quanto isso levou.
+
+Parada com --until-halt: o PC sai do código ou chega a uma instrução que salta
+para si mesma (ex.: FIM: JUMP FIM), que não chega a ser executada. Esses PCs vão
+como until_pc para CPU.run(), então o modo escolhido (inclusive o "block") executa
+o programa inteiro.
+"""
+
+import argparse
+import sys
+import time
+from typing import List, Optional, Tuple
+from src.common.utils import halt_pcs
+
+DEFAULT_CYCLES = 10_000_000
+
+# CPU.MODES, repetido para não importar a CPU antes de ler os argumentos
+MODES = ("micro", "functional", "compiled", "routine", "block")
+
+def _number(text: str) -> int:
+    return int(text, 0)
+
+def _dump_range(text: str) -> Tuple[int, int]:
+    """"INÍCIO:FIM" (inclusive) ou só "ENDEREÇO"."""
+    start, _, end = text.partition(":")
+    start = _number(start)
+    end = _number(end) if end else start
+    if end < start:
+        raise argparse.ArgumentTypeError(f"faixa vazia: {text}")
+    return start, end
+
+def _format_dump(ram, start: int, end: int) -> List[str]:
+    words = ram.dump(start, end - start + 1)
+    lines = []
+    for offset in range(0, len(words), 8):
+        row = " ".join(f"{word:04X}" for word in words[offset:offset + 8])
+        lines.append(f"  {start + offset:04X}: {row}")
+    return lines
+
+def run_command(args: argparse.Namespace) -> int:
+    started = time.perf_counter()
+    from src.assembler.parser import AssemblyParser, AssemblerError
+    from src.assembler.codegen import CodeGenerator
+    from src.hardware.memory.ram import MainMemory
+    from src.hardware.memory.cache import DirectCache
+    from src.hardware.memory.manager import MemoryManager
+    from src.hardware.cpu.cpu import CPU
+    import_time = time.perf_counter() - started
+
+    try:
+        with open(args.program, encoding="utf-8") as f:
+            source = f.read()
+        codegen = CodeGenerator()
+        program = codegen.generate(AssemblyParser().parse(source))
+    except (OSError, AssemblerError, ValueError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+
+    cpu = CPU(MemoryManager(MainMemory(), DirectCache()))
+    cpu.set_mode(args.mode)
+    cpu.memory.ram.load_program(program)
+    halts = halt_pcs(program)
+    ram_size = cpu.memory.ram.size
+    for first, last in args.dumps:
+        if last >= ram_size:
+            print(f"Erro: faixa {first}:{last} passa do fim da RAM ({ram_size} palavras)", file=sys.stderr)
+            return 1
+    breakpoints = None
+    if args.breaks:
+        from src.hardware.cpu.breakpoints import Breakpoints
+        breakpoints = Breakpoints()
+        try:
+            for spec in args.breaks:
+                breakpoints.add_spec(spec, codegen.symbol_table)
+        except ValueError as e:
+            print(f"Erro: {e}", file=sys.stderr)
+            return 1
+        cpu.set_breakpoints(breakpoints)
+
+    start = time.perf_counter()
+    try:
+        cycles = cpu.run(args.cycles, until_pc=halts if args.until_halt else None)
+    except ValueError as e:
+        print(f"Erro de execução no ciclo {cpu.cycles}: {e}", file=sys.stderr)
+        return 1
+    wall = time.perf_counter() - start
+
+    hit = breakpoints.hit if breakpoints is not None else None
+    halted = args.until_halt and cpu.control_unit.MPC == 0 and cpu.registers.PC in halts
+    if halted:
+        reason = f"halt (PC {cpu.registers.PC})"
+    elif hit is not None:
+        reason = f"breakpoint {hit.kind} {hit.detail or hit.value}"
+    else:
+        reason = "limite de ciclos"
+
+    print(f"Programa: {args.program} ({len(program)} palavras, modo {args.mode})")
+    print(f"Parada: {reason}")
+    state = cpu.registers.debug_state()
+    print("Registradores: " + " ".join(f"{name}={value:04X}" for name, value in state.items()))
+    for first, last in args.dumps:
+        print(f"Memória {first:04X}-{last:04X}:")
+        print("\n".join(_format_dump(cpu.memory.ram, first, last)))
+    rate = cycles / wall if wall > 0 else 0.0
+    print(f"Ciclos: {cycles}")
+    print(f"Tempo: {wall:.4f} s ({rate / 1e6:.2f} M ciclos/s)")
+    if args.stats:
+        cache = cpu.memory.get_stats()
+        total = cache["hits"] + cache["misses"]
+        print(f"Cache: {cache['hits']} hits, {cache['misses']} misses "
+              f"({100 * cache['hits'] / total if total else 0.0:.1f}% de acerto)")
+        print(f"Importação do simulador: {import_time * 1000:.1f} ms")
+    return 2 if args.until_halt and not halted else 0
+
+def gui_command(args: argparse.Namespace) -> int:
+    from src.gui.app import Mic1SimulatorApp
+    Mic1SimulatorApp().mainloop()
+    return 0
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src", description="Simulador MIC-1 / MAC-1.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="monta e executa um programa sem interface gráfica")
+    run.add_argument("program", help="código-fonte MAC-1 (.asm)")
+    run.add_argument("--cycles", type=_number, default=DEFAULT_CYCLES, help="limite de microciclos")
+    run.add_argument("--until-halt", action="store_true",
+                     help="para quando o PC sai do código ou chega a um JUMP para si mesmo")
+    run.add_argument("--dump", dest="dumps", action="append", type=_dump_range, default=[],
+                     metavar="INÍCIO:FIM", help="faixa de memória impressa ao fim (inclusive)")
+    run.add_argument("--break", dest="breaks", action="append", default=[], metavar="SPEC",
+                     help="breakpoint (ex.: LOOP, 'LOOP if AC == 0', 'mpc 70', 'mem 100:120')")
+    run.add_argument("--mode", choices=MODES, default="block")
+    run.add_argument("--stats", action="store_true", help="estatísticas da cache e tempo de importação")
+    run.set_defaults(handler=run_command)
+
+    gui = commands.add_parser("gui", help="abre a interface gráfica (Tkinter)")
+    gui.set_defaults(handler=gui_command)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
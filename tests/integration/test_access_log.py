@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+from src.hardware.memory.cache import DirectCache, SetAssociativeCache
+from src.hardware.memory.access_log import (ACCESS_FETCH, ACCESS_WRITE, AccessLog, AccessLogError,
+                                            read_access_log, replay)
+from src.hardware.memory.stack_distance import StackDistanceAnalyzer, log_accesses
+from src.hardware.cpu.cpu import CPU
+from tests.machines import stack_sum_cpu
+
+def expected_accesses(cycles):
+    """(ciclo, endereço, tipo) de cada acesso, via CPU.step() e os sinais de cada ciclo."""
+    cpu = stack_sum_cpu()
+    accesses = []
+    for _ in range(cycles):
+        mpc = cpu.control_unit.MPC
+        signals = cpu.control_unit.control_store.decoded[mpc]
+        cycle = cpu.cycles
+        cpu.step()
+        if signals.rd:
+            accesses.append((cycle, cpu.registers.MAR, ACCESS_FETCH if mpc in (0, 1) else 0))
+        if signals.wr:
+            accesses.append((cycle, cpu.registers.MAR, ACCESS_WRITE))
+    return accesses
+
+class TestAccessLog(unittest.TestCase):
+    def test_records_exact_cycles_in_any_mode(self):
+        """Gravando, qualquer modo registra os mesmos acessos de CPU.step(), e o resultado não muda."""
+        expected = expected_accesses(3000)
+        plain = stack_sum_cpu()
+        plain.run(3000)
+        for mode in CPU.MODES:
+            cpu = stack_sum_cpu()
+            cpu.set_mode(mode)
+            log = AccessLog()
+            cpu.memory.start_recording(log, cpu)
+            self.assertEqual(cpu.run(3000), 3000)
+            self.assertIs(cpu.memory.stop_recording(), log)
+            self.assertEqual(list(log), expected, mode)
+            self.assertEqual(cpu.registers.debug_state(), plain.registers.debug_state(), mode)
+            self.assertEqual(cpu.memory.get_stats(), plain.memory.get_stats(), mode)
+            self.assertNotIn("read", vars(cpu.memory))  # Desligada: métodos da classe
+
+    def test_ring_keeps_most_recent(self):
+        cpu = stack_sum_cpu()
+        log = AccessLog(capacity=100)
+        cpu.memory.start_recording(log, cpu)
+        cpu.run(3000)
+        self.assertEqual(len(log), 100)
+        self.assertEqual(list(log), expected_accesses(3000)[-100:])
+        self.assertEqual(log.total, len(expected_accesses(3000)))
+
+    def test_disk_log_and_replay(self):
+        """Log em disco + replay sem CPU: mesmas estatísticas da cache da execução."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "prog.macc")
+            cpu = stack_sum_cpu()
+            cpu.set_mode("block")
+            with AccessLog(path=path) as log:
+                cpu.memory.start_recording(log, cpu)
+                cpu.run(20_000)
+                cpu.memory.stop_recording()
+            accesses = list(read_access_log(path))
+            self.assertEqual(accesses, expected_accesses(20_000))
+
+            stats = replay(accesses, DirectCache())
+            self.assertEqual((stats["hits"], stats["misses"]),
+                             (cpu.memory.get_stats()["hits"], cpu.memory.get_stats()["misses"]))
+            self.assertEqual(stats["reads"] + stats["fetches"], stats["hits"] + stats["misses"])
+
+            # Só dados, numa cache associativa, e a mesma contagem pela análise de pilha
+            data_only = [a for a in accesses if not a[2] & ACCESS_FETCH]
+            stats = replay(accesses, SetAssociativeCache(4, 2, 4), fetches=False)
+            self.assertEqual(stats["fetches"], 0)
+            analyzer = StackDistanceAnalyzer([32], [2], [4]).feed(log_accesses(data_only))
+            self.assertEqual(analyzer.results()[0]["misses"], stats["misses"])
+
+            with open(path, "wb") as f:
+                f.write(b"nada")
+            with self.assertRaises(AccessLogError):
+                list(read_access_log(path))
+
+if __name__ == '__main__':
+    unittest.main()
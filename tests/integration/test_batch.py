@@ -0,0 +1,132 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from src.batch import BatchJob, load_jobs, main, run_batch, run_job
+
+SOMA = """
+; Soma os valores em 100 e 101 e guarda em 102
+LODD 100
+ADDD 101
+STOD 102
+"""
+
+CONTA = """
+; Decrementa 100 até zero, contando as voltas em 101
+LOOP: LODD 100
+      JZER FIM
+      SUBD 103
+      STOD 100
+      LODD 101
+      ADDD 103
+      STOD 101
+      JUMP LOOP
+FIM:  LODD 101
+"""
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        for name, source in (("soma", SOMA), ("conta", CONTA), ("erro", "LODX 1\n")):
+            with open(os.path.join(self.dir, f"{name}.asm"), "w") as f:
+                f.write(source)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.dir, name)
+
+    def test_run_job_reports_state(self):
+        """Resultado: registradores, intervalos de memória, ciclos e estatísticas da cache."""
+        job = BatchJob("soma", self.path("soma.asm"), memory=[{"start": 100, "words": [15, 25]}],
+                       ranges=[(100, 3)])
+        result = run_job(job)
+
+        self.assertTrue(result["halted"])
+        self.assertEqual(result["memory"], {"100": [15, 25, 40]})
+        self.assertEqual(result["registers"]["AC"], 40)
+        self.assertEqual(result["registers"]["PC"], 3)
+        self.assertGreater(result["cycles"], 0)
+        self.assertEqual(set(result["cache"]), {"hits", "misses"})
+
+    def test_modes_agree(self):
+        """O modo de execução não muda o resultado."""
+        results = [run_job(BatchJob("conta", self.path("conta.asm"), mode=mode, ranges=[(100, 4)],
+                                    memory=[{"start": 100, "words": [5, 0, 0, 1]}]))
+                   for mode in ("micro", "block")]
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0]["registers"]["AC"], 5)
+
+    def test_errors_are_reported(self):
+        result = run_job(BatchJob("erro", self.path("erro.asm")))
+        self.assertIn("LODX", result["error"])
+        result = run_job(BatchJob("falta", self.path("falta.asm")))
+        self.assertIn("error", result)
+
+    def test_self_jump_halts(self):
+        """Sem until_pc, 'FIM: JUMP FIM' também é parada (como o --until-halt da CLI)."""
+        with open(self.path("fim.asm"), "w") as f:
+            f.write(CONTA.replace("FIM:  LODD 101", "FIM:  JUMP FIM"))
+        result = run_job(BatchJob("fim", self.path("fim.asm"), memory=[{"start": 100, "words": [3, 0, 0, 1]}]))
+        self.assertTrue(result["halted"])
+        self.assertEqual(result["registers"]["PC"], 8)
+        self.assertLess(result["cycles"], 1000)
+
+    def test_malformed_entries_become_errors(self):
+        """Entradas malformadas do manifesto viram resultados com 'error'; as outras rodam."""
+        manifest = {"jobs": [
+            {"name": "sem-fonte"},
+            {"source": "soma.asm", "memory": [{"start": 100}]},
+            "soma.asm",
+            {"name": "ok", "source": "soma.asm", "memory": [{"start": 100, "words": [1, 2]}]},
+        ]}
+        with open(self.path("turma.json"), "w") as f:
+            json.dump(manifest, f)
+        results = list(run_batch(load_jobs(self.path("turma.json")), workers=1))
+        self.assertEqual([("error" in r) for r in results], [True, True, True, False])
+        self.assertEqual([r["name"] for r in results[:3]], ["sem-fonte", "soma.asm", "job 2"])
+        self.assertIn("KeyError", results[0]["error"])
+        self.assertEqual(results[3]["registers"]["AC"], 3)
+
+    def test_manifest_and_pool(self):
+        """Manifesto com imagens por job, executado em processos separados."""
+        with open(self.path("entrada.json"), "w") as f:
+            json.dump([{"start": "0x64", "words": [7, 0, 0, 1]}], f)
+        manifest = {
+            "defaults": {"ranges": [[100, 2]]},
+            "jobs": [
+                {"source": "conta.asm", "memory": "entrada.json"},
+                {"name": "soma-a", "source": "soma.asm", "memory": [{"start": 100, "words": [1, 2]}]},
+                {"name": "soma-b", "source": "soma.asm", "memory": [{"start": 100, "words": [3, 4]}],
+                 "ranges": [[102, 1]]},
+            ],
+        }
+        with open(self.path("turma.json"), "w") as f:
+            json.dump(manifest, f)
+
+        results = {r["name"]: r for r in run_batch(load_jobs(self.path("turma.json")), workers=2)}
+        self.assertEqual(results["conta"]["memory"], {"100": [0, 7]})
+        self.assertEqual(results["soma-a"]["registers"]["AC"], 3)
+        self.assertEqual(results["soma-b"]["memory"], {"102": [7]})
+
+    def test_cli_streams_json_lines(self):
+        """Diretório inteiro pela linha de comando: uma linha JSON por programa."""
+        with open(self.path("dados.json"), "w") as f:
+            json.dump({"start": 100, "words": [2, 3, 0, 1]}, f)
+        out = io.StringIO()
+        with redirect_stdout(out):
+            status = main([self.dir, "--memory", self.path("dados.json"), "--range", "100:3",
+                           "--workers", "1"])
+
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(status, 1)  # erro.asm não monta
+        self.assertEqual([r["name"] for r in lines], ["conta", "erro", "soma"])
+        self.assertEqual(lines[2]["memory"], {"100": [2, 3, 5]})
+        self.assertEqual(lines[0]["registers"]["AC"], 5)  # 3 + 2 voltas
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from benchmarks.bench_suite import compare, main, run_suite, workloads
+
+class TestBenchmarkSuite(unittest.TestCase):
+    def test_workloads_agree_on_every_path(self):
+        """Resultados conferidos e ciclos iguais aos da referência em cada caminho (escala mínima)."""
+        record = run_suite(scale=0.02, repeat=1, memory=False,
+                           paths=["step", "micro", "functional", "routine", "block", "batch"])
+        self.assertEqual(list(record["results"]), [workload.name for workload in workloads()])
+        for name, paths in record["results"].items():
+            cycles = {sample["cycles"] for sample in paths.values()}
+            self.assertEqual(len(cycles), 1, name)
+            for sample in paths.values():
+                self.assertGreater(sample["instructions"], 0)
+                self.assertGreater(sample["cycles_per_s"], sample["instructions_per_s"])
+        json.dumps(record)
+
+        record = run_suite(scale=0.02, repeat=1, names=["recursion"], paths=["micro"])
+        self.assertGreater(record["results"]["recursion"]["micro"]["peak_bytes"], 0)
+
+    def test_compare_gates_regressions(self):
+        def record(rate):
+            return {"timestamp": "t", "commit": None,
+                    "results": {"counting": {"micro": {"cycles_per_s": rate}}}}
+        self.assertFalse(compare(record(100.0), record(95.0), 0.10)[0]["regressed"])
+        self.assertTrue(compare(record(100.0), record(85.0), 0.10)[0]["regressed"])
+
+        handle, path = tempfile.mkstemp(suffix=".jsonl")
+        self.addCleanup(os.remove, path)
+        with os.fdopen(handle, "w") as f:
+            for rate in (100.0, 120.0, 104.0):
+                f.write(json.dumps(record(rate)) + "\n")
+        with redirect_stdout(io.StringIO()) as out:
+            self.assertEqual(main(["--history", path, "compare"]), 1)            # 120 -> 104
+            self.assertEqual(main(["--history", path, "compare", "--baseline", "0"]), 0)
+        self.assertIn("REGRESSÃO", out.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
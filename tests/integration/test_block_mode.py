@@ -0,0 +1,144 @@
+import random
+import unittest
+from src.common.utils import halt_pcs
+from src.hardware.cpu.cpu import CPU
+from tests.machines import assemble, build_cpu, machine_state, random_program
+
+SUM_LOOP = """
+        LOCO 10
+        STOD 200
+        LOCO 0
+        STOD 201
+LOOP:   LODD 200
+        JZER END
+        ADDD 201
+        STOD 201
+        LODD 200
+        SUBD 202
+        STOD 200
+        JUMP LOOP
+END:    JUMP END
+"""
+
+class TestBlockMode(unittest.TestCase):
+
+    def test_loop_reuses_blocks(self):
+        program = assemble(SUM_LOOP)[0]
+        micro = build_cpu(program)
+        block = build_cpu(program)
+        block.set_mode("block")
+        for cpu in (micro, block):
+            cpu.memory.write(202, 1)
+
+        self.assertEqual(block.run(5000, until_pc=12), micro.run(5000, until_pc=12))
+        self.assertEqual(machine_state(block), machine_state(micro))
+        self.assertEqual(block.memory.read(201), 55)
+
+        stats = block.engine("block").get_stats()
+        self.assertGreater(stats["hits"], stats["misses"])
+        self.assertEqual(stats["invalidations"], 0)
+
+    def test_matches_micro_mode_exactly(self):
+        rng = random.Random(31337)
+        for _ in range(30):
+            program = random_program(rng)
+            micro = build_cpu(program)
+            block = build_cpu(program)
+            block.set_mode("block")
+            for cpu in (micro, block):
+                cpu.registers.SP = 0x4000
+
+            for budget in (97, 250, 1, 400, 3000):
+                self.assertEqual(block.run(budget), micro.run(budget))
+                self.assertEqual(machine_state(block), machine_state(micro))
+
+    def test_stop_on_pc_inside_block(self):
+        program = assemble(SUM_LOOP)[0]
+        micro = build_cpu(program)
+        block = build_cpu(program)
+        block.set_mode("block")
+        for cpu in (micro, block):
+            cpu.memory.write(202, 1)
+            cpu.run(60)  # Blocos já traduzidos antes de pedir a parada
+
+        # PC = 8 é o meio do bloco que começa em 6 (ADDD 201 ... JUMP LOOP)
+        self.assertEqual(block.run(5000, until_pc=8), micro.run(5000, until_pc=8))
+        self.assertEqual(machine_state(block), machine_state(micro))
+
+    def test_stop_on_pc_set(self):
+        """until_pc com os PCs de parada (halt_pcs): todos os modos param igual, e o "block" executa blocos."""
+        for source, halt in ((SUM_LOOP, 12), ("LOCO 7\nJUMP 50\n", 50)):
+            program = assemble(source)[0]
+            halts = halt_pcs(program)
+            reference = build_cpu(program)
+            reference.memory.write(202, 1)
+            cycles = reference.run(5000, until_pc=halts)
+            self.assertEqual(reference.registers.PC, halt)
+            for mode in CPU.MODES:
+                cpu = build_cpu(program)
+                cpu.set_mode(mode)
+                cpu.memory.write(202, 1)
+                self.assertEqual(cpu.run(5000, until_pc=halts), cycles, mode)
+                self.assertEqual(machine_state(cpu), machine_state(reference), mode)
+                if mode == "block":
+                    self.assertGreater(cpu.engine("block").instructions, 0)
+
+    def test_self_modifying_code_invalidates_block(self):
+        """STOD sobrescreve a instrução seguinte do próprio bloco: o bloco sai e é retraduzido."""
+        program = [
+            (0 << 12) | 10,   # 0: LODD 10   (palavra "LOCO 7")
+            (1 << 12) | 2,    # 1: STOD 2    sobrescreve a instrução 2
+            (7 << 12) | 1,    # 2: LOCO 1    (vira LOCO 7)
+            (1 << 12) | 11,   # 3: STOD 11
+            (6 << 12) | 4,    # 4: JUMP 4
+            0, 0, 0, 0, 0,
+            (7 << 12) | 7,    # 10: dado
+        ]
+        micro = build_cpu(program)
+        block = build_cpu(program)
+        block.set_mode("block")
+
+        self.assertEqual(block.run(2000, until_pc=4), micro.run(2000, until_pc=4))
+        self.assertEqual(machine_state(block), machine_state(micro))
+        self.assertEqual(block.memory.read(11), 7)
+        self.assertGreaterEqual(block.engine("block").invalidations, 1)
+
+    def test_self_modifying_loop_keeps_covering_bounded(self):
+        """Laço que reescreve o próprio código: blocos mortos saem de todos os endereços cobertos."""
+        program = [
+            (0 << 12) | 10,   # 0: LODD 10   (palavra "LOCO 1")
+            (1 << 12) | 3,    # 1: STOD 3    reescreve a instrução 3 (mesmo valor)
+            (7 << 12) | 2,    # 2: LOCO 2
+            (7 << 12) | 1,    # 3: LOCO 1
+            (6 << 12) | 0,    # 4: JUMP 0
+            0, 0, 0, 0, 0,
+            (7 << 12) | 1,    # 10: dado
+        ]
+        micro = build_cpu(program)
+        block = build_cpu(program)
+        block.set_mode("block")
+
+        self.assertEqual(block.run(50_000), micro.run(50_000))
+        self.assertEqual(machine_state(block), machine_state(micro))
+        engine = block.engine("block")
+        self.assertGreater(engine.invalidations, 1000)
+        self.assertLessEqual(max(len(blocks) for blocks in engine._covering.values()), 2)
+        live = set(map(id, engine._blocks.values()))
+        for blocks in engine._covering.values():
+            self.assertTrue(all(id(item) in live for item in blocks))
+
+    def test_load_program_invalidates_block(self):
+        program = [(7 << 12) | 1, (6 << 12) | 0]  # LOCO 1; JUMP 0
+        block = build_cpu(program)
+        block.set_mode("block")
+        block.run(100)
+        self.assertEqual(block.registers.AC, 1)
+
+        block.memory.ram.load_program([(7 << 12) | 2])
+        block.run(100)
+
+        self.assertEqual(block.registers.AC, 2)
+        self.assertEqual(block.engine("block").invalidations, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+from src.hardware.cpu.cpu import CPU
+from src.hardware.cpu.breakpoints import Breakpoints, Condition, Hit
+from src.hardware.cpu.journal import ExecutionJournal
+from src.hardware.cpu.coverage import MicrocodeCoverage
+from src.hardware.cpu.perf import PerfCounters
+from src.hardware.cpu.profiler import Profiler
+from tests.machines import assemble, assembled_cpu
+
+# Soma 10..1 em 201 (contador em 200)
+PROGRAM = """
+LOOP:   LODD 200
+        JZER FIM
+        ADDD 201
+        STOD 201
+        LODD 200
+        SUBD 202
+        STOD 200
+        JUMP LOOP
+FIM:    JUMP FIM
+"""
+
+def build_cpu(mode="micro"):
+    cpu = assembled_cpu(PROGRAM, [10, 0, 1], sp=None)
+    cpu.set_mode(mode)
+    breakpoints = Breakpoints()
+    cpu.set_breakpoints(breakpoints)
+    return cpu, breakpoints, assemble(PROGRAM)[1]
+
+def first_access(addresses, write, limit=10_000):
+    """Ciclo (contado após o ciclo) do primeiro rd/wr num dos 'addresses', via CPU.step()."""
+    cpu, _, _ = build_cpu()
+    while cpu.cycles < limit:
+        signals = cpu.control_unit.control_store.decoded[cpu.control_unit.MPC]
+        cpu.step()
+        if (signals.wr if write else signals.rd) and cpu.registers.MAR in addresses:
+            return cpu.cycles
+    return None
+
+class TestBreakpoints(unittest.TestCase):
+    def test_pc_and_mpc_match_run_stops(self):
+        for mode in CPU.MODES:
+            cpu, breakpoints, symbols = build_cpu(mode)
+            breakpoints.add_pc(symbols["FIM"])
+            cycles = cpu.run(100_000)
+            reference, _, _ = build_cpu()
+            self.assertEqual(cycles, reference.run(100_000, until_pc=symbols["FIM"]), mode)
+            self.assertEqual(breakpoints.hit, Hit("pc", symbols["FIM"], cycles))
+            self.assertEqual(cpu.registers.debug_state(), reference.registers.debug_state())
+
+            cpu, breakpoints, _ = build_cpu(mode)
+            breakpoints.add_mpc(128)  # JZER tomado
+            reference, _, _ = build_cpu()
+            self.assertEqual(cpu.run(100_000), reference.run(100_000, until_mpc=128))
+            self.assertEqual(breakpoints.hit.kind, "mpc")
+            self.assertEqual(cpu.control_unit.MPC, 128)
+
+    def test_conditional_and_register(self):
+        cpu, breakpoints, symbols = build_cpu()
+        breakpoints.add_pc(symbols["LOOP"], Condition("AC", "==", 7))
+        cpu.run(100_000)
+        self.assertEqual(breakpoints.hit.kind, "pc")
+        self.assertEqual((cpu.registers.PC, cpu.registers.AC), (symbols["LOOP"], 7))
+
+        cpu, breakpoints, symbols = build_cpu()
+        breakpoints.add_register("AC", 19)  # 10 + 9
+        cpu.run(100_000)
+        self.assertEqual(breakpoints.hit[:2], ("register", 19))
+        self.assertEqual(breakpoints.hit.detail, "AC")
+        self.assertEqual(cpu.control_unit.MPC, 0)
+        self.assertEqual(cpu.registers.AC, 19)
+
+    def test_memory_watchpoints(self):
+        for write in (False, True):
+            cpu, breakpoints, _ = build_cpu("block")
+            breakpoints.add_watch(201, 202, read=not write, write=write)
+            cycles = cpu.run(100_000)
+            expected = first_access((201, 202), write)
+            self.assertEqual(cycles, expected)
+            self.assertEqual(breakpoints.hit.kind, "write" if write else "read")
+
+    def test_other_loops_and_journal(self):
+        """Com contadores e cobertura (no mesmo laço), profiler ou pelo histórico da GUI (check()), as mesmas paradas."""
+        cpu, breakpoints, symbols = build_cpu()
+        breakpoints.add_watch(201, write=True, read=False)
+        reference = cpu.run(100_000)
+
+        for attach in ("counters", "profiler", "journal"):
+            cpu, breakpoints, _ = build_cpu()
+            breakpoints.add_watch(201, write=True, read=False)
+            if attach == "counters":
+                cpu.start_counters(PerfCounters())
+                cpu.start_coverage(MicrocodeCoverage())
+                cycles = cpu.run(100_000)
+                self.assertEqual(cpu.counters.cycles, cycles)
+                self.assertEqual(sum(cpu.coverage.executions), cycles)
+            elif attach == "profiler":
+                cpu.start_profiler(Profiler())
+                cycles = cpu.run(100_000)
+                self.assertEqual(cpu.profiler.total_cycles, cycles)
+            else:
+                cycles = ExecutionJournal(cpu).run(100_000, until=breakpoints.check)
+            self.assertEqual(cycles, reference, attach)
+            self.assertEqual(breakpoints.hit.kind, "write")
+
+    def test_disarmed_and_specs(self):
+        cpu, breakpoints, symbols = build_cpu("block")
+        self.assertFalse(breakpoints.armed)
+        self.assertEqual(cpu.run(5000), 5000)
+        self.assertIsNone(breakpoints.hit)
+
+        breakpoints.add_spec("FIM", symbols)
+        breakpoints.add_spec("LOOP if AC == 3", symbols)
+        breakpoints.add_spec("mpc 128")
+        breakpoints.add_spec("AC = 5")
+        breakpoints.add_spec("write 0x100:0x10F")
+        self.assertTrue(breakpoints.armed)
+        self.assertEqual(breakpoints.conditions, {0: [Condition("AC", "==", 3)]})
+        self.assertEqual(breakpoints.watch[0x105], 2)
+        for spec in ("FIM", "LOOP", "mpc 128", "AC = 5", "mem 0x100:0x10F"):
+            breakpoints.remove_spec(spec, symbols)
+        self.assertFalse(breakpoints.armed)
+        for bad in ("NADA", "LOOP if XYZ == 1", "mem 10:5"):
+            with self.assertRaises(ValueError):
+                breakpoints.add_spec(bad, symbols)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+import random
+from array import array
+import unittest
+from src.hardware.memory.ram import MainMemory
+from src.hardware.memory.cache import DirectCache, SetAssociativeCache, REPLACEMENT_POLICIES
+from src.hardware.memory.manager import MemoryManager
+from src.hardware.cpu.cpu import CPU
+from tests.machines import stack_sum_cpu
+
+def access_stream(seed, count=3000, size=1024):
+    """Leituras e escritas com alguma localidade (laços sobre poucas regiões)."""
+    rng = random.Random(seed)
+    stream = []
+    for _ in range(count):
+        base = rng.choice((0, 64, 128, 512, 900))
+        stream.append((rng.random() < 0.2, (base + rng.randrange(48)) % size, rng.randrange(1 << 16)))
+    return stream
+
+def replay(cache, stream):
+    mmu = MemoryManager(MainMemory(1024), cache)
+    values = [mmu.write(a, v) if is_write else mmu.read(a) for is_write, a, v in stream]
+    return values, mmu.get_stats()
+
+class TestCacheGeometry(unittest.TestCase):
+    def test_decode_follows_geometry(self):
+        """Offset, índice e tag vêm de block_size e size_lines (não de 4 e 16 fixos)."""
+        cache = DirectCache(size_lines=8, block_size=8)
+        self.assertEqual(cache._decode_address(0b1011_101_110), (0b1011, 0b101, 0b110))
+        cache = DirectCache(size_lines=32, block_size=2)
+        self.assertEqual(cache._decode_address(0b111_10101_1), (0b111, 0b10101, 1))
+        with self.assertRaises(ValueError):
+            DirectCache(size_lines=12)
+
+    def test_non_default_geometry_has_no_aliasing(self):
+        """Com 8 linhas de 8 palavras, blocos de índices diferentes não se expulsam."""
+        mmu = MemoryManager(MainMemory(1024), DirectCache(size_lines=8, block_size=8))
+        for address in range(0, 64):
+            mmu.read(address)
+        for address in range(0, 64):
+            mmu.read(address)
+        self.assertEqual(mmu.get_stats(), {"hits": 120, "misses": 8})
+
+    def test_block_fill_copies_from_ram_pages(self):
+        """Blocos vêm direto das páginas da RAM (inclusive cruzando páginas e após o fim)."""
+        ram = MainMemory(300)
+        ram.load_program(list(range(1, 301)))
+        cache = DirectCache(size_lines=4, block_size=64)
+        line = cache.fill_block(256, ram)  # Passa do fim da RAM: completa com 0
+        self.assertEqual(cache.data[line:line + 64].tolist(), list(range(257, 301)) + [0] * 20)
+        cache.data[0:64] = array('H', [0xFFFF]) * 64
+        ram.copy_block(224, 64, cache.data, 0)  # Cruza a fronteira de página (256)
+        self.assertEqual(cache.data[0:64].tolist(), list(range(225, 289)))
+        self.assertEqual(ram.read_block(296, 8), [297, 298, 299, 300, 0, 0, 0, 0])
+
+    def test_out_of_range_words_are_masked(self):
+        """Valores fora de 16 bits: cache e RAM guardam a mesma palavra mascarada (sem OverflowError)."""
+        for cache in (DirectCache(), SetAssociativeCache(4, 2, 4, "lru")):
+            mmu = MemoryManager(MainMemory(), cache)
+            mmu.read(100)
+            mmu.write(100, -1)
+            mmu.write(101, 0x12345)
+            self.assertEqual([mmu.read(100), mmu.read(101)], [0xFFFF, 0x2345])
+            self.assertEqual(mmu.ram.dump(100, 2), [0xFFFF, 0x2345])
+            cache.load_block(200, [-1, 0x10000, 2, 3])
+            self.assertEqual(mmu.read(200), 0xFFFF)
+            self.assertEqual(mmu.read(201), 0)
+
+class TestSetAssociativeCache(unittest.TestCase):
+    def test_one_way_matches_direct_mapped(self):
+        """ways=1 é mapeamento direto: mesmos valores e mesmas estatísticas."""
+        stream = access_stream(1)
+        for policy in REPLACEMENT_POLICIES:
+            self.assertEqual(replay(SetAssociativeCache(16, 1, 4, policy), stream),
+                             replay(DirectCache(16, 4), stream), policy)
+
+    def test_values_match_ram_for_every_policy(self):
+        """A cache nunca muda o resultado: toda leitura devolve o conteúdo da RAM."""
+        stream = access_stream(2)
+        reference, _ = replay(DirectCache(), stream)
+        for policy in REPLACEMENT_POLICIES:
+            values, stats = replay(SetAssociativeCache(4, 4, 4, policy, seed=7), stream)
+            self.assertEqual(values, reference, policy)
+            self.assertEqual(stats["hits"] + stats["misses"], sum(not w for w, _, _ in stream))
+
+    def test_victims(self):
+        """Conjunto único de 4 vias: o bloco expulso por cada política após A B C D, A, E."""
+        expected = {"lru": 1, "fifo": 0, "plru": 2}
+        for policy, victim in expected.items():
+            cache = SetAssociativeCache(1, 4, 4, policy)
+            mmu = MemoryManager(MainMemory(1024), cache)
+            for block in (0, 1, 2, 3, 0, 4):
+                mmu.read(block * 4)
+            self.assertEqual(mmu.get_stats(), {"hits": 1, "misses": 5}, policy)
+            self.assertEqual(set(cache.tags), {0, 1, 2, 3, 4} - {victim}, policy)
+
+    def test_refill_of_resident_block_keeps_fifo_order(self):
+        """Recarregar um bloco residente não move o ponteiro FIFO: a vítima segue a chegada."""
+        cache = SetAssociativeCache(1, 2, 4, "fifo")
+        ram = MainMemory(1024)
+        cache.load_block(0, [0] * 4)
+        cache.fill_block(4, ram)
+        cache.load_block(0, [0] * 4)
+        cache.fill_block(0, ram)
+        self.assertEqual(cache.policy.victim(0), 0)
+        cache.fill_block(8, ram)
+        self.assertEqual(sorted(cache.tags), [1, 2])
+
+    def test_random_policy_is_seeded(self):
+        stream = access_stream(3)
+        runs = [replay(SetAssociativeCache(2, 4, 4, "random", seed=5), stream) for _ in range(2)]
+        self.assertEqual(runs[0], runs[1])
+
+    def test_drop_in_for_cpu(self):
+        """Atrás do MemoryManager, qualquer motor dá o mesmo resultado do micro com a mesma cache."""
+        reference = stack_sum_cpu(SetAssociativeCache(4, 4, 4, "plru"))
+        reference.set_mode("micro")
+        reference.run(20_000)
+        for mode in CPU.MODES:
+            cpu = stack_sum_cpu(SetAssociativeCache(4, 4, 4, "plru"))
+            cpu.set_mode(mode)
+            cpu.run(20_000)
+            self.assertEqual(cpu.memory.ram.dump(200, 2), [0, 1275], mode)
+            self.assertEqual(cpu.memory.get_stats(), reference.memory.get_stats(), mode)
+
+    def test_snapshot_round_trip(self):
+        """Snapshot/clone guardam linhas e estado da política; CPU.from_snapshot usa a cache salva."""
+        for policy in REPLACEMENT_POLICIES:
+            cpu = stack_sum_cpu(SetAssociativeCache(2, 4, 4, policy, seed=3))
+            cpu.run(3000)
+            copy = CPU.from_snapshot(cpu.snapshot())
+            clone = cpu.clone()
+            self.assertIsInstance(copy.memory.cache, SetAssociativeCache)
+            for other in (copy, clone):
+                other.run(5000)
+            cpu.run(5000)
+            for other in (copy, clone):
+                self.assertEqual(other.memory.cache.snapshot(), cpu.memory.cache.snapshot(), policy)
+                self.assertEqual(other.registers.debug_state(), cpu.registers.debug_state())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout, redirect_stderr
+from src.common.utils import halt_addresses
+from src.main import MODES, main
+from src.hardware.cpu.cpu import CPU
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Soma 10..1 em 101 (contador em 100, constante 1 em 102)
+PROGRAM = """
+        LOCO 10
+        STOD 100
+        LOCO 1
+        STOD 102
+LOOP:   LODD 100
+        JZER FIM
+        ADDD 101
+        STOD 101
+        LODD 100
+        SUBD 102
+        STOD 100
+        JUMP LOOP
+FIM:    JUMP FIM
+"""
+
+class TestCommandLine(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".asm")
+        with os.fdopen(handle, "w", encoding="utf-8") as f:
+            f.write(PROGRAM)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def run_main(self, *argv):
+        out, err = io.StringIO(), io.StringIO()
+        with redirect_stdout(out), redirect_stderr(err):
+            code = main(["run", self.path, *argv])
+        return code, out.getvalue(), err.getvalue()
+
+    def test_until_halt_in_every_mode(self):
+        self.assertEqual(MODES, CPU.MODES)
+        results = set()
+        for mode in MODES:
+            code, out, _ = self.run_main("--until-halt", "--mode", mode, "--dump", "100:102", "--stats")
+            self.assertEqual(code, 0, mode)
+            self.assertIn("Parada: halt (PC 12)", out)
+            self.assertIn("0064: 0000 0037 0001", out)
+            self.assertIn("Importação do simulador:", out)
+            results.add(next(line for line in out.splitlines() if line.startswith("Ciclos:")))
+        self.assertEqual(len(results), 1)
+
+    def test_limits_breaks_and_errors(self):
+        code, out, _ = self.run_main("--cycles", "100", "--until-halt")
+        self.assertEqual(code, 2)
+        self.assertIn("Ciclos: 100", out)
+        self.assertIn("limite de ciclos", out)
+
+        code, out, _ = self.run_main("--break", "LOOP if AC == 9", "--mode", "routine")
+        self.assertEqual(code, 0)
+        self.assertIn("Parada: breakpoint pc", out)
+        self.assertIn("AC=0009", out)
+
+        code, _, err = self.run_main("--break", "NADA")
+        self.assertEqual(code, 1)
+        self.assertIn("Erro", err)
+        self.assertEqual(main(["run", self.path + ".inexistente"]), 1)
+
+    def test_halt_addresses(self):
+        self.assertEqual(halt_addresses([0x7001, 0x6001, 0x6000]), {1})
+
+    def test_pc_past_the_code_halts(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("LOCO 7\nJUMP 50\n")
+        code, out, _ = self.run_main("--until-halt", "--cycles", "100000")
+        self.assertEqual(code, 0)
+        self.assertIn("Parada: halt (PC 50)", out)
+
+        code, _, err = self.run_main("--dump", "65530:65540")
+        self.assertEqual(code, 1)
+        self.assertIn("passa do fim da RAM", err)
+
+    def test_run_does_not_import_gui(self):
+        script = ("import sys; from src.main import main; main(['run', sys.argv[1], '--until-halt']); "
+                  "print(sorted(m for m in sys.modules if m.startswith('src.gui') or m.startswith('tkinter')))")
+        result = subprocess.run([sys.executable, "-c", script, self.path], cwd=ROOT,
+                                capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.splitlines()[-1], "[]")
+
+if __name__ == '__main__':
+    unittest.main()
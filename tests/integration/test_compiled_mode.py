@@ -0,0 +1,68 @@
+import random
+import unittest
+from src.hardware.cpu import microcompiler
+from tests.machines import build_cpu, machine_state
+
+class TestCompiledMode(unittest.TestCase):
+
+    def test_matches_step_on_random_microcode(self):
+        """Fuzz: cada campo da microinstrução compilada deve se comportar como no Datapath."""
+        rng = random.Random(99)
+        for _ in range(20):
+            store = [rng.getrandbits(32) for _ in range(256)]
+            image = [rng.getrandbits(16) for _ in range(4096)]
+            stepped = build_cpu(image)
+            compiled = build_cpu(image)
+            compiled.set_mode("compiled")
+            for cpu in (stepped, compiled):
+                cpu.control_unit.load_firmware(store)
+
+            for _ in range(300):
+                stepped.step()
+            compiled.run(1)
+            compiled.run(299)
+
+            self.assertEqual(machine_state(compiled), machine_state(stepped))
+
+    def test_matches_micro_on_firmware(self):
+        rng = random.Random(5)
+        program = [rng.getrandbits(16) for _ in range(128)]
+        micro = build_cpu(program)
+        compiled = build_cpu(program)
+        compiled.set_mode("compiled")
+        for cpu in (micro, compiled):
+            cpu.registers.SP = 0x4000
+
+        self.assertEqual(compiled.run(5000, until_pc=40), micro.run(5000, until_pc=40))
+        self.assertEqual(machine_state(compiled), machine_state(micro))
+
+    def test_control_store_change_recompiles_only_that_word(self):
+        cpu = build_cpu([(7 << 12) | 5, (6 << 12) | 0])  # LOCO 5; JUMP 0
+        cpu.set_mode("compiled")
+        engine = cpu.engine("compiled")
+        before = list(engine.table())
+
+        # LOCO passa a carregar AC := AC + 1
+        cpu.control_unit.control_store[80] = 0x00148400
+        after = engine.table()
+
+        changed = [i for i in range(256) if before[i] is not after[i]]
+        self.assertEqual(changed, [80])
+        cpu.run(100)
+        self.assertGreater(cpu.registers.AC, 0)
+
+    def test_table_cached_by_control_store_hash(self):
+        store = build_cpu([]).control_unit.control_store
+        self.assertIs(microcompiler.compile_control_store(list(store)),
+                      microcompiler.compile_control_store(list(store)))
+
+    def test_caches_are_bounded(self):
+        rng = random.Random(4)
+        limit = microcompiler.MAX_CACHED_STORES
+        for _ in range(limit + 4):
+            microcompiler.compile_control_store([rng.getrandbits(32) for _ in range(256)])
+        self.assertEqual(len(microcompiler._table_cache), limit)
+        self.assertLessEqual(len(microcompiler._factory_cache), limit * 256)
+
+if __name__ == '__main__':
+    unittest.main()
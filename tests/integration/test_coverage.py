@@ -0,0 +1,111 @@
+import io
+import unittest
+from collections import Counter
+from src.hardware.cpu.coverage import MicrocodeCoverage, reachable_microaddresses
+from src.hardware.cpu.firmware import micro_inst
+from src.hardware.cpu.perf import PerfCounters, OPCODE_NAMES
+from tests.machines import assembled_cpu
+
+# Conta de 30 até 0 com JPOS/JNEG/JNZE e pilha (caminhos tomados e não tomados)
+PROGRAM = """
+LOOP:   LODD 200
+        JNEG FIM
+        JNZE SEGUE
+        JUMP FIM
+SEGUE:  PUSH
+        INSP 1
+        SUBD 201
+        STOD 200
+        JPOS LOOP
+FIM:    JUMP FIM
+"""
+
+def build_cpu():
+    return assembled_cpu(PROGRAM, [30, 1])
+
+class TestMicrocodeCoverage(unittest.TestCase):
+    def test_counts_match_step_reference(self):
+        cycles = 3000
+        reference = build_cpu()
+        executed = Counter()
+        for _ in range(cycles):
+            executed[reference.control_unit.MPC] += 1
+            reference.step()
+
+        cpu = build_cpu()
+        cpu.set_mode("block")
+        coverage = MicrocodeCoverage()
+        cpu.start_coverage(coverage)
+        for _ in range(3):
+            cpu.run(cycles // 3)
+        self.assertEqual(cpu.registers.debug_state(), reference.registers.debug_state())
+        self.assertEqual({mpc: n for mpc, n in enumerate(coverage.executions) if n}, dict(executed))
+        self.assertEqual(coverage.cycles, cycles)
+
+        # Desvios e instruções batem com os contadores de desempenho
+        counted = build_cpu()
+        counters = PerfCounters()
+        counted.start_counters(counters)
+        counted.run(cycles)
+        for cond in (1, 2):
+            decoded = cpu.control_unit.control_store.decoded
+            at = [mpc for mpc in range(256) if decoded[mpc].cond == cond]
+            self.assertEqual(sum(coverage.taken[mpc] for mpc in at), counters.branch_taken[cond])
+            self.assertEqual(sum(coverage.not_taken[mpc] for mpc in at), counters.branch_not_taken[cond])
+        for key, name in enumerate(OPCODE_NAMES):
+            self.assertEqual(sum(coverage.paths[key].values()), counters.retired[key], name)
+
+        # Os caminhos refazem exatamente as microinstruções executadas nas instruções completas
+        replayed = Counter()
+        for name, ranked in coverage.opcode_paths().items():
+            for addresses, count in ranked:
+                for mpc in addresses:
+                    replayed[mpc] += count
+        pending = cycles - sum(replayed.values())
+        self.assertTrue(0 <= pending < 20)
+        # JNZE: fetch, decodificação para 140 e os dois lados do desvio
+        jnze = [addresses for addresses, _ in coverage.opcode_paths()["JNZE"]]
+        self.assertEqual(len(jnze), 2)
+        self.assertEqual({addresses[:4] for addresses in jnze}, {(0, 1, 2, 140)})
+
+    def test_report_flags_dead_microcode(self):
+        cpu = build_cpu()
+        cpu.control_unit.control_store[250] = micro_inst(a=4, alu=2, addr=0)  # Sem caminho até ela
+        coverage = MicrocodeCoverage()
+        cpu.start_coverage(coverage)
+        cpu.run(2000)
+        reached = reachable_microaddresses(cpu.control_unit.control_store.decoded)
+        self.assertEqual(coverage.unreachable(), [250])
+        never = coverage.never_executed()
+        self.assertIn(150, never)  # CALL
+        self.assertTrue(set(never) <= reached)
+        self.assertEqual(coverage.hot(3)[0][0], 0)
+        stats = coverage.get_stats()
+        self.assertEqual(stats["executed"] + len(never), stats["reachable"])
+
+        out = io.StringIO()
+        coverage.write_report(out, top=5)
+        self.assertIn("Inalcançáveis: [250]", out.getvalue())
+        self.assertIn("INSP", out.getvalue())
+
+    def test_switch_at_runtime(self):
+        cpu = build_cpu()
+        coverage = MicrocodeCoverage()
+        cpu.start_coverage(coverage)
+        cpu.run(100)
+        # Contadores e cobertura no mesmo laço, na mesma execução
+        counters = PerfCounters()
+        cpu.start_counters(counters)
+        cpu.set_mode("block")
+        cpu.run(100)
+        self.assertEqual(sum(coverage.executions), 200)
+        self.assertEqual(counters.cycles, 100)
+        self.assertIs(cpu.stop_coverage(), coverage)
+        cpu.run(100)
+        self.assertEqual(sum(coverage.executions), 200)
+        self.assertEqual(counters.cycles, 200)
+        # O firmware padrão não tem microcódigo morto
+        self.assertEqual(coverage.unreachable(), [])
+
+if __name__ == '__main__':
+    unittest.main()
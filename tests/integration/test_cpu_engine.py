@@ -0,0 +1,100 @@
+import random
+import unittest
+from src.hardware.memory.ram import MainMemory
+from src.hardware.memory.cache import DirectCache
+from src.hardware.memory.manager import MemoryManager
+from src.hardware.cpu.cpu import CPU
+from tests.machines import build_cpu, machine_state
+
+class TestRunEngine(unittest.TestCase):
+    """O laço rápido CPU.run() deve ser indistinguível de chamar step() repetidamente."""
+
+    PROGRAM = [
+        (0 << 12) | 100,  # LODD 100
+        (2 << 12) | 101,  # ADDD 101
+        (1 << 12) | 102,  # STOD 102
+        (6 << 12) | 0,    # JUMP 0
+    ]
+
+    def test_run_matches_step(self):
+        stepped = build_cpu(self.PROGRAM, ram_size=1024)
+        fast = build_cpu(self.PROGRAM, ram_size=1024)
+        for cpu in (stepped, fast):
+            cpu.memory.write(100, 15)
+            cpu.memory.write(101, 25)
+
+        for _ in range(137):
+            stepped.step()
+        executed = fast.run(137)
+
+        self.assertEqual(executed, 137)
+        self.assertEqual(machine_state(fast), machine_state(stepped))
+
+    def test_run_matches_step_on_random_microcode(self):
+        """Fuzz: microcódigo aleatório exercita todos os campos (AMUX, ULA, deslocador, C, rd/wr, cond)."""
+        rng = random.Random(1234)
+        for _ in range(20):
+            store = [rng.getrandbits(32) for _ in range(256)]
+            memory_image = [rng.getrandbits(16) for _ in range(4096)]
+            stepped = build_cpu(memory_image)
+            fast = build_cpu(memory_image)
+            for cpu in (stepped, fast):
+                cpu.control_unit.load_firmware(store)
+
+            for _ in range(300):
+                stepped.step()
+            fast.run(120)
+            fast.run(180)
+
+            self.assertEqual(machine_state(fast), machine_state(stepped))
+
+    def test_lazy_flags_step_matches_eager(self):
+        """Flags sob demanda não mudam o caminho: registradores, memória e ciclos idênticos."""
+        rng = random.Random(8)
+        program = [rng.getrandbits(16) for _ in range(256)]
+        eager = build_cpu(program)
+        lazy = CPU(MemoryManager(MainMemory(65536), DirectCache()), lazy_flags=True)
+        lazy.memory.ram.load_program(program)
+
+        for _ in range(2000):
+            eager.step()
+            lazy.step()
+            self.assertEqual(lazy.control_unit.MPC, eager.control_unit.MPC)
+
+        self.assertEqual(lazy.datapath.alu.output, eager.datapath.alu.output)
+        self.assertEqual(machine_state(lazy)[:1] + machine_state(lazy)[5:],
+                         machine_state(eager)[:1] + machine_state(eager)[5:])
+
+    def test_stop_on_mpc(self):
+        cpu = build_cpu(self.PROGRAM, ram_size=1024)
+        executed = cpu.run(1000, until_mpc=2)
+        self.assertEqual(executed, 2)
+        self.assertEqual(cpu.control_unit.MPC, 2)
+
+    def test_stop_on_pc(self):
+        """until_pc para no limite de instrução (volta ao fetch) com PC no valor pedido."""
+        reference = build_cpu(self.PROGRAM, ram_size=1024)
+        cpu = build_cpu(self.PROGRAM, ram_size=1024)
+
+        executed = cpu.run(1000, until_pc=2)
+        while not (reference.control_unit.MPC == 0 and reference.registers.PC == 2 and reference.cycles):
+            reference.step()
+
+        self.assertEqual(executed, reference.cycles)
+        self.assertEqual(machine_state(cpu), machine_state(reference))
+
+    def test_stop_on_predicate(self):
+        cpu = build_cpu(self.PROGRAM, ram_size=1024)
+        cpu.memory.write(100, 7)
+        executed = cpu.run(1000, until=lambda c: c.registers.AC == 7)
+        self.assertEqual(cpu.registers.AC, 7)
+        self.assertEqual(cpu.cycles, executed)
+
+    def test_cycle_budget(self):
+        cpu = build_cpu(self.PROGRAM, ram_size=1024)
+        self.assertEqual(cpu.run(0), 0)
+        self.assertEqual(cpu.run(25), 25)
+        self.assertEqual(cpu.cycles, 25)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -93,5 +93,31 @@ class TestDatapathIntegration(unittest.TestCase):
         self.assertTrue(self.datapath.alu.N, "Flag N deveria estar True para resultado negativo.")
         self.assertFalse(self.datapath.alu.Z, "Flag Z deveria estar False.")
 
+    def test_scratch_register_and_constant_on_bus_a(self):
+        """A := AMASK via barramento A (constante 10), depois AC := A + 1 (rascunho no índice 12)."""
+        self.datapath.run_cycle(self.create_signals(a=10, alu=ALUOp.IDENTITY.value, c=12, enc=True))
+        self.assertEqual(self.regs.A, 0x0FFF)
+
+        self.datapath.run_cycle(self.create_signals(a=12, b=8, alu=ALUOp.ADD.value, c=4, enc=True))
+        self.assertEqual(self.regs.AC, 0x1000)
+
+    def test_constants_are_read_only(self):
+        """O barramento C não escreve nas constantes (7-11)."""
+        self.regs.AC = 0x1234
+        self.datapath.run_cycle(self.create_signals(a=4, alu=ALUOp.IDENTITY.value, c=8, enc=True))
+        self.assertEqual(self.regs.file[8], 1)
+
+    def test_lazy_flags_only_on_conditional_cycles(self):
+        """Com lazy_flags, N/Z só mudam quando a microinstrução testa as flags (cond 1 ou 2)."""
+        datapath = Datapath(self.regs, lazy_flags=True)
+
+        datapath.run_cycle(self.create_signals(a=7, b=9, alu=ALUOp.ADD.value, c=4, enc=True))
+        self.assertEqual(datapath.alu.output, 0xFFFF)
+        self.assertFalse(datapath.alu.N, "Sem cond, as flags não deveriam ser calculadas.")
+
+        datapath.run_cycle(self.create_signals(a=4, alu=ALUOp.IDENTITY.value, cond=1))
+        self.assertTrue(datapath.alu.N)
+        self.assertFalse(datapath.alu.Z)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
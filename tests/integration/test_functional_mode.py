@@ -0,0 +1,93 @@
+import random
+import unittest
+from tests.machines import assemble, build_cpu, machine_state, random_program
+
+class TestFunctionalMode(unittest.TestCase):
+
+    def test_program_result(self):
+        source = """
+                LOCO 10
+                STOD 200
+                LOCO 0
+                STOD 201
+        LOOP:   LODD 200
+                JZER END
+                ADDD 201
+                STOD 201
+                LODD 200
+                SUBD 202
+                STOD 200
+                JUMP LOOP
+        END:    JUMP END
+        """
+        program = assemble(source)[0]
+        cpu = build_cpu(program)
+        cpu.memory.write(202, 1)
+        cpu.set_mode("functional")
+
+        cpu.run(10000, until_pc=12)
+
+        self.assertEqual(cpu.memory.read(201), 55, "Soma 1..10 deveria dar 55.")
+
+    def test_matches_micro_mode_exactly(self):
+        """Registradores, flags, MPC/MIR, memória, cache e ciclos idênticos ao modo micro."""
+        rng = random.Random(42)
+        for _ in range(30):
+            program = random_program(rng)
+            micro = build_cpu(program)
+            functional = build_cpu(program)
+            functional.set_mode("functional")
+            for cpu in (micro, functional):
+                cpu.registers.SP = 0x4000
+
+            for budget in (97, 250, 1, 400):
+                self.assertEqual(functional.run(budget), micro.run(budget))
+                self.assertEqual(machine_state(functional), machine_state(micro))
+
+    def test_switch_modes_on_same_state(self):
+        rng = random.Random(7)
+        program = random_program(rng)
+        reference = build_cpu(program)
+        mixed = build_cpu(program)
+
+        reference.run(1000)
+        for mode, budget in (("micro", 123), ("functional", 400), ("micro", 77), ("functional", 400)):
+            mixed.set_mode(mode)
+            mixed.run(budget)
+
+        self.assertEqual(machine_state(mixed), machine_state(reference))
+
+    def test_stop_on_pc(self):
+        rng = random.Random(3)
+        program = random_program(rng)
+        micro = build_cpu(program)
+        functional = build_cpu(program)
+        functional.set_mode("functional")
+
+        target = program.index(next(w for w in program if w >> 12 == 6)) + 1
+        micro.run(5000, until_pc=target)
+        functional.run(5000, until_pc=target)
+
+        self.assertEqual(machine_state(functional), machine_state(micro))
+
+    def test_custom_firmware_falls_back_to_micro(self):
+        program = [(7 << 12) | 5, (6 << 12) | 0]  # LOCO 5; JUMP 0
+        micro = build_cpu(program)
+        functional = build_cpu(program)
+        functional.set_mode("functional")
+        for cpu in (micro, functional):
+            cpu.control_unit.control_store[80] = 0  # LOCO vira "goto 0"
+
+        micro.run(200)
+        functional.run(200)
+
+        self.assertEqual(functional.registers.AC, 0)
+        self.assertEqual(machine_state(functional), machine_state(micro))
+
+    def test_invalid_mode(self):
+        cpu = build_cpu([])
+        with self.assertRaises(ValueError):
+            cpu.set_mode("turbo")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import random
+import unittest
+from src.hardware.memory.access_log import AccessLog
+from src.hardware.memory.timing import MemoryTiming
+from src.hardware.cpu.journal import ExecutionJournal
+from tests.machines import assembled_cpu, full_state
+
+# Laço com chamada de sub-rotina: exercita pilha, desvios e escritas na memória
+PROGRAM = """
+LOOP:   LODD 300
+        JZER FIM
+        CALL SOMA
+        LODD 300
+        SUBD 302
+        STOD 300
+        JUMP LOOP
+FIM:    JUMP FIM
+SOMA:   LODD 301
+        ADDD 300
+        STOD 301
+        RETN
+"""
+
+def build_cpu():
+    return assembled_cpu(PROGRAM, [40, 0, 1], 300)
+
+class TestExecutionJournal(unittest.TestCase):
+    def test_goto_matches_recorded_states(self):
+        """goto_cycle(k) reproduz exatamente o estado visto no ciclo k."""
+        cpu = build_cpu()
+        journal = ExecutionJournal(cpu, capacity=5000, checkpoint_interval=128)
+        states = [full_state(cpu)]
+        for _ in range(3000):
+            journal.step()
+            states.append(full_state(cpu))
+
+        rng = random.Random(12)
+        targets = sorted(rng.sample(range(3000), 8), reverse=True)
+        for cycle in targets:
+            journal.goto_cycle(cycle)
+            self.assertEqual(full_state(cpu), states[cycle], f"ciclo {cycle}")
+
+        # Para frente de novo: a execução regravada segue idêntica
+        journal.goto_cycle(2999)
+        self.assertEqual(full_state(cpu), states[2999])
+
+    def test_step_back(self):
+        cpu = build_cpu()
+        journal = ExecutionJournal(cpu, capacity=1000, checkpoint_interval=50)
+        states = [full_state(cpu)]
+        for _ in range(120):
+            journal.step()
+            states.append(full_state(cpu))
+
+        for cycle in range(119, 95, -1):
+            journal.step_back()
+            self.assertEqual(full_state(cpu), states[cycle])
+        journal.step_back(1000)  # Limitado ao início do histórico
+        self.assertEqual(full_state(cpu), states[0])
+
+    def test_step_back_does_not_reinstrument(self):
+        """A reaplicação dos deltas não volta a gravar acessos nem a contar stalls."""
+        cpu = build_cpu()
+        log = AccessLog(capacity=4096)
+        timing = MemoryTiming(miss_penalty=6)
+        cpu.memory.start_recording(log, cpu)
+        cpu.memory.start_timing(timing, cpu)
+        journal = ExecutionJournal(cpu, capacity=1000, checkpoint_interval=64)
+        journal.run(300)
+        accesses, stalls = log.total, timing.stall_cycles
+        self.assertGreater(accesses, 0)
+        journal.step_back(50)
+        self.assertEqual((log.total, timing.stall_cycles), (accesses, stalls))
+
+    def test_history_is_bounded(self):
+        """Só 'capacity' deltas ficam guardados; o resto do passado é esquecido."""
+        cpu = build_cpu()
+        journal = ExecutionJournal(cpu, capacity=500, checkpoint_interval=100)
+        journal.run(2000)
+
+        stats = journal.get_stats()
+        self.assertEqual(stats["deltas"], 500)
+        self.assertLessEqual(stats["checkpoints"], 6)
+        self.assertGreaterEqual(journal.oldest_cycle, 1500)
+        with self.assertRaises(ValueError):
+            journal.goto_cycle(1000)
+
+        reference = build_cpu()
+        for _ in range(1600):
+            reference.step()
+        journal.goto_cycle(1600)
+        self.assertEqual(full_state(cpu), full_state(reference))
+
+    def test_firmware_change_restarts_history(self):
+        cpu = build_cpu()
+        journal = ExecutionJournal(cpu, capacity=1000, checkpoint_interval=100)
+        journal.run(300)
+        cpu.control_unit.control_store[255] = 0
+        journal.step()
+        self.assertEqual(journal.oldest_cycle, 300)
+
+    def test_invalid_configuration(self):
+        with self.assertRaises(ValueError):
+            ExecutionJournal(build_cpu(), capacity=10, checkpoint_interval=100)
+
+if __name__ == '__main__':
+    unittest.main()
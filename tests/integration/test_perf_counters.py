@@ -0,0 +1,94 @@
+import json
+import unittest
+from src.hardware.memory.timing import MemoryTiming
+from src.hardware.cpu.cpu import CPU
+from src.hardware.cpu.perf import PerfCounters, opcode_key, OPCODE_NAMES
+from tests.machines import CALL_SUM, assembled_cpu
+
+def build_cpu():
+    return assembled_cpu(CALL_SUM, [30, 0, 1])
+
+def reference_counts(cycles):
+    """Instruções e ciclos por opcode e desvios por COND, contados a partir de CPU.step()."""
+    cpu = build_cpu()
+    retired, opcode_cycles = [0] * len(OPCODE_NAMES), [0] * len(OPCODE_NAMES)
+    taken, not_taken = [0] * 4, [0] * 4
+    start = 0
+    for n in range(1, cycles + 1):
+        signals = cpu.control_unit.control_store.decoded[cpu.control_unit.MPC]
+        cpu.step()
+        mpc = cpu.control_unit.MPC
+        if signals.cond in (1, 2):
+            if mpc & 0x80 and not signals.addr & 0x80:
+                taken[signals.cond] += 1
+            else:
+                not_taken[signals.cond] += 1
+        else:
+            taken[signals.cond] += 1
+        if mpc == 0:
+            key = opcode_key(cpu.registers.IR)
+            retired[key] += 1
+            opcode_cycles[key] += n - start
+            start = n
+    return cpu, retired, opcode_cycles, taken, not_taken
+
+class TestPerfCounters(unittest.TestCase):
+    def test_counts_match_step_reference(self):
+        """Em qualquer modo, contagens iguais às derivadas de step(), e a execução não muda."""
+        cycles = 6000
+        ref_cpu, retired, opcode_cycles, taken, not_taken = reference_counts(cycles)
+        for mode in CPU.MODES:
+            cpu = build_cpu()
+            cpu.set_mode(mode)
+            counters = PerfCounters()
+            cpu.start_counters(counters)
+            # Em pedaços: a instrução em curso entre chamadas continua sendo contada
+            for _ in range(6):
+                cpu.run(cycles // 6)
+            self.assertEqual(cpu.registers.debug_state(), ref_cpu.registers.debug_state(), mode)
+            self.assertEqual(list(counters.retired), retired, mode)
+            self.assertEqual(list(counters.opcode_cycles), opcode_cycles, mode)
+            self.assertEqual(list(counters.branch_taken), taken, mode)
+            self.assertEqual(list(counters.branch_not_taken), not_taken, mode)
+
+            stats = counters.get_stats()
+            cache = cpu.memory.get_stats()
+            self.assertEqual(stats["cycles"], cycles)
+            self.assertEqual(sum(k["hits"] for k in stats["cache"].values()), cache["hits"])
+            self.assertEqual(sum(k["misses"] for k in stats["cache"].values()), cache["misses"])
+            self.assertEqual(stats["ram"]["reads"], cache["misses"] * cpu.memory.cache.block_size)
+            # Uma busca (2 ciclos com rd) por instrução completada, mais a da instrução em curso
+            fetch = stats["cache"]["fetch"]
+            self.assertIn(fetch["hits"] + fetch["misses"] - 2 * stats["instructions"], (0, 1, 2))
+            self.assertEqual(set(stats["opcodes"]), {"LODD", "JZER", "PUSH", "CALL", "POP", "SUBD",
+                                                     "STOD", "JUMP", "LODL", "ADDD", "RETN"})
+            self.assertAlmostEqual(stats["cpi"], cycles / stats["instructions"])
+            self.assertEqual(json.loads(counters.to_json()), stats)
+
+    def test_reset_and_stop(self):
+        cpu = build_cpu()
+        counters = PerfCounters()
+        cpu.start_counters(counters)
+        cpu.run(1000)
+        counters.reset_stats()
+        self.assertEqual(counters.get_stats()["instructions"], 0)
+        cpu.run(500)
+        self.assertEqual(counters.cycles, 500)
+        self.assertIs(cpu.stop_counters(), counters)
+        cpu.run(500)
+        self.assertEqual(counters.cycles, 500)
+
+    def test_with_memory_timing(self):
+        """Com o modelo de tempo ligado, cada acesso ainda recebe o ciclo e o MPC exatos."""
+        plain, counted = build_cpu(), build_cpu()
+        for cpu in (plain, counted):
+            cpu.memory.start_timing(MemoryTiming(), cpu)
+        counted.start_counters(PerfCounters())
+        plain.run(3000)
+        counted.run(3000)
+        self.assertEqual(counted.memory.timing.get_stats(), plain.memory.timing.get_stats())
+        self.assertEqual(counted.counters.get_stats()["instructions"],
+                         counted.memory.timing.get_stats()["instructions"] - 1)
+
+if __name__ == '__main__':
+    unittest.main()
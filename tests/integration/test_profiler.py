@@ -0,0 +1,87 @@
+import io
+import unittest
+from src.hardware.cpu.cpu import CPU
+from src.hardware.cpu.perf import PerfCounters
+from src.hardware.cpu.profiler import Profiler
+from tests.machines import CALL_SUM, assemble, assembled_cpu
+
+N = 20
+FIM = 8  # Endereço do laço final
+
+def build_cpu():
+    cpu = assembled_cpu(CALL_SUM, [N, 0, 1])
+    _, symbols, lines = assemble(CALL_SUM)
+    profiler = Profiler()
+    profiler.load_symbols(symbols, lines)
+    return cpu, profiler
+
+class TestProfiler(unittest.TestCase):
+    def test_profile_and_call_graph(self):
+        plain, _ = build_cpu()
+        plain.run(200_000, until_pc=FIM)
+        plain.run(200_000, until_pc=FIM)  # Executa o JUMP FIM uma vez
+        results = []
+        for mode in CPU.MODES:
+            cpu, profiler = build_cpu()
+            cpu.set_mode(mode)
+            cpu.start_profiler(profiler)
+            cycles = cpu.run(200_000, until_pc=FIM) + cpu.run(200_000, until_pc=FIM)
+            self.assertEqual(cpu.registers.debug_state(), plain.registers.debug_state(), mode)
+            self.assertEqual(cpu.cycles, plain.cycles)
+            self.assertEqual(profiler.total_cycles, cycles)
+            self.assertEqual(sum(profiler.cycles), cycles)
+            self.assertEqual(sum(profiler.misses), cpu.memory.get_stats()["misses"])
+            results.append((list(profiler.cycles), profiler.stacks, profiler.calls))
+
+            self.assertEqual(profiler.executions[0], N + 1)   # LOOP
+            self.assertEqual(profiler.executions[12], N)      # CALL DOBRA
+            self.assertEqual(profiler.call_graph(), {("main", "SOMA"): N, ("SOMA", "DOBRA"): N})
+            functions = profiler.functions()
+            self.assertEqual(functions["main"]["inclusive"], cycles)
+            self.assertEqual(functions["SOMA"]["inclusive"],
+                             functions["SOMA"]["self"] + functions["DOBRA"]["inclusive"])
+            self.assertEqual(functions["DOBRA"]["calls"], N)
+        # Mesmo perfil em qualquer modo
+        for other in results[1:]:
+            self.assertEqual(other, results[0])
+
+    def test_reports(self):
+        cpu, profiler = build_cpu()
+        cpu.start_profiler(profiler)
+        cpu.run(200_000, until_pc=FIM)
+        rows = profiler.flat_profile()
+        self.assertEqual(rows[0]["cycles"], max(profiler.cycles))
+        by_pc = {row["pc"]: row for row in rows}
+        self.assertEqual(by_pc[10]["location"], "SOMA+1")
+        self.assertEqual(by_pc[10]["line"], 12)
+        self.assertEqual(by_pc[13]["location"], "SOMA+4")
+        self.assertEqual(len(profiler.flat_profile(top=3)), 3)
+
+        out = io.StringIO()
+        profiler.write_folded(out)
+        folded = dict(line.rsplit(" ", 1) for line in out.getvalue().splitlines())
+        self.assertEqual(set(folded), {"main", "main;SOMA", "main;SOMA;DOBRA"})
+        self.assertEqual(sum(int(v) for v in folded.values()), profiler.total_cycles)
+
+        out = io.StringIO()
+        profiler.write_flat(out, top=5)
+        self.assertEqual(len(out.getvalue().splitlines()), 6)
+
+    def test_partial_instruction_and_counters(self):
+        """Começando no meio de uma instrução, e com os contadores de desempenho ligados."""
+        cpu, profiler = build_cpu()
+        cpu.run(7)
+        counters = PerfCounters()
+        cpu.start_counters(counters)
+        cpu.start_profiler(profiler)
+        cpu.run(5000)
+        self.assertEqual(profiler.total_cycles, 5000)
+        self.assertEqual(counters.cycles, 5000)
+        self.assertLess(sum(profiler.cycles), 5000)
+        self.assertIs(cpu.stop_profiler(), profiler)
+        profiler.reset_stats()
+        cpu.run(100)
+        self.assertEqual(profiler.total_cycles, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import random
+import tempfile
+import unittest
+from src.hardware.replay import ReplaySource
+from src.hardware.trace import TraceError, TraceWriter
+from tests.machines import assembled_cpu
+
+# Escreve um contador decrescente num vetor (muitas escritas na memória) e usa a pilha
+PROGRAM = """
+LOOP:   LODD 300
+        JZER FIM
+        SUBD 301
+        STOD 300
+        PUSH
+        STOL 0
+        INSP 1
+        JUMP LOOP
+FIM:    JUMP FIM
+"""
+
+def build_cpu():
+    return assembled_cpu(PROGRAM, [60, 1], 300, sp=0x800)
+
+def visible_state(registers, ram):
+    """O que a GUI mostra: registradores e a memória."""
+    return registers.debug_state(), ram.dump(0, ram.size)
+
+class TestReplaySource(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "run.trace")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def record(self, cycles, keyframe_interval=100, window=None):
+        with TraceWriter(self.path, cycles=window, keyframe_interval=keyframe_interval) as writer:
+            writer.run(build_cpu(), cycles)
+
+    def reference(self, samples):
+        """Estado visível no fim de cada ciclo amostrado, simulando de verdade."""
+        cpu = build_cpu()
+        states = {}
+        for cycle in range(max(samples) + 1):
+            cpu.step()
+            if cycle in samples:
+                states[cycle] = visible_state(cpu.registers, cpu.memory.ram)
+        return states
+
+    def test_seek_anywhere(self):
+        self.record(3000)
+        rng = random.Random(5)
+        samples = rng.sample(range(3000), 25) + [0, 2999]
+        expected = self.reference(set(samples))
+
+        source = ReplaySource(self.path)
+        self.assertEqual((source.first_cycle, source.last_cycle), (0, 2999))
+        for cycle in samples:  # Em ordem aleatória: para frente e para trás
+            source.seek(cycle)
+            self.assertEqual(source.cycle, cycle)
+            self.assertEqual(visible_state(source.registers, source.ram), expected[cycle], f"ciclo {cycle}")
+        source.close()
+
+    def test_playback_steps(self):
+        """Reprodução incremental (vários ciclos por passo) igual ao seek direto."""
+        self.record(1500, keyframe_interval=256)
+        expected = self.reference(set(range(0, 1500, 7)) | {499, 1499})
+        source = ReplaySource(self.path)
+        while source.step(7):
+            self.assertEqual(visible_state(source.registers, source.ram), expected[source.cycle])
+        self.assertEqual(source.cycle, 1499)  # O último passo é limitado ao fim do trace
+        self.assertIsNotNone(source.signals)
+        self.assertTrue(source.step(-1000))
+        self.assertEqual(visible_state(source.registers, source.ram), expected[499])
+        source.close()
+
+    def test_cycle_window(self):
+        self.record(2000, window=(800, 1600))
+        expected = self.reference({800, 1200, 1599})
+        source = ReplaySource(self.path)
+        self.assertEqual((source.first_cycle, source.last_cycle), (800, 1599))
+        for cycle in (1599, 800, 1200):
+            source.seek(cycle)
+            self.assertEqual(visible_state(source.registers, source.ram), expected[cycle])
+        source.close()
+
+    def test_requires_keyframes(self):
+        self.record(100, keyframe_interval=None)
+        with self.assertRaises(TraceError):
+            ReplaySource(self.path)
+        with self.assertRaises(ValueError):
+            TraceWriter(self.path, pc_range=(0, 4), keyframe_interval=10)
+
+if __name__ == '__main__':
+    unittest.main()
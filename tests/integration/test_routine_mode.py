@@ -0,0 +1,96 @@
+import random
+import unittest
+from src.hardware.cpu import routines
+from tests.machines import build_cpu, machine_state, random_program
+
+class TestRoutineMode(unittest.TestCase):
+
+    def test_matches_micro_mode_exactly(self):
+        """Cada handler fundido reproduz ciclos, memória, cache e estado final do modo micro."""
+        rng = random.Random(2024)
+        for _ in range(30):
+            program = random_program(rng)
+            micro = build_cpu(program)
+            routine = build_cpu(program)
+            routine.set_mode("routine")
+            for cpu in (micro, routine):
+                cpu.registers.SP = 0x4000
+
+            for budget in (97, 250, 1, 400):
+                self.assertEqual(routine.run(budget), micro.run(budget))
+                self.assertEqual(machine_state(routine), machine_state(micro))
+
+        self.assertGreater(routine.engine("routine").instructions, 0)
+
+    def test_stop_on_pc_and_predicate(self):
+        rng = random.Random(11)
+        program = random_program(rng)
+        micro = build_cpu(program)
+        routine = build_cpu(program)
+        routine.set_mode("routine")
+
+        target = program.index(next(w for w in program if w >> 12 == 6)) + 1
+        self.assertEqual(routine.run(5000, until_pc=target), micro.run(5000, until_pc=target))
+        self.assertEqual(machine_state(routine), machine_state(micro))
+
+        # O predicado é avaliado nos limites de instrução (MPC = 0)
+        stop = lambda c: c.control_unit.MPC == 0 and c.registers.AC & 1
+        self.assertEqual(routine.run(5000, until=stop), micro.run(5000, until=stop))
+        self.assertEqual(machine_state(routine), machine_state(micro))
+
+    def test_changed_routine_is_recompiled(self):
+        program = [(7 << 12) | 5, (6 << 12) | 0]  # LOCO 5; JUMP 0
+        micro = build_cpu(program)
+        routine = build_cpu(program)
+        routine.set_mode("routine")
+        routine.run(50)
+        micro.run(50)
+        for cpu in (micro, routine):
+            cpu.control_unit.control_store[80] = 0x00148400  # LOCO: AC := AC + 1; goto 0
+
+        micro.run(300)
+        routine.run(300)
+
+        self.assertGreater(routine.registers.AC, 5)
+        self.assertEqual(machine_state(routine), machine_state(micro))
+
+    def test_looping_routine_resumes_in_compiled_mode(self):
+        """Uma rotina com laço não é fundida: o motor a executa microinstrução a microinstrução."""
+        program = [(7 << 12) | 3, (6 << 12) | 0]  # LOCO 3; JUMP 0
+        micro = build_cpu(program)
+        routine = build_cpu(program)
+        routine.set_mode("routine")
+        for cpu in (micro, routine):
+            # LOCO: AC := IR & AMASK; depois decrementa AC até zero (laço em 81)
+            cpu.control_unit.control_store[80] = 0x0814A551
+            cpu.control_unit.control_store[81] = 0x40149451
+            cpu.control_unit.control_store[0xD1] = 0x00000000
+
+        for budget in (13, 200, 57):
+            self.assertEqual(routine.run(budget), micro.run(budget))
+            self.assertEqual(machine_state(routine), machine_state(micro))
+        self.assertGreater(routine.engine("routine").resumes, 0)
+
+    def test_matches_step_on_random_microcode(self):
+        """Microcódigo aleatório: fetch/rotinas não compiláveis caem no modo "compiled"."""
+        rng = random.Random(77)
+        for _ in range(20):
+            store = [rng.getrandbits(32) for _ in range(256)]
+            image = [rng.getrandbits(16) for _ in range(4096)]
+            stepped = build_cpu(image)
+            routine = build_cpu(image)
+            routine.set_mode("routine")
+            for cpu in (stepped, routine):
+                cpu.control_unit.load_firmware(store)
+
+            for _ in range(300):
+                stepped.step()
+            routine.run(120)
+            routine.run(180)
+
+            self.assertEqual(machine_state(routine), machine_state(stepped))
+        # 20 firmwares distintos: o cache de rotinas fica no limite
+        self.assertLessEqual(len(routines._program_cache), routines.MAX_CACHED_STORES)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import random
+import unittest
+from src.hardware.memory.ram import MainMemory
+from src.hardware.memory.cache import DirectCache
+from src.hardware.cpu.cpu import CPU
+from src.hardware.cpu import control
+from src.hardware.snapshot import SnapshotError, pack_snapshot
+from tests.machines import full_state, stack_sum_cpu
+
+class TestSnapshot(unittest.TestCase):
+    def test_round_trip(self):
+        """from_snapshot reproduz o estado inteiro, e as duas máquinas seguem idênticas."""
+        cpu = stack_sum_cpu()
+        cpu.run(1237)
+        data = cpu.snapshot()
+        copy = CPU.from_snapshot(data)
+        self.assertEqual(full_state(copy), full_state(cpu))
+        self.assertEqual(copy.snapshot(), data)
+
+        cpu.run(5000)
+        copy.run(5000)
+        self.assertEqual(full_state(copy), full_state(cpu))
+        self.assertEqual(cpu.memory.ram.read(201), 1275)
+
+    def test_memory_is_packed(self):
+        """4096 palavras ocupam 8 KiB no snapshot (mais cabeçalhos e o resto do estado)."""
+        data = stack_sum_cpu().snapshot()
+        self.assertLess(len(data), 2 * 4096 + 256 * 4 + 512)
+
+    def test_restore_in_place_discards_translations(self):
+        """Restaurar na mesma CPU (modo block) volta ao estado salvo e refaz a tradução."""
+        cpu = stack_sum_cpu()
+        cpu.set_mode("block")
+        cpu.run(400)
+        data = cpu.snapshot()
+        cpu.run(3000)
+        expected = full_state(cpu)
+
+        cpu.memory.ram.write(3, 0)  # Altera o código depois do snapshot...
+        cpu.restore(data)           # ...e o snapshot o desfaz
+        cpu.run(3000)
+        self.assertEqual(full_state(cpu), expected)
+
+    def test_component_snapshots(self):
+        cpu = stack_sum_cpu()
+        cpu.run(700)
+        cache = DirectCache()
+        cache.restore(cpu.memory.cache.snapshot())
+        self.assertEqual(cache.get_stats(), cpu.memory.get_stats())
+        self.assertEqual([(l.valid, l.tag, l.data) for l in cache.lines],
+                         [(l.valid, l.tag, l.data) for l in cpu.memory.cache.lines])
+
+        ram = MainMemory(16)
+        ram.restore(cpu.memory.ram.snapshot())
+        self.assertEqual(ram.size, 4096)
+        self.assertEqual(ram.dump(0, 4096), cpu.memory.ram.dump(0, 4096))
+
+    def test_invalid_snapshots(self):
+        cpu = stack_sum_cpu()
+        data = cpu.snapshot()
+        with self.assertRaises(SnapshotError):
+            cpu.restore(b"XXXX" + data[4:])
+        with self.assertRaises(SnapshotError):
+            cpu.restore(data[:4] + b"\x63\x00" + data[6:])   # Versão desconhecida
+        with self.assertRaises(SnapshotError):
+            cpu.restore(cpu.registers.snapshot())            # Outro componente
+        with self.assertRaises(SnapshotError):
+            cpu.restore(data[:-10])
+        with self.assertRaises(SnapshotError):
+            cpu.registers.restore(pack_snapshot(b"REGS", b"\x00\x00"))
+
+    def test_decoded_words_cache_is_bounded(self):
+        """Restaurar muitos firmwares distintos não faz o cache de decodificação crescer sem limite."""
+        rng = random.Random(11)
+        cpu = stack_sum_cpu()
+        for _ in range(8):
+            cpu.control_unit.control_store[:] = [rng.getrandbits(32) for _ in range(256)]
+            CPU.from_snapshot(cpu.snapshot())
+        self.assertLessEqual(len(control._decoded_words), control.MAX_DECODED_WORDS)
+        self.assertEqual(cpu.control_unit.control_store.decoded[7],
+                         control.decode_microinstruction(cpu.control_unit.control_store[7]))
+
+class TestClone(unittest.TestCase):
+    def test_clone_is_independent(self):
+        """Clone e original divergem sem interferir um no outro."""
+        cpu = stack_sum_cpu()
+        cpu.run(900)
+        clone = cpu.clone()
+        reference = CPU.from_snapshot(cpu.snapshot())
+
+        clone.memory.ram.write(202, 2)  # Clone passa a decrementar de 2 em 2
+        clone.registers.AC = 0
+        cpu.run(4000)
+        reference.run(4000)
+        clone.run(4000)
+
+        self.assertEqual(full_state(cpu), full_state(reference))
+        self.assertNotEqual(clone.memory.ram.read(201), cpu.memory.ram.read(201))
+        self.assertEqual(clone.memory.ram.read(202), 2)
+        self.assertEqual(cpu.memory.ram.read(202), 1)
+
+    def test_untouched_pages_are_shared(self):
+        """Só as páginas escritas depois do clone são duplicadas (em cada lado)."""
+        cpu = stack_sum_cpu()
+        clone = cpu.clone()
+        original_pages, clone_pages = cpu.memory.ram._pages, clone.memory.ram._pages
+        self.assertTrue(all(a is b for a, b in zip(original_pages, clone_pages)))
+
+        clone.run(3000)  # Escreve em 200/201 (página 0) e na pilha em 0xEFF (página 14)
+        shared = [a is b for a, b in zip(original_pages, clone_pages)]
+        self.assertEqual([i for i, same in enumerate(shared) if not same], [0, 14])
+        self.assertEqual(cpu.memory.ram.read(201), 0)
+
+        cpu.memory.ram.write(0x300, 7)
+        self.assertEqual(clone.memory.ram.read(0x300), 0)
+
+if __name__ == '__main__':
+    unittest.main()
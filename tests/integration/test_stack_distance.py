@@ -0,0 +1,94 @@
+import csv
+import json
+import os
+import random
+import tempfile
+import unittest
+from src.hardware.memory.ram import MainMemory
+from src.hardware.memory.cache import DirectCache, SetAssociativeCache
+from src.hardware.memory.manager import MemoryManager
+from src.hardware.memory.stack_distance import StackDistanceAnalyzer, capture, main, trace_accesses
+from src.hardware.trace import TraceWriter
+from tests.machines import assembled_cpu
+
+# Percorre um vetor (200..263) somando, com pilha, para um fluxo com código e dados
+PROGRAM = """
+LOOP:   LODD 190
+        JZER FIM
+        SUBD 191
+        STOD 190
+        ADDD 192
+        PSHI
+        POP
+        STOD 193
+        ADDD 193
+        JUMP LOOP
+FIM:    JUMP FIM
+"""
+
+SIZES, WAYS, BLOCKS = (16, 32, 64, 128), (1, 2, 4), (1, 2, 4)
+
+def build_cpu():
+    cpu = assembled_cpu(PROGRAM, [64, 1, 200, 0], 190)
+    cpu.memory.ram.load_program(list(range(64)), 200)
+    return cpu
+
+def simulate(stream, size, block, ways, sets):
+    """Hits/misses de uma SetAssociativeCache LRU real sobre o mesmo fluxo."""
+    mmu = MemoryManager(MainMemory(1024), SetAssociativeCache(sets, ways, block, "lru"))
+    for address, write in stream:
+        if write:
+            mmu.write(address, 1)
+        else:
+            mmu.read(address)
+    return mmu.get_stats()
+
+class TestStackDistance(unittest.TestCase):
+    def test_matches_lru_simulation(self):
+        """Uma passada dá os mesmos hits/misses de simular cada configuração da grade."""
+        rng = random.Random(4)
+        stream = [(rng.choice((0, 100, 600)) + rng.randrange(80), rng.random() < 0.25) for _ in range(4000)]
+        rows = StackDistanceAnalyzer(SIZES, WAYS, BLOCKS).feed(stream).results()
+        self.assertEqual(len(rows), len(SIZES) * len(WAYS) * len(BLOCKS))
+        for row in rows:
+            expected = simulate(stream, row["size"], row["block_size"], row["ways"], row["sets"])
+            self.assertEqual((row["hits"], row["misses"]), (expected["hits"], expected["misses"]), row)
+
+    def test_capture_and_trace_sources(self):
+        """Capturado do MemoryManager (modo block) ou lido de um trace: mesmo resultado da cache real."""
+        cpu = build_cpu()
+        cpu.set_mode("block")
+        analyzer = StackDistanceAnalyzer(SIZES, WAYS, BLOCKS)
+        with capture(cpu.memory, analyzer):
+            cpu.run(30_000)
+        self.assertIsInstance(cpu.memory.cache, DirectCache)
+        direct = [row for row in analyzer.results()
+                  if (row["size"], row["block_size"], row["ways"]) == (64, 4, 1)][0]
+        self.assertEqual({"hits": direct["hits"], "misses": direct["misses"]}, cpu.memory.get_stats())
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "prog.mtrc")
+            with TraceWriter(path) as writer:
+                writer.run(build_cpu(), 30_000)
+            from_trace = StackDistanceAnalyzer(SIZES, WAYS, BLOCKS).feed(trace_accesses(path))
+            self.assertEqual(from_trace.results(), analyzer.results())
+            self.assertEqual((from_trace.reads, from_trace.writes), (analyzer.reads, analyzer.writes))
+
+            # Linha de comando: CSV + séries para gráfico
+            out, series = os.path.join(tmp, "grid.csv"), os.path.join(tmp, "grid.json")
+            self.assertEqual(main([path, "--sizes", "16,64", "--ways", "1,2", "--blocks", "4",
+                                   "-o", out, "--json", series]), 0)
+            with open(out, newline="") as f:
+                rows = list(csv.DictReader(f))
+            self.assertEqual([(r["size"], r["ways"]) for r in rows], [("16", "1"), ("16", "2"), ("64", "1"), ("64", "2")])
+            with open(series) as f:
+                self.assertEqual(sorted(json.load(f)), ["B=4 W=1", "B=4 W=2"])
+
+    def test_invalid_grid(self):
+        with self.assertRaises(ValueError):
+            StackDistanceAnalyzer([48], [1], [4])
+        # Tamanho menor que um conjunto: a combinação fica fora da grade
+        self.assertEqual(StackDistanceAnalyzer([8], [1, 4], [4]).configs, [(8, 4, 1, 2)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+from src.hardware.memory.cache import DirectCache
+from src.hardware.memory.access_log import AccessLog
+from src.hardware.memory.timing import MemoryTiming, WaitState
+from tests.machines import stack_sum_cpu
+
+def count_instructions(cycles):
+    """Instruções iniciadas (passagens pelo MPC 0) em 'cycles' ciclos de CPU.step()."""
+    cpu = stack_sum_cpu()
+    count = 0
+    for _ in range(cycles):
+        count += cpu.control_unit.MPC == 0
+        cpu.step()
+    return count
+
+class TestMemoryTiming(unittest.TestCase):
+    def test_default_latencies_match_firmware(self):
+        """Com hit/escrita em 2 ciclos o firmware não para: só os misses geram stall."""
+        cpu = stack_sum_cpu()
+        cpu.set_mode("block")
+        timing = MemoryTiming(miss_penalty=6, block_transfer=1)
+        cpu.memory.start_timing(timing, cpu)
+        self.assertEqual(timing.check_firmware(), [])
+        cpu.run(5000)
+        stats = timing.get_stats()
+
+        plain = stack_sum_cpu()
+        plain.run(5000)
+        self.assertEqual(cpu.registers.debug_state(), plain.registers.debug_state())
+        self.assertEqual(stats["cycles"], 5000)
+        self.assertEqual(stats["instructions"], count_instructions(5000))
+        # Cada miss espera 2 + 6 + 4 ciclos e o firmware dá 2
+        self.assertEqual(stats["stall_cycles"], stats["read_misses"] * 10)
+        self.assertEqual(stats["total_cycles"], 5000 + stats["stall_cycles"])
+        self.assertGreater(stats["effective_cpi"], stats["cpi"])
+        # Cada operação de leitura aparece duas vezes na cache (rd por dois ciclos)
+        cache = plain.memory.get_stats()
+        self.assertEqual(stats["reads"], (cache["hits"] + cache["misses"] + 1) // 2)
+        self.assertEqual(stats["read_misses"], cache["misses"])
+
+    def test_geometry_changes_runtime(self):
+        """Blocos maiores: menos misses, mas cada um custa mais a transferência."""
+        totals = {}
+        for block_size in (2, 8):
+            cpu = stack_sum_cpu(DirectCache(size_lines=8, block_size=block_size))
+            timing = MemoryTiming(miss_penalty=4, block_transfer=2)
+            cpu.memory.start_timing(timing, cpu)
+            cpu.run(5000)
+            stats = timing.get_stats()
+            self.assertEqual(stats["stall_cycles"], stats["read_misses"] * (2 + 4 + 2 * block_size - 2))
+            totals[block_size] = stats
+        self.assertLess(totals[8]["read_misses"], totals[2]["read_misses"])
+
+    def test_insufficient_wait_states(self):
+        """Hit de 3 ciclos: o fetch e as leituras de dados (2 ciclos de rd) param a CPU."""
+        cpu = stack_sum_cpu()
+        timing = MemoryTiming(hit_latency=3, miss_penalty=0, block_transfer=0)
+        cpu.memory.start_timing(timing, cpu)
+        problems = timing.check_firmware()
+        self.assertIn(WaitState(0, "rd", 2, 3), problems)
+        self.assertIn(WaitState(10, "rd", 2, 3), problems)
+        self.assertFalse([p for p in problems if p.kind == "wr"])
+        cpu.run(3000)
+        self.assertEqual(timing.stall_cycles, timing.reads)
+        self.assertEqual(timing.short_waits, timing.reads)
+
+        timing.reset_stats()
+        cpu.run(100)
+        self.assertEqual(timing.get_stats()["cycles"], 100)
+
+    def test_timing_and_recording_together(self):
+        cpu = stack_sum_cpu()
+        timing, log = MemoryTiming(), AccessLog()
+        cpu.memory.start_timing(timing, cpu)
+        cpu.memory.start_recording(log, cpu)
+        cpu.run(1000)
+        self.assertIs(cpu.memory.stop_recording(), log)
+        self.assertTrue(cpu.memory.instrumented)
+        cpu.run(1000)
+        self.assertIs(cpu.memory.stop_timing(), timing)
+        self.assertFalse(cpu.memory.instrumented)
+        self.assertEqual(timing.get_stats()["cycles"], 2000)
+        self.assertEqual(sum(1 for _, _, kind in log if kind == 2), 2 * count_instructions(1000))
+
+if __name__ == '__main__':
+    unittest.main()
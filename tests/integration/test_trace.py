@@ -0,0 +1,109 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+from src.hardware.trace import TraceError, TraceReader, TraceWriter
+from tests.machines import assembled_cpu
+
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+PROGRAM = """
+LOOP:   LODD 300
+        JZER FIM
+        SUBD 301
+        STOD 300
+        PUSH
+        POP
+        JUMP LOOP
+FIM:    JUMP FIM
+"""
+
+def build_cpu():
+    return assembled_cpu(PROGRAM, [30, 1], 300)
+
+def expected_records(cycles):
+    """(ciclo, mpc, pc, ac, mar, mbr, n, z, rd, wr) de cada ciclo, via CPU.step()."""
+    cpu = build_cpu()
+    rows = []
+    for cycle in range(cycles):
+        mpc = cpu.control_unit.MPC
+        signals = cpu.control_unit.control_store.decoded[mpc]
+        cpu.step()
+        r = cpu.registers
+        rows.append((cycle, mpc, r.PC, r.AC, r.MAR, r.MBR, cpu.datapath.alu.N, cpu.datapath.alu.Z,
+                     signals.rd, signals.wr))
+    return rows
+
+def summary(record):
+    return (record.cycle, record.mpc, record.pc, record.ac, record.mar, record.mbr,
+            record.n, record.z, record.rd, record.wr)
+
+class TestTrace(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "run.trace")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_full_trace_matches_step(self):
+        cpu = build_cpu()
+        with TraceWriter(self.path) as writer:
+            self.assertEqual(writer.run(cpu, 2000), 2000)
+        self.assertEqual(writer.records, 2000)
+
+        with TraceReader(self.path) as reader:
+            self.assertEqual(len(reader), 2000)
+            self.assertEqual([summary(r) for r in reader], expected_records(2000))
+            self.assertEqual(reader[-1].cycle, 1999)
+            self.assertEqual(reader.find(1234).cycle, 1234)
+            record = reader[57]
+            self.assertEqual(record.mir, cpu.control_unit.control_store[record.mpc])
+            if record.rd or record.wr:
+                self.assertEqual(record.address, record.mar)
+
+    def test_cycle_window_and_pc_range(self):
+        """Só a janela [500, 900) e o PC em [4, 6) são gravados."""
+        cpu = build_cpu()
+        with TraceWriter(self.path, cycles=(500, 900), pc_range=(4, 6)) as writer:
+            executed = writer.run(cpu, 5000)
+        self.assertEqual(executed, 900)
+        self.assertEqual(cpu.cycles, 900)
+
+        expected = [row for row in expected_records(900) if row[0] >= 500 and 4 <= row[2] < 6]
+        with TraceReader(self.path) as reader:
+            self.assertEqual([summary(r) for r in reader], expected)
+            self.assertIsNone(reader.find(expected[0][0] - 1))
+            self.assertEqual(reader.index_of(0), 0)
+            self.assertEqual(summary(reader.find(expected[5][0])), expected[5])
+
+    def test_until_pc(self):
+        cpu = build_cpu()
+        with TraceWriter(self.path) as writer:
+            writer.run(cpu, 100000, until_pc=7)
+        with TraceReader(self.path) as reader:
+            self.assertEqual(reader[-1].pc, 7)
+            self.assertEqual(reader[-1].cycle + 1, cpu.cycles)
+            self.assertEqual(reader[-1].ac, 0)
+
+    @unittest.skipUnless(HAS_NUMPY, "NumPy não instalado")
+    def test_numpy_view(self):
+        cpu = build_cpu()
+        with TraceWriter(self.path) as writer:
+            writer.run(cpu, 1000)
+        with TraceReader(self.path) as reader:
+            array = reader.to_numpy()
+            self.assertEqual(len(array), 1000)
+            self.assertEqual(array["cycle"].tolist(), list(range(1000)))
+            self.assertEqual(array["pc"].tolist(), [r.pc for r in reader])
+            self.assertEqual(int(array[321]["mbr"]), reader[321].mbr)
+            del array
+
+    def test_invalid_file(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not a trace at all")
+        with self.assertRaises(TraceError):
+            TraceReader(self.path)
+
+if __name__ == '__main__':
+    unittest.main()
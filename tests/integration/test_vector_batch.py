@@ -0,0 +1,123 @@
+import importlib.util
+import random
+import unittest
+from tests.machines import build_cpu, random_program
+
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+if HAS_NUMPY:
+    from src.hardware.cpu.vector import VectorCPU
+
+def cpu_state(cpu):
+    return {
+        "registers": cpu.registers.debug_state(),
+        "MPC": cpu.control_unit.MPC,
+        "MIR": cpu.control_unit.MIR,
+        "N": cpu.datapath.alu.N,
+        "Z": cpu.datapath.alu.Z,
+        "cycles": cpu.cycles,
+        "stats": cpu.memory.get_stats(),
+    }
+
+def step_until_fault(cpu, cycles):
+    """Executa CPU.step() 'cycles' vezes; True se uma escrita fora da RAM interrompeu."""
+    try:
+        for _ in range(cycles):
+            cpu.step()
+    except ValueError:
+        return True
+    return False
+
+@unittest.skipUnless(HAS_NUMPY, "NumPy não instalado")
+class TestVectorCPU(unittest.TestCase):
+
+    def compare(self, batch, cpus):
+        for i, cpu in enumerate(cpus):
+            state = batch.machine_state(i)
+            del state["halted"], state["faulted"]
+            self.assertEqual(state, cpu_state(cpu), f"máquina {i}")
+            self.assertEqual(batch.memory[i].tolist(), cpu.memory.ram.dump(0, cpu.memory.ram.size))
+
+    def test_matches_step_per_machine(self):
+        """Programas e dados diferentes por máquina: cada uma igual a CPU.step()."""
+        rng = random.Random(9)
+        count = 12
+        images = [random_program(rng) + [rng.getrandbits(16) for _ in range(64)] for _ in range(count)]
+
+        batch = VectorCPU(count)
+        batch.load_memory(images)
+        batch.set_register("SP", 0x0F00)
+        cpus = []
+        for image in images:
+            cpu = build_cpu(image, ram_size=4096)
+            cpu.registers.SP = 0x0F00
+            cpus.append(cpu)
+
+        faulted = [False] * count
+        for budget in (1, 150, 849):
+            batch.run(budget)
+            for i, cpu in enumerate(cpus):
+                if not faulted[i]:
+                    faulted[i] = step_until_fault(cpu, budget)
+            self.assertEqual(batch.faulted.tolist(), faulted)
+            self.compare(batch, cpus)
+
+    def test_random_microcode_and_faults(self):
+        """Microcódigo aleatório exercita todos os campos; escrita fora da RAM para a máquina."""
+        rng = random.Random(4)
+        store = [rng.getrandbits(32) for _ in range(256)]
+        count = 8
+        images = [[rng.getrandbits(16) for _ in range(1024)] for _ in range(count)]
+
+        batch = VectorCPU(count, ram_size=1024, control_store=store)
+        batch.load_memory(images)
+        cpus = []
+        for image in images:
+            cpu = build_cpu(image, ram_size=1024)
+            cpu.control_unit.load_firmware(store)
+            cpus.append(cpu)
+
+        batch.run(300)
+        faulted = [step_until_fault(cpu, 300) for cpu in cpus]
+        self.assertEqual(batch.faulted.tolist(), faulted)
+        self.compare(batch, cpus)
+
+    def test_out_of_range_write_faults(self):
+        """STOD fora da RAM: só a máquina cujo endereço estoura para, no mesmo ponto de CPU.step()."""
+        program = [(1 << 12) | 0x0200, (6 << 12) | 0]  # STOD 0x200; JUMP 0
+        batch = VectorCPU(2, ram_size=0x400)
+        batch.load_program(program)
+        batch.run(20)
+        self.assertFalse(batch.faulted.any())
+
+        small = VectorCPU(2, ram_size=0x100)
+        small.load_program(program)
+        small.run(50)
+        cpu = build_cpu(program, ram_size=0x100)
+        self.assertTrue(step_until_fault(cpu, 50))
+        self.assertTrue(small.faulted.all())
+        self.assertTrue(small.halted.all())
+        self.compare(small, [cpu, cpu])
+
+    def test_halt_on_pc(self):
+        """Laço 'soma AC a partir do dado' diverge por máquina; cada uma para no seu PC final."""
+        program = [
+            (0 << 12) | 20,   # 0: LODD 20
+            (5 << 12) | 4,    # 1: JZER 4
+            (3 << 12) | 21,   # 2: SUBD 21
+            (6 << 12) | 1,    # 3: JUMP 1
+            (6 << 12) | 4,    # 4: JUMP 4
+        ]
+        batch = VectorCPU(4)
+        batch.load_program(program)
+        batch.memory[:, 20] = [0, 3, 7, 1]
+        batch.memory[:, 21] = 1
+
+        batch.run(10000, until_pc=4)
+
+        self.assertTrue(batch.halted.all())
+        self.assertEqual(batch.register("AC").tolist(), [0, 0, 0, 0])
+        cycles = batch.cycles.tolist()
+        self.assertEqual(sorted(cycles), [cycles[0], cycles[3], cycles[1], cycles[2]])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+Máquinas e programas compartilhados pelos testes de integração.
+"""
+from src.hardware.memory.ram import MainMemory
+from src.hardware.memory.cache import DirectCache
+from src.hardware.memory.manager import MemoryManager
+from src.hardware.cpu.cpu import CPU
+from src.assembler.parser import AssemblyParser
+from src.assembler.codegen import CodeGenerator
+
+# Soma 1..N (N em 200) em 201, com pilha (PUSH/POP) para exercitar SP e a RAM
+STACK_SUM = """
+LOOP:   LODD 200
+        JZER FIM
+        PUSH
+        ADDD 201
+        STOD 201
+        POP
+        SUBD 202
+        STOD 200
+        JUMP LOOP
+FIM:    JUMP FIM
+"""
+
+# Soma 1..N (N em 200) em 201 com pilha e sub-rotinas; SOMA chama DOBRA, que é folha
+CALL_SUM = """
+LOOP:   LODD 200
+        JZER FIM
+        PUSH
+        CALL SOMA
+        POP
+        SUBD 202
+        STOD 200
+        JUMP LOOP
+FIM:    JUMP FIM
+SOMA:   LODL 1
+        ADDD 201
+        STOD 201
+        CALL DOBRA
+        RETN
+DOBRA:  LODD 201
+        ADDD 201
+        RETN
+"""
+
+def build_cpu(program, ram_size=65536, cache=None):
+    """CPU com 'program' (palavras já montadas) carregado a partir do endereço 0."""
+    mmu = MemoryManager(MainMemory(ram_size), DirectCache() if cache is None else cache)
+    cpu = CPU(mmu)
+    mmu.ram.load_program(program)
+    return cpu
+
+def assemble(source):
+    """Monta 'source'; devolve (palavras, tabela de símbolos, linhas analisadas)."""
+    codegen = CodeGenerator()
+    lines = AssemblyParser().parse(source)
+    return codegen.generate(lines), codegen.symbol_table, lines
+
+def assembled_cpu(source, data=(), data_start=200, sp=0xF00, cache=None, ram_size=4096):
+    """CPU com 'source' montado em 0, 'data' a partir de 'data_start' e SP em 'sp' (None: SP do reset)."""
+    cpu = build_cpu(assemble(source)[0], ram_size, cache)
+    cpu.memory.ram.load_program(list(data), data_start)
+    if sp is not None:
+        cpu.registers.SP = sp
+    return cpu
+
+def stack_sum_cpu(cache=None):
+    """STACK_SUM com N = 50."""
+    return assembled_cpu(STACK_SUM, [50, 0, 1], cache=cache)
+
+def machine_state(cpu):
+    """Fotografia do estado visível (registradores, sequenciador, memória, estatísticas da cache)."""
+    return (
+        cpu.registers.debug_state(),
+        cpu.control_unit.MPC, cpu.control_unit.MIR,
+        cpu.datapath.alu.N, cpu.datapath.alu.Z,
+        cpu.cycles,
+        cpu.memory.ram.dump(0, cpu.memory.ram.size),
+        cpu.memory.get_stats(),
+    )
+
+def full_state(cpu):
+    """machine_state mais a saída da ULA, o modo e o conteúdo de cada linha da cache."""
+    return machine_state(cpu) + (
+        cpu.datapath.alu.output, cpu.mode,
+        [(line.valid, line.tag, line.data[:]) for line in cpu.memory.cache.lines],
+    )
+
+def random_program(rng, length=64):
+    """Programa aleatório com todas as instruções MAC-1 (incluindo o prefixo 1111)."""
+    program = []
+    for _ in range(length):
+        opcode = rng.randrange(16)
+        if opcode < 15:
+            program.append((opcode << 12) | rng.randrange(length * 2))
+        else:
+            program.append(0xF000 | (rng.randrange(8) << 9) | rng.randrange(256))
+    return program
@@ -1,6 +1,27 @@
 import unittest
-from src.hardware.cpu.alu import ArithmeticLogicUnit
-from src.common.constants import ALUOp, MASK_16BIT
+from src.hardware.cpu.alu import ArithmeticLogicUnit, FUSED_KERNELS, LAZY_KERNELS
+from src.hardware.cpu.shifter import Shifter
+from src.common.constants import ALUOp, ShifterOp, MASK_16BIT
+
+def reference_alu(op, a, b):
+    """Implementação original (cadeia if/elif) usada como oráculo."""
+    if op == ALUOp.ADD.value:
+        result = (a + b) & MASK_16BIT
+    elif op == ALUOp.AND.value:
+        result = a & b
+    elif op == ALUOp.IDENTITY.value:
+        result = a & MASK_16BIT
+    else:
+        result = (~a) & MASK_16BIT
+    return result, bool((result >> 15) & 1), result == 0
+
+def reference_shift(op, value):
+    result = value & MASK_16BIT
+    if op == ShifterOp.RIGHT.value:
+        return (result >> 1) & MASK_16BIT
+    if op == ShifterOp.LEFT.value:
+        return (result << 1) & MASK_16BIT
+    return result
 
 class TestALU(unittest.TestCase):
     
@@ -51,5 +72,24 @@ class TestALU(unittest.TestCase):
         self.assertEqual(res, 0xFFFF)
         self.assertTrue(self.alu.N, "0xFFFF representa -1, então N deve ser True.")
 
+    def test_fused_kernels_match_reference(self):
+        """As 16 combinações (alu, sh) fundidas são bit a bit iguais a ULA + deslocador."""
+        edges = [0, 1, 0x7FFF, 0x8000, 0xFFFF, 0x0FFF, 0x00FF, 0x10000 | 0x8001]
+        operands_a = list(range(0, 0x10000, 37)) + edges
+        shifter = Shifter()
+        for op in range(4):
+            for sh in range(4):
+                fused = FUSED_KERNELS[(op << 2) | sh]
+                lazy = LAZY_KERNELS[(op << 2) | sh]
+                for a in operands_a:
+                    for b in edges:
+                        out, n, z = reference_alu(op, a, b)
+                        expected = reference_shift(sh, out)
+                        self.assertEqual(fused(a, b), (expected, out, n, z), (op, sh, a, b))
+                        self.assertEqual(lazy(a, b), (expected, out))
+                        self.assertEqual(self.alu.execute(op, a, b), out)
+                        self.assertEqual((self.alu.N, self.alu.Z), (n, z))
+                        self.assertEqual(shifter.shift(sh, out), expected)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -82,5 +82,28 @@ class TestControlUnit(unittest.TestCase):
         # Verifica se o MIR recebeu o valor
         self.assertEqual(self.cu.MIR, magic_instruction, "O MIR não foi atualizado corretamente pelo FETCH.")
 
+    def test_decode_uses_predecoded_entry(self):
+        """O decode após o fetch deve devolver a entrada cacheada (sem nova alocação)."""
+        self.cu.load_firmware([0x00100001, 0x80340002])
+        self.cu.update_mpc(1)
+        self.cu.fetch()
+        first = self.cu.decode()
+        self.cu.fetch()
+        self.assertIs(self.cu.decode(), first, "O decode deveria reutilizar a entrada pré-decodificada.")
+        self.assertEqual(first.addr, 2)
+        self.assertTrue(first.enc)
+
+    def test_rewrite_invalidates_single_entry(self):
+        """Reescrever control_store[i] deve redecodificar apenas a entrada i."""
+        self.cu.load_firmware([0x00000001, 0x00000002])
+        untouched = self.cu.control_store.decoded[0]
+
+        self.cu.control_store[1] = 0x000000AA
+        self.cu.update_mpc(1)
+        self.cu.fetch()
+
+        self.assertEqual(self.cu.decode().addr, 0xAA)
+        self.assertIs(self.cu.control_store.decoded[0], untouched)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
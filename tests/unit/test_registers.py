@@ -1,5 +1,5 @@
 import unittest
-from src.hardware.cpu.registers import Registers
+from src.hardware.cpu.registers import Registers, REGISTER_INDEX, BUS_CONSTANTS
 from src.common.constants import MASK_16BIT
 
 class TestRegisters(unittest.TestCase):
@@ -48,5 +48,23 @@ class TestRegisters(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.regs.read('XYZ')
 
+    def test_named_attributes_are_views_of_the_bus_file(self):
+        """registers.AC e companhia leem/escrevem a mesma posição usada pelos barramentos."""
+        self.regs.AC = 0x0042
+        self.assertEqual(self.regs.file[4], 0x0042)
+        self.regs.file[REGISTER_INDEX['SP']] = 0x0800
+        self.assertEqual(self.regs.SP, 0x0800)
+        self.regs.write('D', 7)
+        self.assertEqual(self.regs.file[15], 7)
+
+    def test_bus_constants_preloaded(self):
+        for index, value in BUS_CONSTANTS.items():
+            self.assertEqual(self.regs.file[index], value)
+
+    def test_scratch_registers_in_debug_state(self):
+        self.regs.F = 3
+        state = self.regs.debug_state()
+        self.assertEqual([state[name] for name in "ABCDEF"], [0, 0, 0, 0, 0, 3])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file